@@ -0,0 +1,13 @@
+"""Load openclaw-monitor.py as a module (its file name is not importable)"""
+
+import importlib.util
+from pathlib import Path
+
+MONITOR_PATH = Path(__file__).resolve().parent.parent / "openclaw-monitor.py"
+
+
+def load_monitor():
+    spec = importlib.util.spec_from_file_location("openclaw_monitor", MONITOR_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
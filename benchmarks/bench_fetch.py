@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: FetchScheduler against a local bare repository standing in for origin
+
+Clones a bare repository, pushes an upstream commit to it from a second
+clone, and walks the scheduler through a fetch, a skip while FETCH_HEAD
+is fresh, a forced fetch, and failures with exponential backoff after
+the remote disappears. Reports the time of a real fetch and of a
+skipped one, and exits with status 1 if any step does not behave as
+expected.
+
+Usage: python3 benchmarks/bench_fetch.py [runs]
+"""
+
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from _monitor import load_monitor
+
+
+def git(repo, *args):
+    return subprocess.run(["git", "-c", "user.name=bench", "-c", "user.email=bench@example.com", *args],
+                          cwd=repo, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def push_commit(upstream, message):
+    with open(os.path.join(upstream, "README"), "a") as f:
+        f.write(message + "\n")
+    git(upstream, "add", "-A")
+    git(upstream, "commit", "-q", "-m", message)
+    git(upstream, "push", "-q", "origin", "HEAD:main")
+    return git(upstream, "rev-parse", "HEAD")
+
+
+def build_repos(directory):
+    """(bare origin, checkout, second clone used to push upstream commits)"""
+    origin = os.path.join(directory, "origin.git")
+    git(directory, "init", "-q", "--bare", origin)
+    upstream = os.path.join(directory, "upstream")
+    git(directory, "clone", "-q", origin, upstream)
+    push_commit(upstream, "base")
+    checkout = os.path.join(directory, "checkout")
+    git(directory, "clone", "-q", "-b", "main", origin, checkout)
+    return origin, checkout, upstream
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    monitor = load_monitor()
+    directory = tempfile.mkdtemp()
+    origin, checkout, upstream = build_repos(directory)
+    state_file = os.path.join(directory, "fetch-state.json")
+    scheduler = monitor.FetchScheduler(checkout, state_file, min_interval=900, base_backoff=60)
+    failed = []
+
+    def check(label, condition):
+        print(f"{'ok  ' if condition else 'FAIL'} {label}")
+        if not condition:
+            failed.append(label)
+
+    # A real fetch picks up the upstream commit and records the refs
+    expected = push_commit(upstream, "upstream 1")
+    result = scheduler.maybe_fetch()
+    check("first fetch runs and succeeds", result["fetched"] and result["ok"])
+    check("remote ref recorded in the state", scheduler.state.get("refs", {}).get("remote") == expected)
+    check("status sees the new commit", monitor.GitStatusReader(checkout).status()["commits_behind"] == 1)
+
+    # FETCH_HEAD is now fresh: later calls continue from the refs on disk
+    skipped, fetched = [], []
+    for n in range(runs):
+        start = time.perf_counter()
+        result = scheduler.maybe_fetch()
+        skipped.append((time.perf_counter() - start) * 1000)
+        fresh_skip = result == {"fetched": False, "ok": True, "skipped": "fresh", "error": ""}
+        if n == 0:
+            check("fresh FETCH_HEAD skips the fetch", fresh_skip)
+        start = time.perf_counter()
+        result = scheduler.maybe_fetch(force=True)
+        fetched.append((time.perf_counter() - start) * 1000)
+        if n == 0:
+            check("force fetches despite a fresh FETCH_HEAD", result["fetched"] and result["ok"])
+
+    # Without the remote every failure doubles the backoff
+    shutil.rmtree(origin)
+    result = scheduler.maybe_fetch(force=True)
+    check("fetch from a missing remote fails", result["fetched"] and not result["ok"] and result["error"])
+    first_wait = scheduler.state["next_allowed"] - time.time()
+    result = scheduler.maybe_fetch(force=True)
+    check("backoff skips the next fetch, even a forced one",
+          not result["fetched"] and result["skipped"] == "backoff")
+    scheduler.state["next_allowed"] = 0
+    scheduler.maybe_fetch(force=True)
+    second_wait = scheduler.state["next_allowed"] - time.time()
+    check(f"backoff doubles ({first_wait:.0f}s, then {second_wait:.0f}s)",
+          55 < first_wait <= 60 and 115 < second_wait <= 120)
+
+    # A new scheduler (another run of the monitor) continues from the state file
+    reloaded = monitor.FetchScheduler(checkout, state_file)
+    check("failures and backoff survive a restart",
+          reloaded.state["failures"] == 2 and reloaded.skip_reason(force=True) == "backoff")
+    check("last good refs survive a restart", reloaded.state.get("refs", {}).get("remote") == expected)
+
+    print(f"{runs} runs: skipped call median {statistics.median(skipped):.3f} ms, "
+          f"git fetch from a local bare repo median {statistics.median(fetched):.1f} ms")
+    shutil.rmtree(directory, ignore_errors=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
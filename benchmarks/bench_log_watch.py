@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark: LogWatcher staleness detection
+
+Writes to a temporary log for a while, then stops, and reports how soon
+after crossing the threshold the watcher reported the log stale, how many
+times it looked at the log while it was busy, and how fast a new write
+was noticed. Runs once with inotify (on Linux) and once with the polling
+fallback.
+
+Usage: python3 benchmarks/bench_log_watch.py [threshold seconds]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from _monitor import load_monitor
+
+
+def run(monitor, threshold, polling):
+    directory = tempfile.mkdtemp()
+    log = os.path.join(directory, "gateway.log")
+    flips = []
+    watcher = monitor.LogWatcher(lambda: (os.path.join(directory, "daily.log"), log),
+                                 threshold=threshold,
+                                 on_change=lambda fresh: flips.append((time.time(), fresh)),
+                                 use_inotify=not polling).start()
+
+    # Busy: one line every 50 ms for twice the threshold
+    checks = watcher.checks
+    end = time.time() + threshold * 2
+    while time.time() < end:
+        with open(log, "a") as f:
+            f.write("line\n")
+        time.sleep(0.05)
+    last_write = os.stat(log).st_mtime
+    busy_checks = watcher.checks - checks
+
+    while watcher.fresh:
+        time.sleep(0.005)
+    stale_late = flips[-1][0] - (last_write + threshold)
+
+    written = time.time()
+    with open(log, "a") as f:
+        f.write("again\n")
+    while not watcher.fresh:
+        time.sleep(0.005)
+    recovered = flips[-1][0] - written
+    watcher.close()
+
+    print(f"{watcher.backend:8}  checks while busy: {busy_checks:3d}   "
+          f"stale {stale_late * 1000:7.1f} ms after threshold   "
+          f"fresh again after {recovered * 1000:7.1f} ms")
+
+
+def main():
+    threshold = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    monitor = load_monitor()
+    print(f"threshold {threshold:.1f} s, one write every 50 ms for {threshold * 2:.1f} s")
+    try:
+        monitor.Inotify().close()
+    except OSError as e:
+        print(f"inotify unavailable: {e}")
+    else:
+        run(monitor, threshold, polling=False)
+    run(monitor, threshold, polling=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Benchmark: one ProcessTable pass vs. one `pgrep -f` fork per pattern
+
+Usage: python3 benchmarks/bench_process_scan.py [rounds]
+"""
+
+import subprocess
+import sys
+import time
+
+from _monitor import load_monitor
+
+PATTERNS = ["watchdog", "openclaw-gateway", "openclaw.*tui"]
+
+
+def pgrep_round():
+    return {p: subprocess.run(f"pgrep -f '{p}'", shell=True, capture_output=True,
+                              text=True).stdout.split()
+            for p in PATTERNS}
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    monitor = load_monitor()
+    table = monitor.ProcessTable(PATTERNS)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        pgrep_round()
+    pgrep_ms = (time.perf_counter() - start) * 1000 / rounds
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        table.scan()
+    scan_ms = (time.perf_counter() - start) * 1000 / rounds
+
+    print(f"pgrep x{len(PATTERNS)}:    {pgrep_ms:8.2f} ms/tick")
+    print(f"ProcessTable: {scan_ms:8.2f} ms/tick  ({pgrep_ms / scan_ms:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
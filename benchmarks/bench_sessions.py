@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark: SessionTracker on a synthetic structured log
+
+Writes a log in the OpenClaw JSON format in which many sessions enter and
+leave "processing" concurrently, and reports how fast the tracker follows
+it, its peak memory, and the stuck sessions and p50/p95 durations it finds.
+Memory stays flat past `max_sessions` concurrent sessions, and the
+stuck ones are still found.
+
+Usage: python3 benchmarks/bench_sessions.py [concurrent sessions] [spells per session]
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from _monitor import load_monitor
+
+
+def iso(ts):
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(ts)) + f".{int(ts * 1000) % 1000:03d}Z"
+
+
+def state_line(ts, session_id, prev, new):
+    message = f'session state: sessionId={session_id} prev={prev} new={new} reason="run" queueDepth=0'
+    return json.dumps({"0": '{"subsystem":"diagnostic"}', "1": message,
+                       "_meta": {"date": iso(ts)}, "time": iso(ts)}) + "\n"
+
+
+def write_log(path, concurrent, spells, stuck):
+    """Interleaved spells of 1-30 s; the first `stuck` sessions never finish"""
+    events = []
+    start = time.time() - 3600
+    for n in range(concurrent):
+        ts = start + random.uniform(0, 60)
+        for _ in range(spells):
+            events.append((ts, f"s{n}", "idle", "processing"))
+            if n < stuck:
+                break
+            ts += random.uniform(1, 30)
+            events.append((ts, f"s{n}", "processing", "idle"))
+            ts += random.uniform(0, 60)
+    events.sort()
+    with open(path, "w") as f:
+        f.writelines(state_line(*event) for event in events)
+    return len(events)
+
+
+def main():
+    concurrent = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    spells = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    monitor = load_monitor()
+    path = os.path.join(tempfile.mkdtemp(), "openclaw.log")
+    with open(path, "w"):
+        pass
+    tracker = monitor.SessionTracker(lambda: path)
+    tracker.poll()
+    lines = write_log(path, concurrent, spells, stuck=3)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    tracker.poll()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    stuck = tracker.stuck()
+    print(f"{lines} state lines, {concurrent} sessions: {lines / elapsed:,.0f} lines/s, "
+          f"peak {peak / 1024 / 1024:.1f} MB")
+    print(f"tracked {len(tracker.sessions)} (dropped {tracker.dropped}), "
+          f"stuck {len(stuck)}, longest {stuck[0][1] if stuck else 0:.0f} s")
+    print(f"processing p50 {tracker.percentile(50):.1f} s, p95 {tracker.percentile(95):.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark: GUI start-up time
+
+Reports, from before the monitor module is loaded:
+  - time to first paint: the main window is mapped and drawn
+  - time to first status: the first probe round is applied to the panel
+and how long the deferred advanced section takes when it is first
+expanded. Needs a display (run under Xvfb on a headless machine). Uses
+the real ~/.openclaw config, like the monitor itself.
+
+Usage: python3 benchmarks/bench_startup.py [--expanded]
+"""
+
+import sys
+import time
+
+from _monitor import load_monitor
+
+
+def main():
+    expanded = "--expanded" in sys.argv[1:]
+    t0 = time.perf_counter()
+    monitor = load_monitor()
+    t_import = time.perf_counter()
+
+    marks = {}
+
+    def finish(app):
+        if "paint" in marks and "status" in marks:
+            app.root.after_idle(app.root.quit)
+
+    apply_snapshot = monitor.OpenClawMonitor.apply_snapshot
+
+    def timed_apply(self, snapshot, samples=None):
+        apply_snapshot(self, snapshot, samples)
+        if "status" not in marks:
+            marks["status"] = time.perf_counter()
+            finish(self)
+
+    monitor.OpenClawMonitor.apply_snapshot = timed_apply
+
+    app = monitor.OpenClawMonitor()
+    t_init = time.perf_counter()
+    if expanded:
+        # As if it was saved expanded, without touching the saved config
+        app.build_advanced_section()
+        app.advanced_container.pack(fill="both", expand=True, before=app.update_label)
+
+    def painted():
+        marks.setdefault("paint", time.perf_counter())
+        finish(app)
+
+    # Runs once the window is mapped and the pending redraws are done
+    app.root.bind("<Map>", lambda e: e.widget is app.root and app.root.after_idle(painted), add="+")
+    app.root.after(10000, app.root.quit)
+    app.root.mainloop()
+
+    build_ms = None
+    if not app.advanced_built:
+        start = time.perf_counter()
+        app.build_advanced_section()
+        build_ms = (time.perf_counter() - start) * 1000
+
+    print(f"import:           {(t_import - t0) * 1000:8.1f} ms")
+    print(f"construct:        {(t_init - t0) * 1000:8.1f} ms")
+    for label, key in (("first paint", "paint"), ("first status", "status")):
+        if key in marks:
+            print(f"{label + ':':17} {(marks[key] - t0) * 1000:8.1f} ms")
+        else:
+            print(f"{label + ':':17} not reached within 10 s")
+    if build_ms is not None:
+        print(f"advanced section: {build_ms:8.1f} ms (deferred to first expand)")
+
+    app.running = False
+    app.scheduler.close()
+    app.log_watcher.close()
+    app.probe_engine.shutdown()
+    app.usage.close()
+    app.history.close()
+    app.root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark: GatewaySupervisor crash detection and output capture
+
+Starts a stub gateway that prints a burst of lines, then exits with an
+error after a short random delay, and reports how long after its exit
+the supervisor called on_exit, and whether every line reached on_lines
+(and so the rotating log). Runs with a pidfd where the system has one
+and with the waitpid thread fallback. A watchdog polling every 30 s
+notices the same crash 15 s later on average.
+
+Usage: python3 benchmarks/bench_supervisor.py [runs] [lines]
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from _monitor import load_monitor
+
+STUB = r"""
+import os, sys, time
+for i in range(int(sys.argv[1])):
+    sys.stdout.write(f"2026-01-01T00:00:00Z info request {i} handled in 3 ms\n")
+sys.stdout.flush()
+time.sleep(float(sys.argv[2]))
+sys.stderr.write(f"fatal: stub crash {time.time()!r}\n")
+sys.stderr.flush()
+os._exit(1)
+"""
+
+
+def run(monitor, runs, lines, use_pidfd):
+    directory = tempfile.mkdtemp()
+    stub = os.path.join(directory, "stub.py")
+    with open(stub, "w") as f:
+        f.write(STUB)
+    pidfd_open = getattr(os, "pidfd_open", None)
+    if not use_pidfd and pidfd_open:
+        del os.pidfd_open
+
+    latencies, lost = [], 0
+    try:
+        for _ in range(runs):
+            exited = threading.Event()
+            crash_lines = []
+            received = [0]
+
+            def on_lines(batch):
+                received[0] += len(batch)
+                crash_lines.extend(line for line in batch if line.startswith(b"fatal"))
+
+            supervisor = monitor.GatewaySupervisor(
+                [sys.executable, stub, str(lines), str(random.uniform(0.05, 0.2))], directory,
+                os.path.join(directory, "gateway.log"), on_lines=on_lines,
+                on_exit=lambda code: exited.set())
+            supervisor.start()
+            exited.wait(30)
+            noticed = time.time()
+            crashed_at = float(crash_lines[-1].split()[-1])
+            latencies.append((noticed - crashed_at) * 1000)
+            lost += lines + 1 - received[0]
+            supervisor.close()
+    finally:
+        if pidfd_open:
+            os.pidfd_open = pidfd_open
+
+    latencies.sort()
+    print(f"{'pidfd' if use_pidfd else 'waitpid':8} exit noticed after: "
+          f"median {statistics.median(latencies):6.2f} ms, max {latencies[-1]:6.2f} ms   "
+          f"lines lost: {lost}")
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    lines = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    monitor = load_monitor()
+    print(f"{runs} runs, {lines} lines of output each (latency includes the stub's last write)")
+    if hasattr(os, "pidfd_open"):
+        run(monitor, runs, lines, use_pidfd=True)
+    run(monitor, runs, lines, use_pidfd=False)
+
+
+if __name__ == "__main__":
+    main()
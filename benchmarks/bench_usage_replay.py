@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark: replay an OpenClaw log through UsageExtractor
+
+Replays a recorded log (e.g. a multi-GB /tmp/openclaw/openclaw-*.log) from
+the start through the same incremental reader the monitor uses, and
+reports throughput. Without a path, a synthetic log is generated first.
+
+It then replays the log together with a second log holding only its
+usage records, as the daily log and the gateway log share records, and
+exits with status 1 unless every record is counted once.
+
+Usage:
+    python3 benchmarks/bench_usage_replay.py [recorded.log]
+    python3 benchmarks/bench_usage_replay.py --generate-mb 2048
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from _monitor import load_monitor
+
+MODELS = [("anthropic", "claude-opus-4-5"), ("anthropic", "claude-sonnet-4"),
+          ("openai", "gpt-4o-mini"), ("groq", "llama-3.3-70b-versatile")]
+
+
+def generate_log(path, size_mb, usage_every=20):
+    """Write a synthetic JSON-lines log with one usage record per `usage_every` lines"""
+    rng = random.Random(42)
+    target = size_mb * 1024 * 1024
+    written = 0
+    n = 0
+    with open(path, "w") as f:
+        while written < target:
+            n += 1
+            if n % usage_every == 0:
+                provider, model = rng.choice(MODELS)
+                record = {"0": "agent run complete", "1": {
+                    "runId": f"run-{n}", "provider": provider, "model": model,
+                    "usage": {"input": rng.randint(200, 20000), "output": rng.randint(50, 4000),
+                              "cacheRead": rng.randint(0, 50000), "cacheWrite": 0}},
+                    "_meta": {"logLevelName": "INFO", "date": f"2026-01-01T10:{n % 60:02d}:00.000Z"}}
+            else:
+                record = {"0": f"session state changed sessionId=s{n % 500} state=idle",
+                          "_meta": {"logLevelName": "DEBUG", "date": "2026-01-01T10:00:00.000Z"}}
+            line = json.dumps(record) + "\n"
+            f.write(line)
+            written += len(line)
+    return n // usage_every
+
+
+def replay(monitor, tmp, sources):
+    """Replay `sources` ({name: path}) from their first byte; return (records, totals)"""
+    accumulator = monitor.UsageAccumulator(Path(tmp) / f"usage-stats-{len(sources)}.json")
+    extractor = monitor.UsageExtractor(accumulator, {name: (lambda p=path: p)
+                                                     for name, path in sources.items()})
+    # Replay from the first byte instead of following from the end
+    for name, path in sources.items():
+        st = os.stat(path)
+        extractor.tailers[name].restore(
+            {"path": str(path), "identity": [st.st_dev, st.st_ino], "offset": 0})
+    return extractor.poll(), accumulator.totals()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("log", nargs="?", help="recorded log to replay")
+    parser.add_argument("--generate-mb", type=int, default=256,
+                        help="size of the synthetic log when no path is given")
+    args = parser.parse_args()
+    monitor = load_monitor()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.log:
+            log = Path(args.log)
+            expected = None
+        else:
+            log = Path(tmp) / "openclaw-replay.log"
+            print(f"Generating {args.generate_mb} MB synthetic log...")
+            expected = generate_log(log, args.generate_mb)
+
+        start = time.perf_counter()
+        records, (tokens, cost, by_model) = replay(monitor, tmp, {"replay": log})
+        elapsed = time.perf_counter() - start
+
+        size_mb = os.stat(log).st_size / 1048576
+        print(f"replayed {size_mb:.0f} MB in {elapsed:.2f} s ({size_mb / elapsed:.0f} MB/s)")
+        print(f"usage records: {records}" + (f" (expected {expected})" if expected is not None else ""))
+        print(f"throughput: {records / elapsed * 60:,.0f} requests/min")
+        print(f"tokens: {tokens:,}  cost: ${cost:.2f}")
+        for model, model_cost in sorted(by_model.items()):
+            print(f"  {model}: ${model_cost:.2f}")
+
+        # The same records in a second, denser log: read positions drift apart
+        duplicate = Path(tmp) / "openclaw-gateway.log"
+        with open(log, "rb") as src, open(duplicate, "wb") as dst:
+            dst.writelines(line for line in src if b"usage" in line)
+        both, (both_tokens, _, _) = replay(monitor, tmp, {"replay": log, "duplicate": duplicate})
+        ok = both == records and both_tokens == tokens
+        print(f"two logs with the same records: {both} records, {both_tokens:,} tokens "
+              f"({'ok' if ok else f'FAIL, expected {records} and {tokens:,}'})")
+        return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark: WebSocketProbe against a local stub gateway
+
+The stub accepts the WebSocket handshake (checking the Bearer token) and
+answers pings with pongs, optionally after a delay. Compares the
+persistent probe with reconnecting on every tick, and shows that a
+stalled event loop is reported although TCP connects still succeed.
+
+Usage: python3 benchmarks/bench_ws_probe.py [rounds]
+"""
+
+import base64
+import hashlib
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+
+from _monitor import load_monitor
+
+TOKEN = "bench-token"
+GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class StubGateway(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    pong_delay = 0.0
+
+
+class StubHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        request = b""
+        while b"\r\n\r\n" not in request:
+            chunk = self.request.recv(4096)
+            if not chunk:
+                return
+            request += chunk
+        lines = request.decode("latin-1").split("\r\n")
+        headers = {k.strip().lower(): v.strip() for k, _, v in (l.partition(":") for l in lines[1:])}
+        if headers.get("authorization") != f"Bearer {TOKEN}":
+            self.request.sendall(b"HTTP/1.1 401 Unauthorized\r\nContent-Length: 0\r\n\r\n")
+            return
+        accept = base64.b64encode(hashlib.sha1(headers["sec-websocket-key"].encode() + GUID).digest())
+        self.request.sendall(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                             b"Connection: Upgrade\r\nSec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+        while True:
+            header = self.rfile.read(2)
+            if len(header) < 2:
+                return
+            opcode, length = header[0] & 0x0F, header[1] & 0x7F
+            mask = self.rfile.read(4)
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(self.rfile.read(length)))
+            if opcode == 0x8:
+                return
+            if opcode == 0x9:
+                time.sleep(self.server.pong_delay)
+                self.request.sendall(bytes([0x8A, len(payload)]) + payload)
+
+
+def measure(probe, rounds, reconnect=False):
+    start = time.perf_counter()
+    rtts = []
+    for _ in range(rounds):
+        rtts.append(probe.probe())
+        if reconnect:
+            probe.close()
+    return (time.perf_counter() - start) * 1000 / rounds, rtts
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    monitor = load_monitor()
+    server = StubGateway(("127.0.0.1", 0), StubHandler)
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    probe = monitor.WebSocketProbe(port=port, token=TOKEN)
+    tick_ms, rtts = measure(probe, rounds)
+    print(f"persistent:  {tick_ms:6.3f} ms/tick, median pong RTT {sorted(rtts)[len(rtts) // 2]:.3f} ms")
+    tick_ms, _ = measure(probe, rounds, reconnect=True)
+    print(f"reconnect:   {tick_ms:6.3f} ms/tick")
+
+    bad = monitor.WebSocketProbe(port=port, token="wrong")
+    print(f"wrong token: {bad.probe()} ({bad.last_error})")
+
+    # A stalled event loop: TCP still connects, the pong never comes in time
+    server.pong_delay = 1.0
+    stalled = monitor.WebSocketProbe(port=port, token=TOKEN, timeout=0.3)
+    tcp = monitor.PortProber().probe([port])[port]
+    print(f"stalled:     TCP connect {tcp:.3f} ms, WebSocket {stalled.probe()} ({stalled.last_error})")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,17 +8,45 @@ Author: Community Contribution
 License: MIT
 """
 
-import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
 import subprocess
 import threading
 import time
 import os
 import sys
 import json
+import re
+import hashlib
+import base64
+import shlex
+import shutil
+import errno
+import socket
+import select
+import selectors
 import platform
+import signal
+import argparse
+import bisect
+import heapq
+import struct
+import mmap
+import math
+import string
+import tempfile
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
+from types import MappingProxyType
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _import_tk():
+    """Import tkinter on first use so --headless runs without Tk or a display"""
+    global tk, ttk, scrolledtext, messagebox, filedialog
+    import tkinter as tk
+    from tkinter import ttk, scrolledtext, messagebox, filedialog
+
 
 # === TRANSLATIONS ===
 TRANSLATIONS = {
@@ -69,7 +97,8 @@ TRANSLATIONS = {
         "watchdog_stopped": "Watchdog stopped",
         "watchdog_not_available": "Watchdog not available on Windows",
         "restarting_gateway": "Restarting Gateway...",
-        "gateway_restart_complete": "Gateway restart complete",
+        "gateway_ready_in": "Gateway ready in {0:.1f} s",
+        "gateway_not_ready": "Gateway not responding after restart",
         "restarting_tui": "Restarting TUI...",
         "tui_restart_complete": "TUI restart complete",
         "restarting_all": "Restarting all...",
@@ -84,6 +113,7 @@ TRANSLATIONS = {
         "update_failed": "Update failed",
         "openclaw_current": "OpenClaw is up to date",
         "security_update": "SECURITY UPDATE!",
+        "security_scan_failed": "Security scan failed",
         "commits_behind": "commits behind",
         "security_scan_ok": "Security scan OK",
         "files": "files",
@@ -120,6 +150,14 @@ TRANSLATIONS = {
         "cost_today": "Cost today",
         "reset": "Reset",
         "total": "Total",
+        "probe_timeout": "Timeout",
+        "probe_error": "Error: {error}",
+        "checking": "Checking...",
+        "ws_no_pong": "no WebSocket pong",
+        "fetch_failed": "Remote unreachable - using cached refs",
+        "search": "Search",
+        "export": "Export",
+        "events_exported": "Events exported",
     },
     "de": {
         "title": "OpenClaw Monitor",
@@ -168,7 +206,8 @@ TRANSLATIONS = {
         "watchdog_stopped": "Watchdog gestoppt",
         "watchdog_not_available": "Watchdog nicht verfügbar auf Windows",
         "restarting_gateway": "Gateway wird neugestartet...",
-        "gateway_restart_complete": "Gateway-Neustart abgeschlossen",
+        "gateway_ready_in": "Gateway bereit nach {0:.1f} s",
+        "gateway_not_ready": "Gateway antwortet nach Neustart nicht",
         "restarting_tui": "TUI wird neugestartet...",
         "tui_restart_complete": "TUI-Neustart abgeschlossen",
         "restarting_all": "Alles wird neugestartet...",
@@ -183,6 +222,7 @@ TRANSLATIONS = {
         "update_failed": "Update fehlgeschlagen",
         "openclaw_current": "OpenClaw ist aktuell",
         "security_update": "SICHERHEITS-UPDATE!",
+        "security_scan_failed": "Sicherheitsprüfung fehlgeschlagen",
         "commits_behind": "Commits zurück",
         "security_scan_ok": "Sicherheits-Scan OK",
         "files": "Dateien",
@@ -219,6 +259,14 @@ TRANSLATIONS = {
         "cost_today": "Kosten heute",
         "reset": "Reset",
         "total": "Gesamt",
+        "probe_timeout": "Zeitüberschreitung",
+        "probe_error": "Fehler: {error}",
+        "checking": "Prüfe...",
+        "ws_no_pong": "kein WebSocket-Pong",
+        "fetch_failed": "Remote nicht erreichbar - verwende lokale Refs",
+        "search": "Suchen",
+        "export": "Exportieren",
+        "events_exported": "Ereignisse exportiert",
     },
     "fr": {
         "title": "OpenClaw Monitor",
@@ -267,7 +315,8 @@ TRANSLATIONS = {
         "watchdog_stopped": "Watchdog arrêté",
         "watchdog_not_available": "Watchdog non disponible sur Windows",
         "restarting_gateway": "Redémarrage du Gateway...",
-        "gateway_restart_complete": "Redémarrage Gateway terminé",
+        "gateway_ready_in": "Gateway prêt en {0:.1f} s",
+        "gateway_not_ready": "Gateway ne répond pas après le redémarrage",
         "restarting_tui": "Redémarrage du TUI...",
         "tui_restart_complete": "Redémarrage TUI terminé",
         "restarting_all": "Redémarrage de tout...",
@@ -282,6 +331,7 @@ TRANSLATIONS = {
         "update_failed": "Mise à jour échouée",
         "openclaw_current": "OpenClaw est à jour",
         "security_update": "MISE À JOUR DE SÉCURITÉ!",
+        "security_scan_failed": "Analyse de sécurité échouée",
         "commits_behind": "commits en retard",
         "security_scan_ok": "Scan de sécurité OK",
         "files": "fichiers",
@@ -318,6 +368,14 @@ TRANSLATIONS = {
         "cost_today": "Coût aujourd'hui",
         "reset": "Réinitialiser",
         "total": "Total",
+        "probe_timeout": "Délai dépassé",
+        "probe_error": "Erreur: {error}",
+        "checking": "Vérification...",
+        "ws_no_pong": "pas de pong WebSocket",
+        "fetch_failed": "Dépôt distant injoignable - refs locales utilisées",
+        "search": "Rechercher",
+        "export": "Exporter",
+        "events_exported": "Événements exportés",
     },
     "it": {
         "title": "OpenClaw Monitor",
@@ -366,7 +424,8 @@ TRANSLATIONS = {
         "watchdog_stopped": "Watchdog arrestato",
         "watchdog_not_available": "Watchdog non disponibile su Windows",
         "restarting_gateway": "Riavvio Gateway...",
-        "gateway_restart_complete": "Riavvio Gateway completato",
+        "gateway_ready_in": "Gateway pronto in {0:.1f} s",
+        "gateway_not_ready": "Gateway non risponde dopo il riavvio",
         "restarting_tui": "Riavvio TUI...",
         "tui_restart_complete": "Riavvio TUI completato",
         "restarting_all": "Riavvio di tutto...",
@@ -381,6 +440,7 @@ TRANSLATIONS = {
         "update_failed": "Aggiornamento fallito",
         "openclaw_current": "OpenClaw è aggiornato",
         "security_update": "AGGIORNAMENTO DI SICUREZZA!",
+        "security_scan_failed": "Scansione di sicurezza non riuscita",
         "commits_behind": "commit indietro",
         "security_scan_ok": "Scansione sicurezza OK",
         "files": "file",
@@ -417,6 +477,14 @@ TRANSLATIONS = {
         "cost_today": "Costo oggi",
         "reset": "Azzera",
         "total": "Totale",
+        "probe_timeout": "Timeout",
+        "probe_error": "Errore: {error}",
+        "checking": "Verifica...",
+        "ws_no_pong": "nessun pong WebSocket",
+        "fetch_failed": "Remoto non raggiungibile - uso refs locali",
+        "search": "Cerca",
+        "export": "Esporta",
+        "events_exported": "Eventi esportati",
     },
     "es": {
         "title": "OpenClaw Monitor",
@@ -465,7 +533,8 @@ TRANSLATIONS = {
         "watchdog_stopped": "Watchdog detenido",
         "watchdog_not_available": "Watchdog no disponible en Windows",
         "restarting_gateway": "Reiniciando Gateway...",
-        "gateway_restart_complete": "Reinicio Gateway completado",
+        "gateway_ready_in": "Gateway listo en {0:.1f} s",
+        "gateway_not_ready": "Gateway no responde tras el reinicio",
         "restarting_tui": "Reiniciando TUI...",
         "tui_restart_complete": "Reinicio TUI completado",
         "restarting_all": "Reiniciando todo...",
@@ -480,6 +549,7 @@ TRANSLATIONS = {
         "update_failed": "Actualización fallida",
         "openclaw_current": "OpenClaw está actualizado",
         "security_update": "¡ACTUALIZACIÓN DE SEGURIDAD!",
+        "security_scan_failed": "Análisis de seguridad fallido",
         "commits_behind": "commits atrás",
         "security_scan_ok": "Escaneo de seguridad OK",
         "files": "archivos",
@@ -516,6 +586,14 @@ TRANSLATIONS = {
         "cost_today": "Costo hoy",
         "reset": "Reiniciar",
         "total": "Total",
+        "probe_timeout": "Tiempo agotado",
+        "probe_error": "Error: {error}",
+        "checking": "Verificando...",
+        "ws_no_pong": "sin pong de WebSocket",
+        "fetch_failed": "Remoto inaccesible - usando refs locales",
+        "search": "Buscar",
+        "export": "Exportar",
+        "events_exported": "Eventos exportados",
     },
 }
 
@@ -528,8 +606,3599 @@ LANGUAGE_NAMES = {
 }
 
 
-class OpenClawMonitor:
+def _has_fields(text):
+    """Whether a format string has replacement fields ("{{" escapes do not count)"""
+    try:
+        return any(field is not None for _, field, _, _ in string.Formatter().parse(text))
+    except ValueError:
+        return False
+
+
+class Catalog(dict):
+    """Flat translation table of one language, English filling in missing keys
+
+    Lookups are a single dict hit and unknown keys map to themselves, so a
+    Catalog also works with str.format_map for widget text templates like
+    "🔄 {restart_gateway}". Strings with replacement fields are found once
+    and their bound str.format kept; plain strings are never formatted.
+    """
+
+    _languages = {}
+
+    def __init__(self, lang):
+        super().__init__(TRANSLATIONS["en"])
+        self.update(TRANSLATIONS.get(lang, {}))
+        self.lang = lang
+        self._formats = {key: text.format for key, text in self.items() if _has_fields(text)}
+
+    def __missing__(self, key):
+        return key
+
+    def format(self, key, *args, **kwargs):
+        """Translation of `key` with its fields filled in"""
+        formatter = self._formats.get(key)
+        return formatter(*args, **kwargs) if formatter else self[key]
+
+    @classmethod
+    def for_language(cls, lang):
+        """Shared catalog of `lang`, built on first use"""
+        catalog = cls._languages.get(lang)
+        if catalog is None:
+            catalog = cls._languages[lang] = cls(lang)
+        return catalog
+
+# === PORT PROBER ===
+
+class PortProber:
+    """In-process TCP port prober using non-blocking connects on one shared selector"""
+
+    def __init__(self, host="127.0.0.1", timeout=1.0):
+        self.host = host
+        self.timeout = timeout
+        self._selector = selectors.DefaultSelector()
+        self._lock = threading.Lock()
+
+    def probe(self, ports):
+        """Connect to all ports at once and return {port: RTT in ms or None if closed}"""
+        results = {port: None for port in ports}
+        with self._lock:
+            pending = []
+            for port in ports:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sock.setblocking(False)
+                start = time.perf_counter()
+                err = sock.connect_ex((self.host, port))
+                if err == 0:
+                    results[port] = (time.perf_counter() - start) * 1000
+                    sock.close()
+                elif err in (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN, 10035):
+                    self._selector.register(sock, selectors.EVENT_WRITE, (port, start))
+                    pending.append(sock)
+                else:
+                    sock.close()
+
+            deadline = time.monotonic() + self.timeout
+            try:
+                while pending:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    for key, _ in self._selector.select(remaining):
+                        sock = key.fileobj
+                        port, start = key.data
+                        rtt = (time.perf_counter() - start) * 1000
+                        if sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0:
+                            results[port] = rtt
+                        self._selector.unregister(sock)
+                        sock.close()
+                        pending.remove(sock)
+            finally:
+                for sock in pending:
+                    self._selector.unregister(sock)
+                    sock.close()
+        return results
+
+    def close(self):
+        self._selector.close()
+
+# === WEBSOCKET PROBE ===
+
+WEBSOCKET_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class WebSocketProbe:
+    """Application-level gateway check over one persistent WebSocket.
+
+    The RFC 6455 handshake is done once (with the gateway token as a Bearer
+    authorization); each probe() then sends a ping frame and waits for the
+    matching pong, so a gateway whose event loop hangs while the kernel
+    still accepts TCP connections is detected. Data frames from the server
+    are discarded. Any error closes the connection; the next probe()
+    reconnects. `last_error` describes the last failure, and `rejected` is
+    set while the gateway answers the upgrade request with an error.
+    """
+
+    def __init__(self, host="127.0.0.1", port=18789, token="", path="/", timeout=2.0):
+        self.host = host
+        self.port = port
+        self.token = token
+        self.path = path
+        self.timeout = timeout
+        self.last_error = None
+        self.connected_once = False
+        self.rejected = False
+        self._sock = None
+        self._buffer = b""
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def _connect(self, deadline):
+        sock = socket.create_connection((self.host, self.port), timeout=max(0.01, deadline - time.monotonic()))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        key = base64.b64encode(os.urandom(16))
+        headers = [f"GET {self.path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                   "Upgrade: websocket", "Connection: Upgrade",
+                   f"Sec-WebSocket-Key: {key.decode()}", "Sec-WebSocket-Version: 13"]
+        if self.token:
+            headers.append(f"Authorization: Bearer {self.token}")
+        self._sock, self._buffer = sock, b""
+        sock.sendall(("\r\n".join(headers) + "\r\n\r\n").encode())
+
+        while b"\r\n\r\n" not in self._buffer:
+            self._recv(deadline)
+        head, self._buffer = self._buffer.split(b"\r\n\r\n", 1)
+        lines = head.decode("latin-1").split("\r\n")
+        # A rejected handshake still proves the gateway answers; `rejected` tells the two apart
+        self.rejected = lines[0].split(" ")[1:2] != ["101"]
+        if self.rejected:
+            raise ConnectionError(f"handshake rejected: {lines[0]}")
+        accept = base64.b64encode(hashlib.sha1(key + WEBSOCKET_GUID).digest()).decode()
+        fields = {k.strip().lower(): v.strip() for k, _, v in (l.partition(":") for l in lines[1:])}
+        if fields.get("sec-websocket-accept") != accept:
+            raise ConnectionError("handshake: bad Sec-WebSocket-Accept")
+        self.connected_once = True
+
+    def _recv(self, deadline):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise socket.timeout("timed out")
+        self._sock.settimeout(remaining)
+        data = self._sock.recv(65536)
+        if not data:
+            raise ConnectionError("connection closed by gateway")
+        self._buffer += data
+
+    def _read_exact(self, count, deadline):
+        while len(self._buffer) < count:
+            self._recv(deadline)
+        data, self._buffer = self._buffer[:count], self._buffer[count:]
+        return data
+
+    def _read_frame(self, deadline):
+        """Return (opcode, payload) of the next frame (fragments are returned as they come)"""
+        b0, b1 = self._read_exact(2, deadline)
+        length = b1 & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", self._read_exact(2, deadline))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", self._read_exact(8, deadline))[0]
+        mask = self._read_exact(4, deadline) if b1 & 0x80 else None
+        payload = self._read_exact(length, deadline)
+        if mask:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return b0 & 0x0F, payload
+
+    def _send_frame(self, opcode, payload=b""):
+        # Client frames are always masked; control frames carry at most 125 bytes
+        mask = os.urandom(4)
+        masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        self._sock.sendall(bytes([0x80 | opcode, 0x80 | len(payload)]) + mask + masked)
+
+    def probe(self):
+        """Ping the gateway; return the round-trip time in ms, or None on failure"""
+        with self._lock:
+            deadline = time.monotonic() + self.timeout
+            try:
+                if self._sock is None:
+                    self._connect(deadline)
+                self._counter += 1
+                nonce = struct.pack(">Q", self._counter)
+                start = time.perf_counter()
+                self._send_frame(0x9, nonce)
+                while True:
+                    opcode, payload = self._read_frame(deadline)
+                    if opcode == 0xA and payload == nonce:
+                        self.last_error = None
+                        return (time.perf_counter() - start) * 1000
+                    if opcode == 0x9:
+                        self._send_frame(0xA, payload[:125])
+                    elif opcode == 0x8:
+                        raise ConnectionError("connection closed by gateway")
+            except (OSError, ValueError) as e:
+                self.last_error = str(e) or e.__class__.__name__
+                self._close()
+                return None
+
+    def _close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock, self._buffer = None, b""
+
+    def close(self):
+        with self._lock:
+            if self._sock is not None:
+                try:
+                    self._send_frame(0x8, struct.pack(">H", 1000))
+                except OSError:
+                    pass
+            self._close()
+
+# === PROCESS TABLE ===
+
+# rss is in bytes; start_time is a Unix timestamp and cpu the CPU time used in
+# seconds (both None where unavailable)
+ProcessInfo = namedtuple("ProcessInfo", ["pid", "start_time", "rss", "cmdline", "cpu"])
+
+
+class ProcessTable:
+    """Single-pass process table scanner shared by all process checks.
+
+    On Linux the table is read straight from /proc; elsewhere one `ps` (or
+    `tasklist` on Windows) call replaces the per-pattern pgrep forks. All
+    patterns are matched in the same pass, and the result is cached for
+    `max_age` seconds so the checks of one monitoring tick share a snapshot.
+    """
+
+    def __init__(self, patterns=(), max_age=1.0):
+        self.max_age = max_age
+        self.is_linux = sys.platform.startswith("linux")
+        self.is_windows = sys.platform.startswith("win")
+        self._lock = threading.Lock()
+        self._patterns = []
+        self._snapshot = None
+        self._snapshot_time = 0.0
+        if self.is_linux:
+            self._page_size = os.sysconf("SC_PAGE_SIZE")
+            self._clock_ticks = os.sysconf("SC_CLK_TCK")
+            self._boot_time = self._read_boot_time()
+        self._compile(patterns)
+
+    def _compile(self, patterns):
+        self._patterns = list(dict.fromkeys(patterns))
+        flags = re.IGNORECASE if self.is_windows else 0
+        self._regexes = [(p, re.compile(p, flags)) for p in self._patterns]
+        self._combined = re.compile("|".join(f"(?:{p})" for p in self._patterns) or "(?!)", flags)
+
+    @staticmethod
+    def _read_boot_time():
+        try:
+            with open("/proc/stat", "rb") as f:
+                for line in f:
+                    if line.startswith(b"btime"):
+                        return int(line.split()[1])
+        except OSError:
+            pass
+        return None
+
+    def _iter_linux(self):
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/cmdline", "rb") as f:
+                    raw = f.read()
+            except OSError:
+                continue
+            if raw:
+                yield int(entry), raw.rstrip(b"\0").replace(b"\0", b" ").decode("utf-8", "replace")
+
+    def _linux_details(self, pid, cmdline):
+        try:
+            with open(f"/proc/{pid}/stat", "rb") as f:
+                stat = f.read()
+        except OSError:
+            return None
+        # Fields after the "(comm)" part; comm itself may contain spaces
+        fields = stat[stat.rfind(b")") + 2:].split()
+        start_time = None
+        if self._boot_time is not None:
+            start_time = self._boot_time + int(fields[19]) / self._clock_ticks
+        cpu = (int(fields[11]) + int(fields[12])) / self._clock_ticks
+        return ProcessInfo(pid, start_time, int(fields[21]) * self._page_size, cmdline, cpu)
+
+    @staticmethod
+    def _parse_etime(etime):
+        """Parse ps etime/time ([[dd-]hh:]mm:ss[.ss]) into seconds"""
+        days, _, rest = etime.rpartition("-")
+        seconds = 0
+        for part in rest.split(":"):
+            seconds = seconds * 60 + float(part)
+        return seconds + int(days or 0) * 86400
+
+    def _iter_ps(self):
+        output = subprocess.run(["ps", "-axo", "pid=,rss=,etime=,time=,args="],
+                                capture_output=True, text=True, timeout=10).stdout
+        now = time.time()
+        for line in output.splitlines():
+            parts = line.split(None, 4)
+            if len(parts) < 5:
+                continue
+            try:
+                yield ProcessInfo(int(parts[0]), now - self._parse_etime(parts[2]),
+                                  int(parts[1]) * 1024, parts[4], self._parse_etime(parts[3]))
+            except ValueError:
+                continue
+
+    def _iter_tasklist(self):
+        output = subprocess.run(["tasklist", "/FO", "CSV", "/NH"],
+                                capture_output=True, text=True, timeout=10).stdout
+        for line in output.splitlines():
+            parts = [p.strip('"') for p in line.split('","')]
+            if len(parts) < 5:
+                continue
+            try:
+                rss = int(re.sub(r"\D", "", parts[4]) or 0) * 1024
+                yield ProcessInfo(int(parts[1]), None, rss, parts[0], None)
+            except ValueError:
+                continue
+
+    def scan(self):
+        """Walk the process table once and return {pattern: [ProcessInfo, ...]}"""
+        matches = {pattern: [] for pattern in self._patterns}
+        own_pid = os.getpid()
+        if self.is_linux:
+            for pid, cmdline in self._iter_linux():
+                if pid == own_pid or not self._combined.search(cmdline):
+                    continue
+                info = None
+                for pattern, regex in self._regexes:
+                    if regex.search(cmdline):
+                        info = info or self._linux_details(pid, cmdline)
+                        if info:
+                            matches[pattern].append(info)
+        else:
+            processes = self._iter_tasklist() if self.is_windows else self._iter_ps()
+            for info in processes:
+                if info.pid == own_pid or not self._combined.search(info.cmdline):
+                    continue
+                for pattern, regex in self._regexes:
+                    if regex.search(info.cmdline):
+                        matches[pattern].append(info)
+        return matches
+
+    def add(self, pattern):
+        """Match `pattern` too, from the next scan on"""
+        with self._lock:
+            self._add(pattern)
+
+    def _add(self, pattern):
+        if pattern not in self._patterns:
+            self._compile(self._patterns + [pattern])
+            self._snapshot = None
+
+    def find(self, pattern):
+        """Return processes matching pattern from a snapshot at most max_age seconds old"""
+        with self._lock:
+            self._add(pattern)
+            now = time.monotonic()
+            if self._snapshot is None or now - self._snapshot_time > self.max_age:
+                self._snapshot = self.scan()
+                self._snapshot_time = now
+            return self._snapshot.get(pattern, [])
+
+# === CONNECTION INSPECTOR ===
+
+# count is the number of ESTABLISHED connections accepted on the port;
+# clients maps the PID owning the client end of each local connection to
+# its number of connections (None for remote or unmapped clients).
+ConnectionStats = namedtuple("ConnectionStats", ["count", "clients"])
+
+
+class ConnectionInspector:
+    """Count ESTABLISHED TCP connections per local port without lsof/netstat.
+
+    On Linux /proc/net/tcp and /proc/net/tcp6 are parsed directly and the
+    client sockets are mapped to PIDs through an index of socket inodes
+    built from /proc/<pid>/fd. The index is only rebuilt when an unknown
+    inode shows up, at most every `rebuild_interval` seconds. Other systems
+    fall back to a single lsof (or netstat on Windows) call. The latest
+    result is kept in `last` as (timestamp, {port: ConnectionStats}).
+    """
+
+    def __init__(self, rebuild_interval=10.0):
+        self.rebuild_interval = rebuild_interval
+        self.is_linux = sys.platform.startswith("linux")
+        self.is_windows = sys.platform.startswith("win")
+        self.last = (0.0, {})
+        self._inode_pids = {}
+        self._index_time = 0.0
+        self._lock = threading.Lock()
+
+    def inspect(self, ports):
+        """Return {port: ConnectionStats} for the given local ports"""
+        ports = list(ports)
+        with self._lock:
+            if self.is_linux:
+                result = self._inspect_proc(ports)
+            elif self.is_windows:
+                result = self._inspect_netstat(ports)
+            else:
+                result = self._inspect_lsof(ports)
+            self.last = (time.time(), result)
+        return result
+
+    def _inspect_proc(self, ports):
+        hex_ports = {f"{port:04X}": port for port in ports}
+        counts = {port: 0 for port in ports}
+        client_inodes = {port: [] for port in ports}
+        for name in ("/proc/net/tcp", "/proc/net/tcp6"):
+            try:
+                with open(name, "r") as f:
+                    next(f, None)
+                    for line in f:
+                        fields = line.split()
+                        # st 01 = ESTABLISHED; addresses are ADDR:PORT in hex
+                        if len(fields) < 10 or fields[3] != "01":
+                            continue
+                        port = hex_ports.get(fields[1][-4:])
+                        if port is not None:
+                            counts[port] += 1
+                        port = hex_ports.get(fields[2][-4:])
+                        if port is not None:
+                            client_inodes[port].append(int(fields[9]))
+            except OSError:
+                continue
+
+        inodes = [inode for port_inodes in client_inodes.values() for inode in port_inodes]
+        if any(inode not in self._inode_pids for inode in inodes):
+            if time.monotonic() - self._index_time >= self.rebuild_interval:
+                self._rebuild_index()
+        result = {}
+        for port in ports:
+            clients = {}
+            for inode in client_inodes[port]:
+                pid = self._inode_pids.get(inode)
+                clients[pid] = clients.get(pid, 0) + 1
+            result[port] = ConnectionStats(counts[port], clients)
+        return result
+
+    def _rebuild_index(self):
+        """Map socket inode -> PID for every process whose fds we may read"""
+        index = {}
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            fd_dir = f"/proc/{entry}/fd"
+            try:
+                fds = os.listdir(fd_dir)
+            except OSError:
+                continue
+            pid = int(entry)
+            for fd in fds:
+                try:
+                    target = os.readlink(f"{fd_dir}/{fd}")
+                except OSError:
+                    continue
+                if target.startswith("socket:["):
+                    index[int(target[8:-1])] = pid
+        self._inode_pids = index
+        self._index_time = time.monotonic()
+
+    @staticmethod
+    def _split_port(address):
+        try:
+            return int(address.rsplit(":", 1)[1])
+        except (IndexError, ValueError):
+            return None
+
+    def _tally(self, ports, connections):
+        """Build the result from (local port, remote port, pid) triples"""
+        result = {port: ConnectionStats(0, {}) for port in ports}
+        for local, remote, pid in connections:
+            if local in result:
+                stats = result[local]
+                result[local] = stats._replace(count=stats.count + 1)
+            if remote in result:
+                clients = result[remote].clients
+                clients[pid] = clients.get(pid, 0) + 1
+        return result
+
+    def _inspect_lsof(self, ports):
+        args = ["lsof", "-nP", "-sTCP:ESTABLISHED", "-Fpn"]
+        for port in ports:
+            args.append(f"-iTCP:{port}")
+        try:
+            output = subprocess.run(args, capture_output=True, text=True, timeout=10).stdout
+        except (OSError, subprocess.SubprocessError):
+            return {port: ConnectionStats(0, {}) for port in ports}
+        connections, pid = [], None
+        for line in output.splitlines():
+            if line.startswith("p"):
+                pid = int(line[1:])
+            elif line.startswith("n") and "->" in line:
+                local, remote = line[1:].split("->", 1)
+                connections.append((self._split_port(local), self._split_port(remote), pid))
+        return self._tally(ports, connections)
+
+    def _inspect_netstat(self, ports):
+        try:
+            output = subprocess.run(["netstat", "-ano", "-p", "TCP"], capture_output=True,
+                                    text=True, timeout=10).stdout
+        except (OSError, subprocess.SubprocessError):
+            return {port: ConnectionStats(0, {}) for port in ports}
+        connections = []
+        for line in output.splitlines():
+            fields = line.split()
+            if len(fields) == 5 and fields[3] == "ESTABLISHED":
+                pid = int(fields[4]) if fields[4].isdigit() else None
+                connections.append((self._split_port(fields[1]), self._split_port(fields[2]), pid))
+        return self._tally(ports, connections)
+
+# === LOG TAILER ===
+
+class LogTailer:
+    """Incremental log reader that only touches bytes appended since the last poll.
+
+    The file is identified by (device, inode); a new path (day rollover), a
+    new inode (rotation) or a shrinking size (truncation) restarts reading
+    from the beginning of the new file. Lines matching `error_pattern` are
+    kept in a bounded ring and counted by the first word of the match in
+    `error_counts` (pass error_pattern=None to skip error matching).
+    """
+
+    def __init__(self, path_func, error_pattern=r"error|fail", max_errors=100,
+                 initial_backlog=256 * 1024, chunk_size=1024 * 1024):
+        self.path_func = path_func
+        self.error_regex = re.compile(error_pattern.encode(), re.IGNORECASE) if error_pattern else None
+        self.errors = deque(maxlen=max_errors)
+        self.error_counts = {}
+        self.error_total = 0
+        self.initial_backlog = initial_backlog
+        self.chunk_size = chunk_size
+        self.last_write = None
+        self.bytes_read = 0
+        self._path = None
+        self._identity = None
+        self._offset = 0
+        self._partial = b""
+        self._skip_first = False
+        self.behind = False
+        self._lock = threading.Lock()
+
+    def checkpoint(self):
+        """Return the read position as a JSON-serialisable dict"""
+        with self._lock:
+            return {"path": str(self._path) if self._path else None,
+                    "identity": list(self._identity) if self._identity else None,
+                    "offset": self._offset - len(self._partial)}
+
+    def restore(self, checkpoint):
+        """Resume from a checkpoint() taken earlier (ignored if the file changed)"""
+        with self._lock:
+            if checkpoint and checkpoint.get("identity"):
+                self._path = Path(checkpoint["path"])
+                self._identity = tuple(checkpoint["identity"])
+                self._offset = checkpoint.get("offset", 0)
+                self._partial = b""
+                self._skip_first = False
+
+    def poll(self, max_bytes=None):
+        """Read newly appended data; return the list of complete new lines (bytes).
+
+        With `max_bytes` at most about that much is read per call and `behind`
+        stays True until the reader has caught up with the end of the file.
+        """
+        with self._lock:
+            self.behind = False
+            path = self.path_func()
+            try:
+                st = os.stat(path)
+            except OSError:
+                self.last_write = None
+                return []
+            self.last_write = st.st_mtime
+
+            identity = (st.st_dev, st.st_ino)
+            if path != self._path or identity != self._identity:
+                # New day, rotated or first file: skip old content except a small backlog
+                first_open = self._path is None
+                self._path, self._identity, self._partial = path, identity, b""
+                self._offset = max(0, st.st_size - self.initial_backlog) if first_open else 0
+                # Starting mid-file: the first line read is incomplete
+                self._skip_first = self._offset > 0
+            elif st.st_size < self._offset:
+                # Truncated in place
+                self._offset, self._partial = 0, b""
+
+            if st.st_size == self._offset:
+                return []
+
+            lines = []
+            try:
+                with open(path, "rb") as f:
+                    if self._skip_first:
+                        # Only skip if the start offset really is in the middle of a line
+                        f.seek(self._offset - 1)
+                        self._skip_first = f.read(1) != b"\n"
+                    f.seek(self._offset)
+                    read = 0
+                    while True:
+                        if max_bytes and read >= max_bytes:
+                            self.behind = True
+                            break
+                        chunk = f.read(self.chunk_size)
+                        if not chunk:
+                            break
+                        read += len(chunk)
+                        self.bytes_read += len(chunk)
+                        self._offset += len(chunk)
+                        chunk_lines = (self._partial + chunk).split(b"\n")
+                        self._partial = chunk_lines.pop()
+                        if self._skip_first and chunk_lines:
+                            chunk_lines.pop(0)
+                            self._skip_first = False
+                        lines.extend(chunk_lines)
+            except OSError:
+                return lines
+
+            self._match_errors(lines)
+            return lines
+
+    def feed(self, lines):
+        """Match lines that did not come from the file (e.g. a child's pipe) against error_pattern"""
+        with self._lock:
+            self._match_errors(lines)
+
+    def _match_errors(self, lines):
+        if not self.error_regex:
+            return
+        errors = self.errors
+        counts = self.error_counts
+        search = self.error_regex.search
+        for line in lines:
+            match = search(line)
+            if match:
+                errors.append(line.decode("utf-8", "replace").rstrip())
+                word = re.match(rb"\w*", match.group(0)).group(0).lower().decode() or "other"
+                counts[word] = counts.get(word, 0) + 1
+                self.error_total += 1
+
+    def age(self):
+        """Seconds since the log was last written, or None if it does not exist"""
+        if self.last_write is None:
+            return None
+        return time.time() - self.last_write
+
+    def recent_errors(self, count=5):
+        if count <= 0:
+            return []
+        with self._lock:
+            return list(self.errors)[-count:]
+
+# === LOG WATCHER ===
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+
+class Inotify:
+    """Minimal inotify(7) binding through ctypes (Linux only).
+
+    Raises OSError where inotify is not available so callers can fall back
+    to polling. The descriptor is non-blocking: read() returns [] when no
+    event is queued.
+    """
+
+    EVENT = struct.Struct("iIII")
+
     def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        try:
+            import ctypes
+            import ctypes.util
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+            init1, add_watch, rm_watch = libc.inotify_init1, libc.inotify_add_watch, libc.inotify_rm_watch
+        except (ImportError, OSError, AttributeError) as e:
+            raise OSError(errno.ENOSYS, f"inotify unavailable: {e}")
+        add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self._ctypes = ctypes
+        self._add_watch = add_watch
+        self._rm_watch = rm_watch
+        self.fd = init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path, mask):
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            error = self._ctypes.get_errno()
+            raise OSError(error, os.strerror(error), str(path))
+        return wd
+
+    def rm_watch(self, wd):
+        self._rm_watch(self.fd, wd)
+
+    def read(self):
+        """Queued events as (wd, mask, name) tuples"""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            except OSError:
+                return events
+            offset, size = 0, self.EVENT.size
+            while offset + size <= len(data):
+                wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+                name = data[offset + size:offset + size + length].rstrip(b"\0")
+                events.append((wd, mask, os.fsdecode(name)))
+                offset += size + length
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class LogWatcher:
+    """Freshness of the OpenClaw logs without polling them.
+
+    `paths_func` returns the logs in priority order (today's log, then the
+    gateway log); like watchdog.sh, the first one that exists decides. While
+    fresh the watcher sleeps until the moment the log would turn stale and
+    only then looks: if inotify saw a write in between, one stat() gives the
+    new deadline, otherwise the log is stale. While stale it blocks on
+    inotify events, so recovery is noticed at once. Paths are resolved again
+    at local midnight, when the daily log switches. Without inotify (other
+    platforms, or a log directory that does not exist yet) the stale state
+    falls back to stat() every `poll_interval` seconds.
+
+    `on_change(fresh)` is called from the watcher thread when freshness flips.
+    """
+
+    WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    def __init__(self, paths_func, threshold=300, poll_interval=1.0, on_change=None, use_inotify=True):
+        self.paths_func = paths_func
+        self.use_inotify = use_inotify
+        self.threshold = threshold
+        self.poll_interval = poll_interval
+        self.on_change = on_change
+        self.paths = []
+        self.last_write = {}
+        self.fresh = False
+        self.backend = "polling"
+        self.checks = 0
+        self._inotify = None
+        self._watches = {}
+        self._unwatched = False
+        self._deadline = None
+        self._midnight = 0.0
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._wake_r = self._wake_w = None
+        self._thread = None
+
+    def start(self):
+        """Check once (so `fresh` is valid on return), then watch in a daemon thread"""
+        if self.use_inotify:
+            try:
+                self._inotify = Inotify()
+                self._wake_r, self._wake_w = os.pipe()
+                self.backend = "inotify"
+            except OSError:
+                self._inotify = None
+        self._resolve()
+        self._check(time.time(), force=True)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def poke(self):
+        """Re-evaluate now (e.g. after a system wake, when timeouts ran on a stopped clock)"""
+        if self._wake_w is not None:
+            try:
+                os.write(self._wake_w, b"x")
+            except OSError:
+                pass
+        self._wakeup.set()
+
+    def close(self):
+        self._stop.set()
+        self.poke()
+        if self._thread:
+            self._thread.join(timeout=2)
+        if self._inotify:
+            self._inotify.close()
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+            self._inotify = self._wake_r = self._wake_w = None
+
+    def age(self):
+        """Seconds since the deciding log was last seen written (None if no log exists).
+
+        While fresh, writes are only looked at when the deadline is reached,
+        so this can overstate the age (but never beyond the threshold).
+        """
+        for path in self.paths:
+            write = self.last_write.get(path)
+            if write is not None:
+                return time.time() - write
+        return None
+
+    def _resolve(self):
+        """Take the current paths and watch their directories"""
+        self.paths = [Path(p) for p in self.paths_func()]
+        now = datetime.now()
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        self._midnight = midnight.timestamp()
+        if self._inotify:
+            self._watch()
+
+    def _watch(self):
+        """Watch the directories of the paths (the logs themselves may not exist yet)"""
+        directories = {path.parent for path in self.paths}
+        for wd, directory in list(self._watches.items()):
+            if directory not in directories:
+                self._inotify.rm_watch(wd)
+                del self._watches[wd]
+        self._unwatched = False
+        for directory in directories - set(self._watches.values()):
+            try:
+                self._watches[self._inotify.add_watch(directory, self.WATCH_MASK)] = directory
+            except OSError:
+                # e.g. /tmp/openclaw before the gateway first logs: poll until it appears
+                self._unwatched = True
+
+    def _drain(self):
+        """Whether queued inotify events touch one of the logs"""
+        touched = False
+        for wd, mask, name in self._inotify.read():
+            if mask & IN_Q_OVERFLOW:
+                touched = True
+            elif mask & IN_IGNORED:
+                # The directory went away: watch it again when it is back
+                self._watches.pop(wd, None)
+                self._unwatched = True
+            elif wd in self._watches and self._watches[wd] / name in self.paths:
+                touched = True
+        return touched
+
+    def _check(self, now, force=False):
+        """Update last writes (stat() only if something may have changed) and freshness"""
+        self.checks += 1
+        # Unwatched directories are polled, and may be watchable by now
+        polled = self._unwatched
+        if self._inotify and polled:
+            self._watch()
+        touched = self._drain() if self._inotify else True
+        if touched or force or polled:
+            for path in self.paths:
+                try:
+                    self.last_write[path] = os.stat(path).st_mtime
+                except OSError:
+                    self.last_write.pop(path, None)
+        write = next((self.last_write[p] for p in self.paths if p in self.last_write), None)
+        self._deadline = write + self.threshold if write is not None else None
+        fresh = self._deadline is not None and now < self._deadline
+        if fresh != self.fresh:
+            self.fresh = fresh
+            if self.on_change:
+                try:
+                    self.on_change(fresh)
+                except Exception:
+                    pass
+
+    def _run(self):
+        while not self._stop.is_set():
+            now = time.time()
+            if now >= self._midnight:
+                self._resolve()
+                self._check(now, force=True)
+                continue
+            if self.fresh:
+                # Nothing to look at before the log could turn stale
+                timeout, watch = self._deadline - now, False
+            else:
+                polling = not self._inotify or self._unwatched
+                timeout, watch = (self.poll_interval if polling else None), bool(self._inotify)
+            until_midnight = self._midnight - now
+            timeout = until_midnight if timeout is None else min(timeout, until_midnight)
+            self._wait(max(0.0, timeout), watch)
+            if self._stop.is_set():
+                break
+            self._check(time.time())
+
+    def _wait(self, timeout, watch):
+        if not self._inotify:
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+            return
+        fds = [self._wake_r, self._inotify.fd] if watch else [self._wake_r]
+        try:
+            ready = select.select(fds, [], [], timeout)[0]
+        except (OSError, ValueError):
+            self._wakeup.wait(min(timeout, self.poll_interval))
+            self._wakeup.clear()
+            return
+        if self._wake_r in ready:
+            os.read(self._wake_r, 64)
+
+# === SESSION TRACKER ===
+
+# "session state: sessionId=… prev=idle new=processing …", plain or inside a JSON string
+SESSION_ID_RE = re.compile(rb'sessionId\\?"?\s*[=:]\s*\\?"?([\w:.@-]+)')
+SESSION_STATE_RE = re.compile(rb'\bnew=\\?"?(\w+)|\bstate\\?"\s*:\s*\\?"(\w+)|\bstate=(\w+)')
+LOG_TIME_RE = re.compile(rb'"(?:time|date)"\s*:\s*"([^"]+)"')
+
+
+def parse_log_time(value):
+    """Epoch seconds of an ISO 8601 log timestamp, or None"""
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class SessionTracker:
+    """Follows the "session state" lines of the OpenClaw log incrementally.
+
+    `sessions` maps session id -> (state, entered at) for every session not
+    idle, ordered by entry time, so stuck() only looks at the sessions that
+    have been in their state longest. At most `max_sessions` are kept: when
+    full, sessions that start are not tracked (counted in `dropped`) rather
+    than forgetting the oldest, which are the ones that may be stuck. The
+    durations of the last `window` finished "processing" spells feed
+    percentile().
+
+    A session whose closing line never comes (the gateway died) would stay
+    for ever: gateway_started() drops the sessions of an earlier gateway
+    process, and entries older than `max_age` expire regardless.
+    """
+
+    def __init__(self, path_func, threshold=120, max_sessions=10000, window=1000,
+                 max_age=6 * 3600, max_read=4 * 1024 * 1024):
+        self.threshold = threshold
+        self.max_sessions = max_sessions
+        self.max_age = max_age
+        self.max_read = max_read
+        self.sessions = OrderedDict()
+        self.durations = deque(maxlen=window)
+        self.dropped = 0
+        self.expired = 0
+        self.transitions = 0
+        self._gateway_started = None
+        # About the last few hundred lines, like the "tail -100" of watchdog.sh
+        self.tailer = LogTailer(path_func, error_pattern=None, initial_backlog=64 * 1024)
+        self._lock = threading.Lock()
+
+    def poll(self):
+        """Read new log lines; return the number of state changes seen"""
+        count = 0
+        while True:
+            for line in self.tailer.poll(max_bytes=self.max_read):
+                if b"session state" in line:
+                    count += self.feed(line)
+            if not self.tailer.behind:
+                return count
+
+    def feed(self, line):
+        """Apply one log line; return 1 if it was a session state change, else 0"""
+        session = SESSION_ID_RE.search(line)
+        state = SESSION_STATE_RE.search(line)
+        if not session or not state:
+            return 0
+        stamp = LOG_TIME_RE.search(line)
+        when = parse_log_time(stamp.group(1).decode("ascii", "replace")) if stamp else None
+        self.observe(session.group(1).decode("utf-8", "replace"),
+                     next(g for g in state.groups() if g).decode().lower(),
+                     when if when is not None else time.time())
+        return 1
+
+    def observe(self, session_id, state, when):
+        with self._lock:
+            if self._gateway_started and when < self._gateway_started:
+                # Written by an earlier gateway process
+                return
+            self.transitions += 1
+            previous = self.sessions.get(session_id)
+            if previous:
+                if previous[0] == state:
+                    # Repeated line: keep the original entry time
+                    return
+                del self.sessions[session_id]
+                if previous[0] == "processing":
+                    self.durations.append(max(0.0, when - previous[1]))
+            if state == "idle":
+                return
+            if not previous and len(self.sessions) >= self.max_sessions:
+                self.dropped += 1
+                return
+            self.sessions[session_id] = (state, when)
+
+    def gateway_started(self, started):
+        """Forget the sessions of earlier gateways; `started` is when the running one started"""
+        with self._lock:
+            if started == self._gateway_started:
+                return
+            self._gateway_started = started
+            self._drop_before(started)
+
+    def _drop_before(self, cutoff):
+        """Remove the sessions that entered their state before `cutoff`; return how many"""
+        # Entries are ordered by entry time, so the ones to drop are at the front
+        sessions = self.sessions
+        dropped = 0
+        while sessions:
+            session_id, (_, since) = next(iter(sessions.items()))
+            if since >= cutoff:
+                break
+            del sessions[session_id]
+            dropped += 1
+        return dropped
+
+    def stuck(self, now=None):
+        """[(session id, seconds)] of sessions processing for longer than `threshold`"""
+        now = time.time() if now is None else now
+        stuck = []
+        with self._lock:
+            self.expired += self._drop_before(now - self.max_age)
+            for session_id, (state, since) in self.sessions.items():
+                if now - since <= self.threshold:
+                    break
+                if state == "processing":
+                    stuck.append((session_id, now - since))
+        return stuck
+
+    def processing(self):
+        """Number of sessions currently processing"""
+        with self._lock:
+            return sum(1 for state, _ in self.sessions.values() if state == "processing")
+
+    def percentile(self, p):
+        """Processing duration (seconds) at percentile `p` of the recent window, or None"""
+        with self._lock:
+            durations = sorted(self.durations)
+        if not durations:
+            return None
+        return durations[min(len(durations), max(1, math.ceil(p / 100 * len(durations)))) - 1]
+
+    def reset(self):
+        """Forget all sessions (a restarted gateway starts without any)"""
+        with self._lock:
+            self.sessions.clear()
+
+# === DIFF SCANNER ===
+
+# DANGEROUS patterns - these are almost always malicious
+DANGEROUS_PATTERNS = [
+    (r"curl\s+.*\|.*sh", "Remote code execution: curl | sh"),
+    (r"wget\s+.*\|.*sh", "Remote code execution: wget | sh"),
+    (r"nc\s+-e", "Reverse shell: netcat -e"),
+    (r"/dev/tcp/", "Reverse shell: /dev/tcp"),
+    (r"bash\s+-i\s+>&", "Reverse shell: bash -i"),
+    (r"python.*-c.*socket", "Potential reverse shell: python socket"),
+    (r"rm\s+-rf\s+/[^.]", "Dangerous: rm -rf /"),
+    (r":\(\)\s*\{\s*:\|:&\s*\};:", "Fork bomb"),
+    (r"mkfifo.*nc.*sh", "Named pipe reverse shell"),
+]
+
+# NORMAL patterns for CLI tools - these are expected in OpenClaw
+# We note them but don't flag as dangerous
+NORMAL_CLI_PATTERNS = [
+    "child_process",  # Node.js process spawning - required for CLI
+    "exec(",          # Command execution - required for CLI
+    "spawn(",         # Process spawning - required for CLI
+    "execSync",       # Sync execution - required for CLI
+    "spawnSync",      # Sync spawning - required for CLI
+]
+
+NEW_SCRIPT_RE = re.compile(r"\.(sh|bash|py|rb|pl)$")
+
+# One pattern hit on an added line of the diff
+DiffHit = namedtuple("DiffHit", ["file", "line", "description", "text"])
+
+
+class DiffScanner:
+    """Parse one streamed `git diff` and match all patterns in a single pass.
+
+    Collects per-file stats, added and binary files, pattern hits on added
+    lines (attributed to file and line number) and the first lines of the
+    diff as an excerpt for AI review.
+    """
+
+    def __init__(self, patterns=DANGEROUS_PATTERNS, excerpt_lines=500):
+        self.patterns = list(patterns)
+        self.excerpt_lines = excerpt_lines
+        self._regexes = [(re.compile(p.encode()), description) for p, description in self.patterns]
+        self._combined = re.compile("|".join(f"(?:{p})" for p, _ in self.patterns).encode())
+
+    def scan(self, repo_dir, rev_range="HEAD..origin/main"):
+        """Run `git diff rev_range` in repo_dir and parse its output as it streams.
+
+        Raises OSError if git fails, so that a missing or cut-off diff is
+        never taken for a clean one.
+        """
+        # A file rather than a pipe: git cannot block on stderr while stdout is read
+        with tempfile.TemporaryFile() as stderr:
+            proc = subprocess.Popen(["git", "diff", "--no-color", "--no-ext-diff", "-U3", rev_range],
+                                    cwd=str(repo_dir), stdout=subprocess.PIPE, stderr=stderr)
+            try:
+                result = self.scan_lines(proc.stdout)
+            finally:
+                proc.stdout.close()
+                proc.wait()
+            if proc.returncode:
+                stderr.seek(0)
+                message = stderr.read().decode("utf-8", "replace").strip().splitlines()
+                raise OSError(f"git diff exited with {proc.returncode}"
+                              + (f": {message[0]}" if message else ""))
+        return result
+
+    def scan_lines(self, lines):
+        """Parse an iterable of diff lines (bytes) and return the scan result dict"""
+        stats = {}
+        added_files = []
+        binary_files = []
+        hits = []
+        excerpt = []
+        excerpt_lines = self.excerpt_lines
+        combined = self._combined.search
+        current = None
+        new_line = 0
+        in_header = False
+
+        for raw in lines:
+            if len(excerpt) < excerpt_lines:
+                excerpt.append(raw.decode("utf-8", "replace").rstrip("\n"))
+            first = raw[:1]
+            if in_header:
+                # File header between "diff --git" and the first hunk
+                if raw.startswith(b"+++ "):
+                    path = raw[4:].rstrip(b"\n")
+                    if path != b"/dev/null":
+                        current = path[2:].decode("utf-8", "replace")
+                        stats.setdefault(current, [0, 0])
+                elif first == b"@":
+                    in_header = False
+                elif raw.startswith(b"new file mode"):
+                    added_files.append(current)
+                elif raw.startswith(b"Binary files ") or raw.startswith(b"GIT binary patch"):
+                    binary_files.append(current)
+                elif raw.startswith(b"diff --git "):
+                    current = raw.rstrip(b"\n").rsplit(b" b/", 1)[-1].decode("utf-8", "replace")
+                    stats.setdefault(current, [0, 0])
+                if in_header:
+                    continue
+
+            if first == b"+":
+                stats[current][0] += 1
+                if combined(raw, 1):
+                    text = raw[1:].decode("utf-8", "replace").strip()
+                    for regex, description in self._regexes:
+                        if regex.search(raw, 1):
+                            hits.append(DiffHit(current, new_line, description, text))
+                new_line += 1
+            elif first == b" ":
+                new_line += 1
+            elif first == b"-":
+                stats[current][1] += 1
+            elif first == b"@":
+                # @@ -a,b +c,d @@
+                plus = raw.split(b" ", 3)[2]
+                new_line = int(plus[1:].split(b",")[0])
+            elif raw.startswith(b"diff --git "):
+                in_header = True
+                current = raw.rstrip(b"\n").rsplit(b" b/", 1)[-1].decode("utf-8", "replace")
+                stats.setdefault(current, [0, 0])
+
+        return {
+            "files": list(stats),
+            "stats": stats,
+            "added_files": added_files,
+            "binary_files": binary_files,
+            "hits": hits,
+            "excerpt": excerpt,
+        }
+
+    @staticmethod
+    def format_stat(stats):
+        """Render per-file stats like `git diff --stat`"""
+        lines = [f" {path} | {a + r} (+{a}/-{r})" for path, (a, r) in stats.items()]
+        added = sum(a for a, _ in stats.values())
+        removed = sum(r for _, r in stats.values())
+        lines.append(f" {len(stats)} files changed, {added} insertions(+), {removed} deletions(-)")
+        return "\n".join(lines)
+
+# === GIT STATUS ===
+
+SECURITY_COMMIT_RE = re.compile(r"security|Security|CVE|vulnerability|fix")
+
+
+class GitRefReader:
+    """Pure-Python resolver for HEAD, loose refs and packed-refs (no git process)"""
+
+    def __init__(self, repo_dir):
+        self.repo_dir = Path(repo_dir)
+
+    def _git_dirs(self):
+        """Return (git_dir, common_dir); handles worktrees where .git is a file"""
+        git_dir = self.repo_dir / ".git"
+        if git_dir.is_file():
+            with open(git_dir, "r") as f:
+                target = f.read().strip()
+            if not target.startswith("gitdir:"):
+                raise OSError("unrecognised .git file")
+            git_dir = (self.repo_dir / target[len("gitdir:"):].strip()).resolve()
+        common_dir = git_dir
+        commondir_file = git_dir / "commondir"
+        if commondir_file.exists():
+            with open(commondir_file, "r") as f:
+                common_dir = (git_dir / f.read().strip()).resolve()
+        return git_dir, common_dir
+
+    def resolve(self, ref, _depth=0):
+        """Return the commit SHA for ref ("HEAD" or "refs/..."), or None if unresolvable"""
+        if _depth > 5:
+            return None
+        try:
+            git_dir, common_dir = self._git_dirs()
+            base = git_dir if ref == "HEAD" else common_dir
+            loose = base / ref
+            if loose.is_file():
+                with open(loose, "r") as f:
+                    value = f.read().strip()
+                if value.startswith("ref:"):
+                    return self.resolve(value[4:].strip(), _depth + 1)
+                return value or None
+            packed = common_dir / "packed-refs"
+            if packed.exists():
+                with open(packed, "r") as f:
+                    for line in f:
+                        if line.startswith(("#", "^")):
+                            continue
+                        sha, _, name = line.strip().partition(" ")
+                        if name == ref:
+                            return sha
+        except OSError:
+            pass
+        return None
+
+
+class GitStatusReader:
+    """Commits-behind / version / security-commit status with as few git calls as possible.
+
+    Revisions are resolved in pure Python. When (HEAD, remote) has not moved
+    since the last query the previous status is returned without starting
+    git; otherwise one `git log` and one `git describe` answer everything.
+    """
+
+    def __init__(self, repo_dir, remote_ref="refs/remotes/origin/main"):
+        self.repo_dir = Path(repo_dir)
+        self.remote_ref = remote_ref
+        self.refs = GitRefReader(repo_dir)
+        self._cache = None
+
+    def _git(self, *args, timeout=15):
+        return subprocess.run(["git", *args], cwd=str(self.repo_dir), capture_output=True,
+                              text=True, timeout=timeout)
+
+    def revisions(self):
+        """Return (HEAD, remote) SHAs, falling back to `git rev-parse` if refs can't be read"""
+        head = self.refs.resolve("HEAD")
+        remote = self.refs.resolve(self.remote_ref)
+        if head and remote:
+            return head, remote
+        try:
+            output = self._git("rev-parse", "HEAD", self.remote_ref, timeout=10).stdout.split()
+        except Exception:
+            return None, None
+        if len(output) != 2:
+            return None, None
+        return output[0], output[1]
+
+    def status(self):
+        head, remote = self.revisions()
+        if self._cache and self._cache[0] == (head, remote):
+            return dict(self._cache[1])
+
+        rev_range = f"HEAD..{self.remote_ref}"
+        commits_behind = 0
+        has_security = False
+        if head != remote:
+            # One log call: count commits and grep messages in Python
+            log = self._git("log", "--format=%H%x1f%B%x1e", rev_range).stdout
+            records = [r for r in log.split("\x1e") if r.strip()]
+            commits_behind = len(records)
+            has_security = any(SECURITY_COMMIT_RE.search(r.partition("\x1f")[2]) for r in records)
+
+        # One describe call for both versions
+        versions = self._git("describe", "--tags", "--always", "HEAD", self.remote_ref).stdout.split()
+        if len(versions) != 2:
+            versions = [(head or "")[:7], (remote or "")[:7]]
+
+        status = {
+            "commits_behind": commits_behind,
+            "local_version": versions[0],
+            "remote_version": versions[1],
+            "has_security": has_security,
+            "update_available": commits_behind > 0,
+        }
+        if head and remote:
+            self._cache = ((head, remote), status)
+        return dict(status)
+
+# === FETCH SCHEDULER ===
+
+class FetchScheduler:
+    """Conditional `git fetch` with exponential backoff on failure.
+
+    A fetch is skipped while FETCH_HEAD is younger than `min_interval` or
+    while a failure backoff is pending; callers then continue from the
+    refs already on disk. The outcome of the last fetch and the ref state
+    after it are persisted to `state_file`.
+    """
+
+    def __init__(self, repo_dir, state_file, remote="origin", min_interval=900,
+                 base_backoff=60, max_backoff=3600, timeout=30):
+        self.repo_dir = Path(repo_dir)
+        self.state_file = Path(state_file)
+        self.remote = remote
+        self.min_interval = min_interval
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.refs = GitRefReader(repo_dir)
+        self._lock = threading.Lock()
+        self.state = self._load_state()
+
+    def _load_state(self):
+        try:
+            with open(self.state_file, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"failures": 0, "next_allowed": 0}
+
+    def _save_state(self):
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.state_file.with_name(self.state_file.name + ".tmp")
+            with open(tmp, "w") as f:
+                json.dump(self.state, f, indent=2)
+            os.replace(tmp, self.state_file)
+        except OSError:
+            pass
+
+    def fetch_head_age(self):
+        """Seconds since the last fetch wrote FETCH_HEAD, or None if never fetched"""
+        try:
+            _, common_dir = self.refs._git_dirs()
+            return time.time() - (common_dir / "FETCH_HEAD").stat().st_mtime
+        except OSError:
+            return None
+
+    def skip_reason(self, force=False):
+        """Why a fetch would be skipped right now ("backoff", "fresh") or None"""
+        if time.time() < self.state.get("next_allowed", 0):
+            return "backoff"
+        if not force:
+            age = self.fetch_head_age()
+            if age is not None and age < self.min_interval:
+                return "fresh"
+        return None
+
+    def maybe_fetch(self, force=False):
+        """Fetch unless skipped; `force` ignores FETCH_HEAD freshness but not backoff.
+
+        Returns {"fetched": bool, "ok": bool, "skipped": reason or None, "error": str}.
+        """
+        with self._lock:
+            reason = self.skip_reason(force)
+            if reason:
+                return {"fetched": False, "ok": reason == "fresh", "skipped": reason,
+                        "error": self.state.get("last_error", "")}
+
+            now = time.time()
+            self.state["last_attempt"] = now
+            try:
+                result = subprocess.run(["git", "fetch", "--quiet", self.remote],
+                                        cwd=str(self.repo_dir), capture_output=True, text=True,
+                                        timeout=self.timeout,
+                                        env=dict(os.environ, GIT_TERMINAL_PROMPT="0"))
+                ok = result.returncode == 0
+                error = result.stderr.strip()[:200]
+            except subprocess.TimeoutExpired:
+                ok, error = False, "timeout"
+            except Exception as e:
+                ok, error = False, str(e)
+
+            if ok:
+                self.state.update(failures=0, next_allowed=0, last_success=now, last_error="")
+                self.state["refs"] = {"HEAD": self.refs.resolve("HEAD"),
+                                      "remote": self.refs.resolve(f"refs/remotes/{self.remote}/main")}
+            else:
+                failures = self.state.get("failures", 0) + 1
+                backoff = min(self.max_backoff, self.base_backoff * 2 ** (failures - 1))
+                self.state.update(failures=failures, next_allowed=now + backoff, last_error=error)
+            self._save_state()
+            return {"fetched": True, "ok": ok, "skipped": None, "error": error}
+
+# === SCAN CACHE ===
+
+class ScanCache:
+    """On-disk cache of security scan results keyed by (HEAD, origin/main, pattern set).
+
+    Entries are single JSON files written atomically; the oldest are evicted
+    once they exceed `max_age` seconds or the directory holds more than
+    `max_entries` files.
+    """
+
+    def __init__(self, cache_dir, patterns=DANGEROUS_PATTERNS, max_age=14 * 86400, max_entries=64):
+        self.cache_dir = Path(cache_dir)
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.patterns_hash = hashlib.sha256(
+            json.dumps([list(patterns), NEW_SCRIPT_RE.pattern]).encode()).hexdigest()
+
+    def key(self, head, remote):
+        return hashlib.sha256(f"{head}:{remote}:{self.patterns_hash}".encode()).hexdigest()[:32]
+
+    def get(self, key):
+        path = self.cache_dir / f"{key}.json"
+        try:
+            if time.time() - path.stat().st_mtime > self.max_age:
+                return None
+            with open(path, "r") as f:
+                return json.load(f).get("result")
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, result):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_dir / f"{key}.json.tmp"
+            with open(tmp, "w") as f:
+                json.dump({"created": time.time(), "result": result}, f)
+            os.replace(tmp, self.cache_dir / f"{key}.json")
+            self.evict()
+        except OSError:
+            pass
+
+    def evict(self):
+        """Drop entries older than max_age and all but the newest max_entries"""
+        try:
+            entries = sorted(((p.stat().st_mtime, p) for p in self.cache_dir.glob("*.json")),
+                             reverse=True)
+        except OSError:
+            return
+        cutoff = time.time() - self.max_age
+        for i, (mtime, path) in enumerate(entries):
+            if i >= self.max_entries or mtime < cutoff:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+# === USAGE ACCUMULATOR ===
+
+class UsageAccumulator:
+    """Today's token/cost totals, fed from any thread and persisted at a bounded rate.
+
+    add() only takes a short lock and marks the totals dirty; a background
+    thread writes usage-stats.json atomically at most every `flush_interval`
+    seconds, and close() writes any remaining changes. `version` increases
+    on every change so displays can skip redraws when nothing moved.
+    """
+
+    def __init__(self, path, flush_interval=5.0):
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.version = 0
+        self._lock = threading.Lock()
+        self._date = datetime.now().strftime("%Y-%m-%d")
+        self._tokens = 0
+        self._cost = 0.0
+        self._by_model = {}
+        self._checkpoints = {}
+        self._dirty = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def load(self):
+        """Load today's totals from disk (older days are discarded)"""
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            if data.get("date") == self._date:
+                self._tokens = data.get("tokens", 0)
+                self._cost = data.get("cost", 0.0)
+                self._by_model = data.get("by_model", {})
+                self.version += 1
+            self._checkpoints = data.get("checkpoints", {})
+
+    def _roll_day(self):
+        today = datetime.now().strftime("%Y-%m-%d")
+        if today != self._date:
+            self._date = today
+            self._tokens, self._cost, self._by_model = 0, 0.0, {}
+
+    def add(self, tokens, cost, model="unknown"):
+        with self._lock:
+            self._roll_day()
+            self._tokens += tokens
+            self._cost += cost
+            self._by_model[model] = self._by_model.get(model, 0.0) + cost
+            self._dirty = True
+            self.version += 1
+
+    def add_batch(self, batch, checkpoints=None):
+        """Add {model: (tokens, cost)} and store reader checkpoints in one atomic step"""
+        with self._lock:
+            self._roll_day()
+            for model, (tokens, cost) in batch.items():
+                self._tokens += tokens
+                self._cost += cost
+                self._by_model[model] = self._by_model.get(model, 0.0) + cost
+            changed = bool(batch)
+            for name, checkpoint in (checkpoints or {}).items():
+                if self._checkpoints.get(name) != checkpoint:
+                    self._checkpoints[name] = checkpoint
+                    changed = True
+            # An idle poll stores the same checkpoints again: nothing to write
+            if changed:
+                self._dirty = True
+            if batch:
+                self.version += 1
+
+    def checkpoint(self, name):
+        """Last stored read position of a log source (see add_batch)"""
+        with self._lock:
+            return self._checkpoints.get(name)
+
+    def reset(self):
+        with self._lock:
+            self._tokens, self._cost, self._by_model = 0, 0.0, {}
+            self._dirty = True
+            self.version += 1
+
+    def totals(self):
+        """Return (tokens, cost, {model: cost}) for today"""
+        with self._lock:
+            self._roll_day()
+            return self._tokens, self._cost, dict(self._by_model)
+
+    def flush(self):
+        """Write the totals to disk atomically if they changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"date": self._date, "tokens": self._tokens,
+                    "cost": self._cost, "by_model": dict(self._by_model),
+                    "checkpoints": dict(self._checkpoints)}
+            self._dirty = False
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp, "w") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp, self.path)
+        except OSError:
+            with self._lock:
+                self._dirty = True
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+
+# === USAGE EXTRACTOR ===
+
+# USD per million tokens: (input, output, cache read, cache write)
+MODEL_PRICES = {
+    "anthropic/claude-opus-4-5": (5.00, 25.00, 0.50, 6.25),
+    "anthropic/claude-sonnet-4": (3.00, 15.00, 0.30, 3.75),
+    "anthropic/claude-haiku-3": (0.25, 1.25, 0.03, 0.30),
+    "groq/llama-3.3-70b-versatile": (0.59, 0.79, 0.59, 0.59),
+    "groq/llama-3.1-8b-instant": (0.05, 0.08, 0.05, 0.05),
+    "openai/gpt-4o": (2.50, 10.00, 1.25, 2.50),
+    "openai/gpt-4o-mini": (0.15, 0.60, 0.075, 0.15),
+}
+
+USAGE_FIELDS = {
+    "input": ("input", "input_tokens", "inputTokens", "prompt_tokens", "promptTokens"),
+    "output": ("output", "output_tokens", "outputTokens", "completion_tokens", "completionTokens"),
+    "cache_read": ("cacheRead", "cache_read", "cache_read_input_tokens", "cacheReadTokens"),
+    "cache_write": ("cacheWrite", "cache_write", "cache_creation_input_tokens", "cacheWriteTokens"),
+}
+
+TEXT_USAGE_RE = re.compile(
+    rb"(input|output|prompt|completion|cacheRead|cacheWrite)[_ ]?(?:tokens|Tokens)?[\"']?\s*[=:]\s*(\d+)")
+TEXT_MODEL_RE = re.compile(rb"model[\"']?\s*[=:]\s*[\"']?([\w./:@-]+)")
+ISO_TIME_RE = re.compile(rb"\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d(?:\.\d+)?(?:Z|[+-]\d\d:\d\d)?")
+
+
+class UsageExtractor:
+    """Stream token/cost usage out of the OpenClaw logs into a UsageAccumulator.
+
+    Each source is followed by its own LogTailer whose read position is
+    stored atomically with the totals, so a restart neither loses nor
+    double-counts requests. Lines are pre-filtered with a substring test
+    before any JSON parsing; records seen in more than one log are counted
+    once (by request id, or when no id is logged by a fingerprint of model,
+    token counts and the ISO timestamp to the second). A catch-up reads
+    the sources in turn, one bounded chunk each, and forgets no key until
+    it is done, so duplicates in a backlog of any size are found; between
+    polls only the last `dedupe_size` keys are kept.
+    Callables in `listeners` receive every non-empty
+    {model: [tokens, cost, records]} batch.
+    """
+
+    def __init__(self, accumulator, sources, prices=MODEL_PRICES, dedupe_size=4096,
+                 max_read=16 * 1024 * 1024):
+        self.accumulator = accumulator
+        self.max_read = max_read
+        self.prices = dict(prices)
+        self.dedupe_size = dedupe_size
+        self.records = 0
+        self._seen = OrderedDict()
+        self._price_cache = {}
+        self.listeners = []
+        self.tailers = {}
+        for name, path_func in sources.items():
+            tailer = LogTailer(path_func, error_pattern=None, initial_backlog=0)
+            tailer.restore(accumulator.checkpoint(name))
+            self.tailers[name] = tailer
+
+    def poll(self):
+        """Ingest newly appended lines of all sources; return the number of usage records"""
+        count = 0
+        pending = list(self.tailers.items())
+        # Bounded reads keep memory flat when catching up on a large backlog;
+        # taking turns brings a record logged twice to _seen from both logs
+        # close together instead of a whole backlog apart
+        while pending:
+            for name, tailer in pending:
+                lines = tailer.poll(max_bytes=self.max_read)
+                batch = self.process(lines) if lines else {}
+                count += sum(n for _, _, n in batch.values())
+                self.accumulator.add_batch({m: (t, c) for m, (t, c, _) in batch.items()},
+                                           {name: tailer.checkpoint()})
+                if batch:
+                    for listener in self.listeners:
+                        listener(batch)
+            pending = [(name, tailer) for name, tailer in pending if tailer.behind]
+        while len(self._seen) > self.dedupe_size:
+            self._seen.popitem(last=False)
+        self.records += count
+        return count
+
+    def process(self, lines):
+        """Aggregate usage lines into {model: [tokens, cost, records]}"""
+        batch = {}
+        parse = self.parse_line
+        for line in lines:
+            if b"usage" not in line and b"okens" not in line:
+                continue
+            record = parse(line)
+            if record is None:
+                continue
+            key, model, tokens, cost = record
+            if key in self._seen:
+                continue
+            self._seen[key] = None
+            entry = batch.setdefault(model, [0, 0.0, 0])
+            entry[0] += tokens
+            entry[1] += cost
+            entry[2] += 1
+        return batch
+
+    @staticmethod
+    def _find_usage(obj, depth=0):
+        """Return (holder, usage) for the first dict holding a "usage" dict"""
+        if isinstance(obj, dict):
+            usage = obj.get("usage")
+            if isinstance(usage, dict):
+                return obj, usage
+            children = obj.values()
+        elif isinstance(obj, list):
+            children = obj
+        else:
+            return None
+        if depth < 4:
+            for child in children:
+                if isinstance(child, (dict, list)):
+                    found = UsageExtractor._find_usage(child, depth + 1)
+                    if found:
+                        return found
+        return None
+
+    def parse_line(self, line):
+        """Return (dedupe key, model, tokens, cost) for a usage line, else None"""
+        start = line.find(b"{")
+        data = None
+        if start >= 0:
+            try:
+                data = json.loads(line[start:])
+            except ValueError:
+                data = None
+        if data is not None:
+            found = self._find_usage(data)
+            if not found:
+                return None
+            holder, usage = found
+            counts = {}
+            for field, names in USAGE_FIELDS.items():
+                counts[field] = next((int(usage[n]) for n in names
+                                      if isinstance(usage.get(n), (int, float))), 0)
+            model = str(holder.get("model") or usage.get("model") or "unknown")
+            provider = holder.get("provider")
+            if provider and "/" not in model:
+                model = f"{provider}/{model}"
+            cost = usage.get("cost", holder.get("cost"))
+            if isinstance(cost, dict):
+                cost = cost.get("total")
+            total = usage.get("total", usage.get("totalTokens"))
+            request_id = (holder.get("runId") or holder.get("requestId")
+                          or holder.get("responseId") or holder.get("id"))
+            when = None
+            if isinstance(data, dict):
+                meta = data.get("_meta")
+                when = (data.get("time") or data.get("date") or data.get("ts")
+                        or (meta.get("date") if isinstance(meta, dict) else None))
+        else:
+            counts = {"input": 0, "output": 0, "cache_read": 0, "cache_write": 0}
+            for name, value in TEXT_USAGE_RE.findall(line):
+                field = {b"prompt": "input", b"completion": "output", b"cacheRead": "cache_read",
+                         b"cacheWrite": "cache_write"}.get(name, name.decode())
+                counts[field] = int(value)
+            if not counts["input"] and not counts["output"]:
+                return None
+            match = TEXT_MODEL_RE.search(line)
+            model = match.group(1).decode() if match else "unknown"
+            cost, total, request_id = None, None, None
+            match = ISO_TIME_RE.search(line)
+            when = match.group(0).decode() if match else None
+
+        if not any(counts.values()):
+            return None
+        tokens = int(total) if isinstance(total, (int, float)) else sum(counts.values())
+        if not isinstance(cost, (int, float)):
+            cost = self.price(model, counts)
+        if not request_id:
+            # The same record in the JSON log and the console log only shares
+            # its timestamp, written in different forms: compare whole seconds
+            seconds = parse_log_time(when) if isinstance(when, str) else None
+            when = int(seconds) if seconds is not None else (when or line[:32])
+        key = request_id or (model, counts["input"], counts["output"],
+                             counts["cache_read"], counts["cache_write"], str(when))
+        return key, model, tokens, float(cost)
+
+    def _price_for(self, model):
+        if model not in self._price_cache:
+            price = self.prices.get(model)
+            if price is None:
+                name = model.split("/")[-1]
+                for known, known_price in self.prices.items():
+                    known_name = known.split("/")[-1]
+                    if name == known_name or name.startswith(known_name):
+                        price = known_price
+                        break
+            self._price_cache[model] = price
+        return self._price_cache[model]
+
+    def price(self, model, counts):
+        """Cost in USD of one request from the price table (0 for unknown models)"""
+        price = self._price_for(model)
+        if not price:
+            return 0.0
+        return (counts["input"] * price[0] + counts["output"] * price[1]
+                + counts["cache_read"] * price[2] + counts["cache_write"] * price[3]) / 1e6
+
+# === HISTORY STORE ===
+
+class HistoryStore:
+    """Append-only time series of probe samples and usage under ~/.openclaw/history.
+
+    Every series is kept at three resolutions, one file each:
+    `<series>.raw` holds (timestamp, value) records, `<series>.1m` and
+    `<series>.1h` hold (bucket start, min, max, sum, count) rollups that are
+    written when a bucket closes. Records are fixed width and time ordered,
+    so range queries binary-search a memory map instead of parsing files.
+    NaN values (e.g. "port down") are stored raw but left out of rollups.
+    After start(), a background thread flushes the files every
+    `flush_interval` seconds, so a crash loses at most that much.
+    """
+
+    RAW = struct.Struct("<dd")
+    ROLLUP = struct.Struct("<ddddd")
+    ROLLUPS = (("1m", 60), ("1h", 3600))
+    RETENTION = {"raw": 2 * 86400, "1m": 30 * 86400, "1h": 400 * 86400}
+
+    def __init__(self, directory, retention=None, compact_interval=3600, flush_interval=5.0):
+        self.directory = Path(directory)
+        self.retention = dict(self.RETENTION, **(retention or {}))
+        self.compact_interval = compact_interval
+        self.flush_interval = flush_interval
+        self._files = {}
+        self._buckets = {}
+        self._last_compact = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _name(series):
+        return re.sub(r"[^\w.@-]", "_", series)
+
+    def _path(self, series, resolution):
+        return self.directory / f"{self._name(series)}.{resolution}"
+
+    def _handle(self, series, resolution):
+        key = (series, resolution)
+        f = self._files.get(key)
+        if f is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            f = open(self._path(series, resolution), "ab")
+            # Drop a torn record left by a crash so later records stay aligned
+            size = (self.RAW if resolution == "raw" else self.ROLLUP).size
+            end = f.seek(0, os.SEEK_END)
+            if end % size:
+                f.truncate(end - end % size)
+            self._files[key] = f
+        return f
+
+    def append(self, series, value, timestamp=None):
+        """Record one sample; rollups are written as their buckets close"""
+        timestamp = time.time() if timestamp is None else timestamp
+        value = float(value)
+        with self._lock:
+            try:
+                self._handle(series, "raw").write(self.RAW.pack(timestamp, value))
+                for resolution, width in self.ROLLUPS:
+                    key = (series, resolution)
+                    start = timestamp - timestamp % width
+                    bucket = self._buckets.get(key)
+                    if bucket is not None and bucket[0] != start:
+                        self._write_bucket(key, bucket)
+                        bucket = None
+                    if bucket is None:
+                        bucket = self._buckets[key] = [start, math.inf, -math.inf, 0.0, 0]
+                    if value == value:
+                        bucket[1] = min(bucket[1], value)
+                        bucket[2] = max(bucket[2], value)
+                        bucket[3] += value
+                        bucket[4] += 1
+            except OSError:
+                pass
+
+    def _write_bucket(self, key, bucket):
+        if bucket[4]:
+            self._handle(*key).write(self.ROLLUP.pack(*bucket))
+
+    def flush(self):
+        with self._lock:
+            for f in self._files.values():
+                try:
+                    f.flush()
+                except OSError:
+                    pass
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        """Write the open buckets and close all files"""
+        self._stop.set()
+        with self._lock:
+            for key, bucket in self._buckets.items():
+                try:
+                    self._write_bucket(key, bucket)
+                except OSError:
+                    pass
+            self._buckets.clear()
+            for f in self._files.values():
+                try:
+                    f.close()
+                except OSError:
+                    pass
+            self._files.clear()
+
+    def series(self):
+        """Names of all stored series"""
+        try:
+            return sorted({p.stem for p in self.directory.glob("*.raw")})
+        except OSError:
+            return []
+
+    def resolution_for(self, start, end):
+        """Coarsest resolution that still gives a useful number of points"""
+        span = end - start
+        if span <= 6 * 3600:
+            return "raw"
+        if span <= 14 * 86400:
+            return "1m"
+        return "1h"
+
+    @staticmethod
+    def _bisect(buf, record, count, timestamp):
+        """Index of the first record with a timestamp >= `timestamp`"""
+        lo, hi = 0, count
+        size = record.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if struct.unpack_from("<d", buf, mid * size)[0] < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _read_range(self, path, record, start, end):
+        try:
+            with open(path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                count = size // record.size
+                if not count:
+                    return []
+                with mmap.mmap(f.fileno(), count * record.size, access=mmap.ACCESS_READ) as buf:
+                    first = self._bisect(buf, record, count, start)
+                    last = self._bisect(buf, record, count, end)
+                    return list(record.iter_unpack(buf[first * record.size:last * record.size]))
+        except (OSError, ValueError):
+            return []
+
+    def query(self, series, start, end=None, resolution=None):
+        """Samples of `series` with start <= timestamp < end.
+
+        Raw resolution returns [(timestamp, value)], rollups return
+        [(bucket start, min, max, avg, count)]; by default the resolution is
+        chosen from the length of the range.
+        """
+        end = time.time() + 1 if end is None else end
+        resolution = resolution or self.resolution_for(start, end)
+        with self._lock:
+            f = self._files.get((series, resolution))
+            if f is not None:
+                f.flush()
+            pending = self._buckets.get((series, resolution))
+            pending = list(pending) if pending and pending[4] else None
+        path = self._path(series, resolution)
+        if resolution == "raw":
+            return self._read_range(path, self.RAW, start, end)
+
+        rows = self._read_range(path, self.ROLLUP, start, end)
+        if pending and start <= pending[0] < end:
+            rows.append(tuple(pending))
+        # A bucket written at shutdown may be continued after a restart; the
+        # two records are adjacent, so merging only looks at the previous one
+        merged = []
+        for row in rows:
+            if merged and merged[-1][0] == row[0]:
+                last = merged[-1]
+                merged[-1] = (row[0], min(last[1], row[1]), max(last[2], row[2]),
+                              last[3] + row[3], last[4] + row[4])
+            else:
+                merged.append(row)
+        return [(ts, low, high, total / count, int(count))
+                for ts, low, high, total, count in merged]
+
+    def compact(self):
+        """Drop records older than the retention of their resolution"""
+        now = time.time()
+        with self._lock:
+            try:
+                paths = list(self.directory.iterdir())
+            except OSError:
+                return
+            for f in self._files.values():
+                f.flush()
+            for path in paths:
+                resolution = path.suffix[1:]
+                if resolution not in self.retention:
+                    continue
+                record = self.RAW if resolution == "raw" else self.ROLLUP
+                cutoff = now - self.retention[resolution]
+                try:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                    count = len(data) // record.size
+                    first = self._bisect(data, record, count, cutoff)
+                    if not first:
+                        continue
+                    series = next((key[0] for key in self._files
+                                   if key[1] == resolution and self._path(*key) == path), None)
+                    if series is not None:
+                        self._files.pop((series, resolution)).close()
+                    tmp = path.with_name(path.name + ".tmp")
+                    with open(tmp, "wb") as f:
+                        f.write(data[first * record.size:count * record.size])
+                    os.replace(tmp, path)
+                except OSError:
+                    continue
+        self._last_compact = now
+
+    def maybe_compact(self):
+        if time.time() - self._last_compact >= self.compact_interval:
+            self.compact()
+
+# === EVENT LOG ===
+
+# key is a translation key rendered with args at display time; key None means
+# args[0] is literal text. level is "info", "warning" or "error".
+EventRecord = namedtuple("EventRecord", ["timestamp", "level", "key", "args"])
+
+
+class EventLog:
+    """Fixed-capacity ring buffer of structured event records.
+
+    Holds the full (bounded) history so it can be searched and exported
+    without keeping every line in the Tk Text widget.
+    """
+
+    def __init__(self, capacity=10000):
+        self._records = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def append(self, level, key, args=()):
+        record = EventRecord(datetime.now(), level, key, tuple(args))
+        with self._lock:
+            self._records.append(record)
+        return record
+
+    def records(self):
+        with self._lock:
+            return list(self._records)
+
+    def search(self, text, render):
+        """Records whose rendered text contains `text` (case-insensitive)"""
+        needle = text.lower()
+        return [r for r in self.records() if needle in render(r).lower()]
+
+    def export(self, path, render):
+        """Write the whole history to `path`, one line per event"""
+        with open(path, "w", encoding="utf-8") as f:
+            for record in self.records():
+                f.write(f"{record.timestamp.strftime('%Y-%m-%d %H:%M:%S')} "
+                        f"{record.level.upper():7} {render(record)}\n")
+
+# === PROBE ENGINE ===
+
+# Immutable result of one probe round. `values` maps probe key -> result,
+# `durations` maps probe key -> seconds, `errors` maps probe key -> message;
+# `updated` holds the keys probed in this round (the others are carried over).
+StatusSnapshot = namedtuple("StatusSnapshot", ["timestamp", "values", "durations", "errors", "updated"])
+
+# errors[key] of a probe that did not finish within its timeout
+PROBE_TIMEOUT = "timeout"
+
+EMPTY_SNAPSHOT = StatusSnapshot(0.0, MappingProxyType({}), MappingProxyType({}), MappingProxyType({}),
+                                frozenset())
+
+
+class ProbeEngine:
+    """Run status probes concurrently on a worker pool and publish snapshots"""
+
+    def __init__(self, probes, timeouts=None, default_timeout=3.0):
+        self.probes = dict(probes)
+        self.timeouts = dict(timeouts or {})
+        self.default_timeout = default_timeout
+        self.snapshot = EMPTY_SNAPSHOT
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(self.probes)),
+                                            thread_name_prefix="probe")
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _timed(probe):
+        start = time.monotonic()
+        value = probe()
+        return value, time.monotonic() - start
+
+    def run(self, keys=None):
+        """Run probes in parallel and return a new StatusSnapshot.
+
+        Only `keys` are probed if given (default: all); the results of the
+        other probes are carried over from the previous snapshot.
+        A probe that is still running from an earlier round is not started
+        again; its pending result is awaited instead. A probe that exceeds its
+        timeout is reported in `errors` and its value is None, so a hung probe
+        never delays the others by more than its own timeout.
+        """
+        start = time.monotonic()
+        keys = list(self.probes) if keys is None else [k for k in keys if k in self.probes]
+        with self._lock:
+            futures = {}
+            for key in keys:
+                probe = self.probes[key]
+                future = self._inflight.get(key)
+                if future is None or future.done():
+                    future = self._executor.submit(self._timed, probe)
+                    self._inflight[key] = future
+                futures[key] = future
+
+        values, durations, errors = {}, {}, {}
+        for key, future in futures.items():
+            timeout = self.timeouts.get(key, self.default_timeout)
+            remaining = max(0.0, start + timeout - time.monotonic())
+            try:
+                values[key], durations[key] = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                values[key] = None
+                durations[key] = time.monotonic() - start
+                errors[key] = PROBE_TIMEOUT
+            except Exception as e:
+                values[key] = None
+                durations[key] = time.monotonic() - start
+                errors[key] = str(e) or e.__class__.__name__
+
+        with self._lock:
+            previous = self.snapshot
+            for key, value in previous.values.items():
+                if key not in futures:
+                    values[key] = value
+                    durations[key] = previous.durations.get(key, 0.0)
+                    if key in previous.errors:
+                        errors[key] = previous.errors[key]
+            snapshot = StatusSnapshot(time.time(), MappingProxyType(values), MappingProxyType(durations),
+                                      MappingProxyType(errors), frozenset(futures))
+            self.snapshot = snapshot
+        return snapshot
+
+    def shutdown(self):
+        """Stop accepting work; running probes are left to finish on their own"""
+        self._executor.shutdown(wait=False)
+
+# === PROBE SCHEDULER ===
+
+class ProbeScheduler:
+    """Heap-based timer queue giving every probe its own interval.
+
+    After a healthy run a probe's interval grows by `backoff` up to its
+    maximum; a failure, or wake(), drops it back to the base interval.
+    `slowdown` stretches all intervals (e.g. while the window is
+    minimized). cadence() reports the interval actually achieved per probe.
+    """
+
+    def __init__(self, intervals, max_intervals=None, backoff=1.5):
+        self.intervals = dict(intervals)
+        self.max_intervals = {key: (max_intervals or {}).get(key, interval)
+                              for key, interval in self.intervals.items()}
+        self.backoff = backoff
+        self.slowdown = 1.0
+        self._current = dict(self.intervals)
+        self._heap = []
+        self._generation = {}
+        self._inflight = set()
+        self._last_run = {}
+        self._cadence = {}
+        self._closed = False
+        self._cond = threading.Condition()
+        now = time.monotonic()
+        for key in self.intervals:
+            self._schedule(key, now)
+
+    def _schedule(self, key, when):
+        # Older heap entries of the key become stale and are skipped when popped
+        generation = self._generation.get(key, 0) + 1
+        self._generation[key] = generation
+        heapq.heappush(self._heap, (when, generation, key))
+
+    def wait_due(self):
+        """Block until probes are due and return their keys ([] once closed)"""
+        with self._cond:
+            while not self._closed:
+                now = time.monotonic()
+                due = []
+                while self._heap and self._heap[0][0] <= now:
+                    _, generation, key = heapq.heappop(self._heap)
+                    if generation == self._generation[key] and key not in self._inflight:
+                        due.append(key)
+                if due:
+                    self._inflight.update(due)
+                    return due
+                self._cond.wait(self._heap[0][0] - now if self._heap else None)
+            return []
+
+    def report(self, key, healthy):
+        """Record a finished run of `key` and schedule its next one"""
+        with self._cond:
+            now = time.monotonic()
+            self._inflight.discard(key)
+            last = self._last_run.get(key)
+            if last is not None:
+                previous = self._cadence.get(key)
+                elapsed = now - last
+                self._cadence[key] = elapsed if previous is None else 0.7 * previous + 0.3 * elapsed
+            self._last_run[key] = now
+            if healthy:
+                self._current[key] = min(self._current[key] * self.backoff, self.max_intervals[key])
+            else:
+                self._current[key] = self.intervals[key]
+            self._schedule(key, now + self._current[key] * self.slowdown)
+
+    def wake(self, keys=None):
+        """Reset `keys` (default: all) to their base interval and run them now"""
+        with self._cond:
+            now = time.monotonic()
+            for key in keys or self.intervals:
+                self._current[key] = self.intervals[key]
+                if key not in self._inflight:
+                    self._schedule(key, now)
+            self._cond.notify_all()
+
+    def set_slowdown(self, factor):
+        """Stretch all intervals by `factor` (1.0 = normal speed)"""
+        with self._cond:
+            if factor == self.slowdown:
+                return
+            self.slowdown = factor
+            now = time.monotonic()
+            for key in self.intervals:
+                if key not in self._inflight:
+                    last = self._last_run.get(key, now)
+                    self._schedule(key, last + self._current[key] * factor)
+            self._cond.notify_all()
+
+    def cadence(self):
+        """Average seconds between runs, per probe that has run at least twice"""
+        with self._cond:
+            return dict(self._cadence)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+# === METRICS EXPORTER ===
+
+# Port round-trip histogram buckets, in seconds
+RTT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+
+class Histogram:
+    """Cumulative histogram with fixed upper bounds, as exported to Prometheus"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self):
+        """Return ([(upper bound, cumulative count)], sum, count); the last bound is inf"""
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        cumulative, running = [], 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            running += count
+            cumulative.append((bound, running))
+        return cumulative, total, running
+
+
+def _metric_value(value):
+    if value != value:
+        return "NaN"
+    if value in (math.inf, -math.inf):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _metric_labels(labels):
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def format_metrics(families):
+    """Render [(name, type, help, samples)] in the Prometheus text format.
+
+    samples is a list of (labels dict, value), or a Histogram for type
+    "histogram". Families without samples are left out.
+    """
+    lines = []
+    for name, kind, help_text, samples in families:
+        if kind == "histogram":
+            buckets, total, count = samples.snapshot()
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            lines += [f'{name}_bucket{{le="{_metric_value(bound)}"}} {n}' for bound, n in buckets]
+            lines += [f"{name}_sum {_metric_value(total)}", f"{name}_count {count}"]
+            continue
+        samples = [(labels, value) for labels, value in samples if value is not None]
+        if not samples:
+            continue
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        lines += [f"{name}{_metric_labels(labels)} {_metric_value(value)}" for labels, value in samples]
+    return "\n".join(lines) + "\n"
+
+
+def collect_metrics(snapshot, gateway_port, rtt_histogram, log_age=None, error_counts=None,
+                    restarts=None, commits_behind=None, usage=None, cadence=None, connections=None,
+                    sessions=None):
+    """Metric families for format_metrics(), built from cached state only.
+
+    `usage` maps model -> (tokens, cost in USD); `restarts` maps component
+    -> count, `error_counts` maps error keyword -> count, `cadence` maps
+    probe -> achieved seconds between runs, `connections` maps port ->
+    ConnectionStats and `sessions` is a SessionTracker.
+    """
+    values = snapshot.values
+    procs = values.get("gateway") or []
+    rtt = (values.get("port") or {}).get(gateway_port)
+    up = None
+    if "gateway" not in snapshot.errors and "port" not in snapshot.errors and snapshot.timestamp:
+        up = int(bool(procs) and rtt is not None)
+    cpu = [p.cpu for p in procs if p.cpu is not None]
+    ws_rtt = values.get("ws")
+    usage = usage or {}
+    connections = connections or {}
+    stuck = values.get("sessions")
+    return [
+        ("openclaw_gateway_up", "gauge", "Gateway process running and port accepting connections",
+         [({}, up)]),
+        ("openclaw_port_rtt_seconds", "histogram", "Gateway port connect round-trip time", rtt_histogram),
+        ("openclaw_gateway_ws_up", "gauge", "Gateway answered the last WebSocket ping",
+         [({}, int(ws_rtt is not None))] if "ws" in values else []),
+        ("openclaw_gateway_ws_rtt_seconds", "gauge", "Round-trip time of the last WebSocket ping",
+         [({}, ws_rtt / 1000)] if ws_rtt is not None else []),
+        ("openclaw_gateway_resident_memory_bytes", "gauge", "Resident memory of the gateway processes",
+         [({}, sum(p.rss for p in procs))] if procs else []),
+        ("openclaw_gateway_cpu_seconds_total", "counter", "CPU time used by the gateway processes",
+         [({}, sum(cpu))] if cpu else []),
+        ("openclaw_port_connections", "gauge", "ESTABLISHED connections accepted on the port",
+         [({"port": port}, stats.count) for port, stats in sorted(connections.items())]),
+        ("openclaw_port_client_connections", "gauge", "Local client connections to the port, by client PID",
+         [({"port": port, "pid": pid if pid is not None else "unknown"}, n)
+          for port, stats in sorted(connections.items()) for pid, n in stats.clients.items()]),
+        ("openclaw_log_age_seconds", "gauge", "Seconds since today's log was last written",
+         [({}, log_age)]),
+        ("openclaw_log_errors_total", "counter", "Error lines seen in the log, by first word of the match",
+         [({"pattern": k}, v) for k, v in sorted((error_counts or {}).items())]),
+        ("openclaw_restarts_total", "counter", "Restarts performed by this monitor",
+         [({"component": k}, v) for k, v in sorted((restarts or {}).items())]),
+        ("openclaw_commits_behind", "gauge", "Commits the checkout is behind origin/main",
+         [({}, commits_behind)]),
+        ("openclaw_usage_tokens_total", "counter", "Tokens used since the monitor started",
+         [({"model": m}, t) for m, (t, _) in sorted(usage.items())]),
+        ("openclaw_usage_cost_usd_total", "counter", "Cost in USD since the monitor started",
+         [({"model": m}, c) for m, (_, c) in sorted(usage.items())]),
+        ("openclaw_sessions_processing", "gauge", "Sessions in the processing state",
+         [({}, sessions.processing())] if sessions else []),
+        ("openclaw_sessions_stuck", "gauge", "Sessions processing for longer than the stuck threshold",
+         [({}, len(stuck))] if stuck is not None else []),
+        ("openclaw_session_processing_seconds", "gauge",
+         "Duration of recently finished processing spells, by quantile",
+         [({"quantile": q}, sessions.percentile(q * 100)) for q in (0.5, 0.95)] if sessions else []),
+        ("openclaw_probe_duration_seconds", "gauge", "Duration of the last probe round, per probe",
+         [({"probe": k}, v) for k, v in sorted(snapshot.durations.items())]),
+        ("openclaw_probe_interval_seconds", "gauge", "Achieved seconds between runs, per probe",
+         [({"probe": k}, v) for k, v in sorted((cadence or {}).items())]),
+        ("openclaw_last_probe_timestamp_seconds", "gauge", "Time of the last probe round",
+         [({}, snapshot.timestamp or None)]),
+    ]
+
+
+class MetricsExporter:
+    """Serve GET /metrics from a daemon thread.
+
+    `collect` returns the families to render and must only read cached
+    state, so a scrape never runs a probe.
+    """
+
+    def __init__(self, collect, host="127.0.0.1", port=9464):
+        self.collect = collect
+        self.host = host
+        self.port = port
+        self._server = None
+
+    def start(self):
+        """Bind and start serving; raises OSError if the port is taken"""
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = format_metrics(exporter.collect()).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True).start()
+
+    def close(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+# === OPENCLAW PATHS ===
+
+def find_openclaw_dir(home_dir=None):
+    """Find the OpenClaw installation directory"""
+    home_dir = Path(home_dir) if home_dir else Path.home()
+    # Common locations to check
+    possible_paths = [
+        home_dir / "clawdbot",
+        home_dir / "openclaw",
+        home_dir / "OpenClaw",
+        Path("/opt/openclaw"),
+        Path("/usr/local/openclaw"),
+    ]
+
+    # Check environment variable first
+    env_path = os.environ.get("OPENCLAW_DIR")
+    if env_path:
+        return Path(env_path)
+
+    # Check common locations
+    for path in possible_paths:
+        if path.exists() and (path / "package.json").exists():
+            return path
+
+    # Default fallback
+    return home_dir / "clawdbot"
+
+
+def daily_log_path(config_dir):
+    """Path of today's OpenClaw log"""
+    name = f"openclaw-{datetime.now().strftime('%Y-%m-%d')}.log"
+    if platform.system().lower() == "windows":
+        return Path(config_dir) / "logs" / name
+    return Path("/tmp/openclaw") / name
+
+
+def read_gateway_config(config_file):
+    """Return (port, token) of the gateway from openclaw.json"""
+    try:
+        with open(config_file, "r") as f:
+            gateway = json.load(f).get("gateway", {})
+        return int(gateway.get("port", 18789)), gateway.get("auth", {}).get("token", "")
+    except (OSError, ValueError, AttributeError):
+        return 18789, ""
+
+# === RESTART ORCHESTRATOR ===
+
+RestartResult = namedtuple("RestartResult", ["ok", "pid", "stop_seconds", "ready_seconds", "killed", "error"])
+
+
+def pid_alive(pid):
+    """Whether process `pid` still runs (POSIX; an exited child of ours is reaped first)"""
+    try:
+        if os.waitpid(pid, os.WNOHANG)[0] == pid:
+            return False
+    except ChildProcessError:
+        pass
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def gateway_node_pattern(port):
+    return f"node.*gateway.*{port}"
+
+
+def gateway_pids(process_table, port):
+    """PIDs of the gateway, run as openclaw-gateway or as node serving `port` (fresh scan)"""
+    node = gateway_node_pattern(port)
+    process_table.add(node)
+    matches = process_table.scan()
+    return {p.pid for p in matches["openclaw-gateway"] + matches[node]}
+
+
+def gateway_command(port, token):
+    return ["pnpm", "openclaw", "gateway", "run", "--bind", "loopback",
+            "--port", str(port), "--token", token]
+
+
+def launch_gateway(openclaw_dir, port, token, log_path):
+    """Start `pnpm openclaw gateway run` detached, logging to `log_path` (raises OSError)"""
+    with open(log_path, "wb") as log:
+        return subprocess.Popen(gateway_command(port, token),
+                                cwd=openclaw_dir, stdin=subprocess.DEVNULL, stdout=log,
+                                stderr=subprocess.STDOUT, start_new_session=True)
+
+
+class RestartOrchestrator:
+    """Stop, launch and wait-for-ready steps of a restart, without fixed sleeps.
+
+    stop() sends SIGTERM and polls for exit until `stop_timeout`, then
+    SIGKILLs what is left. After `launch()` the `ready` check is polled
+    with a backoff from 50 ms up to 500 ms until `ready_timeout`, so a
+    restart takes as long as the gateway needs and that time is measured.
+    Setting `stop_event` aborts the waits.
+    """
+
+    def __init__(self, find_pids, launch, ready, stop_timeout=5.0, ready_timeout=30.0,
+                 stop_event=None):
+        self.find_pids = find_pids
+        self.launch = launch
+        self.ready = ready
+        self.stop_timeout = stop_timeout
+        self.ready_timeout = ready_timeout
+        self.stop_event = stop_event or threading.Event()
+
+    def wait_for(self, condition, timeout, first=0.05, limit=0.5):
+        """Poll `condition` with backoff; return the seconds it took, or None on timeout"""
+        start = time.monotonic()
+        delay = first
+        while True:
+            if condition():
+                return time.monotonic() - start
+            remaining = start + timeout - time.monotonic()
+            if remaining <= 0 or self.stop_event.wait(min(delay, remaining)):
+                return None
+            delay = min(delay * 1.5, limit)
+
+    def stop(self, pids, find_pids=None):
+        """Terminate `pids`; return (seconds until all exited, whether SIGKILL was needed)"""
+        pids = set(pids)
+        if not pids:
+            return 0.0, False
+        if os.name == "nt":
+            # os.kill terminates at once on Windows; "alive" means still listed
+            find_pids = find_pids or self.find_pids
+            alive = lambda pid: pid in set(find_pids())
+        else:
+            alive = pid_alive
+        start = time.monotonic()
+        self._signal(pids, signal.SIGTERM)
+        if self.wait_for(lambda: not any(alive(pid) for pid in pids), self.stop_timeout) is not None:
+            return time.monotonic() - start, False
+        self._signal([pid for pid in pids if alive(pid)], getattr(signal, "SIGKILL", signal.SIGTERM))
+        self.wait_for(lambda: not any(alive(pid) for pid in pids), self.stop_timeout)
+        return time.monotonic() - start, True
+
+    @staticmethod
+    def _signal(pids, sig):
+        for pid in pids:
+            try:
+                os.kill(pid, sig)
+            except OSError:
+                pass
+
+    def restart(self):
+        """Stop the running processes, launch and wait until ready; return a RestartResult"""
+        stop_seconds, killed = self.stop(self.find_pids())
+        try:
+            self.launch()
+        except OSError as e:
+            return RestartResult(False, None, stop_seconds, None, killed, f"could not be started: {e}")
+        ready_seconds = self.wait_for(self.ready, self.ready_timeout)
+        if ready_seconds is None:
+            return RestartResult(False, None, stop_seconds, None, killed,
+                                 f"not ready after {self.ready_timeout:.0f}s")
+        pids = sorted(self.find_pids())
+        return RestartResult(True, pids[0] if pids else None, stop_seconds, ready_seconds, killed, None)
+
+# === GATEWAY SUPERVISOR ===
+
+class RotatingLog:
+    """Append-only log that moves to `path`.1 ... `path`.N once it exceeds `max_bytes`"""
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backups=3):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._file = None
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def write(self, data):
+        """Append `data`; callers pass whole lines so a rotation never splits one"""
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "ab")
+                self._size = self._file.tell()
+            if self._size and self._size + len(data) > self.max_bytes:
+                self._rotate()
+            self._file.write(data)
+            self._file.flush()
+            self._size += len(data)
+
+    def _rotate(self):
+        self._file.close()
+        # Reopened by the next write if renaming fails
+        self._file = None
+        for i in range(self.backups - 1, 0, -1):
+            try:
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+            except FileNotFoundError:
+                pass
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+            self._file = open(self.path, "ab")
+        else:
+            self._file = open(self.path, "wb")
+        self._size = 0
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+class GatewaySupervisor:
+    """Runs the gateway as a child process and learns of its exit without polling.
+
+    stdout and stderr are read through non-blocking pipes into a RotatingLog
+    and passed, as complete lines, to `on_lines`. The exit is seen through
+    a pidfd (Linux 5.3+ with Python 3.9+) or else a thread blocked in
+    waitpid, and an exit that stop() did not ask for is reported to
+    `on_exit(code)` within milliseconds. POSIX only.
+    """
+
+    def __init__(self, command, cwd, log_path, on_lines=None, on_exit=None,
+                 max_bytes=10 * 1024 * 1024, backups=3):
+        self.command = command
+        self.cwd = cwd
+        self.log = RotatingLog(log_path, max_bytes, backups)
+        self.on_lines = on_lines
+        self.on_exit = on_exit
+        self.proc = None
+        self.started_at = None
+        self.exited_at = None
+        # Exit code of the last exit that was not asked for (None while running)
+        self.exit_code = None
+        # Last error writing the log (the output is still passed to on_lines)
+        self.log_error = None
+        self._exited = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    @property
+    def pid(self):
+        return self.proc.pid if self.proc else None
+
+    @property
+    def running(self):
+        return self.proc is not None and not self._exited.is_set()
+
+    def start(self):
+        """Launch the gateway, stopping a running child first; raises OSError"""
+        if os.name == "nt":
+            raise OSError("supervising the gateway needs a POSIX system")
+        if self.running:
+            self.stop()
+        proc = subprocess.Popen(self.command, cwd=self.cwd, stdin=subprocess.DEVNULL,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                start_new_session=True)
+        os.set_blocking(proc.stdout.fileno(), False)
+        os.set_blocking(proc.stderr.fileno(), False)
+        self.proc, self._exited, self._stopping = proc, threading.Event(), False
+        self.exit_code, self.started_at, self.exited_at = None, time.time(), None
+        self._thread = threading.Thread(target=self._run, args=(proc, self._exited),
+                                        name="gateway-supervisor", daemon=True)
+        self._thread.start()
+        return proc
+
+    def stop(self, timeout=5.0):
+        """SIGTERM the child's process group, SIGKILL after `timeout`; return (seconds, killed)"""
+        proc, exited = self.proc, self._exited
+        if proc is None or exited.is_set():
+            return 0.0, False
+        self._stopping = True
+        start = time.monotonic()
+        self._signal(proc, signal.SIGTERM)
+        killed = not exited.wait(timeout)
+        if killed:
+            self._signal(proc, signal.SIGKILL)
+            exited.wait(timeout)
+        self._thread.join(timeout)
+        return time.monotonic() - start, killed
+
+    def close(self, timeout=5.0):
+        self.stop(timeout)
+        self.log.close()
+
+    @staticmethod
+    def _signal(proc, sig):
+        # pnpm runs the gateway as its own child: signal the whole session
+        try:
+            os.killpg(proc.pid, sig)
+        except OSError:
+            pass
+
+    def _exit_fd(self, proc):
+        """A file descriptor that becomes readable when `proc` exits"""
+        if hasattr(os, "pidfd_open"):
+            try:
+                return os.pidfd_open(proc.pid)
+            except OSError:
+                pass
+        read_fd, write_fd = os.pipe()
+
+        def wait():
+            proc.wait()
+            os.write(write_fd, b"x")
+            os.close(write_fd)
+
+        threading.Thread(target=wait, name="gateway-waitpid", daemon=True).start()
+        return read_fd
+
+    def _run(self, proc, exited):
+        code = None
+        partial = {proc.stdout: b"", proc.stderr: b""}
+        selector = selectors.DefaultSelector()
+        exit_fd = None
+        try:
+            exit_fd = self._exit_fd(proc)
+            for pipe in partial:
+                selector.register(pipe, selectors.EVENT_READ)
+            selector.register(exit_fd, selectors.EVENT_READ)
+            while True:
+                events = selector.select()
+                if any(key.fileobj == exit_fd for key, _ in events):
+                    break
+                for key, _ in events:
+                    if self._read(key.fileobj, partial) is False:
+                        selector.unregister(key.fileobj)
+            code = proc.wait()
+            # What the child wrote just before it exited
+            for pipe in list(partial):
+                while self._read(pipe, partial):
+                    pass
+            for pipe, rest in partial.items():
+                if rest:
+                    self._output(pipe, rest + b"\n", partial)
+        finally:
+            selector.close()
+            if exit_fd is not None:
+                os.close(exit_fd)
+            proc.stdout.close()
+            proc.stderr.close()
+            # Also after an unexpected error, so that running, stop() and
+            # on_exit still see the exit (the child fails its next write)
+            if code is None:
+                code = proc.wait()
+            self.exited_at = time.time()
+            stopping = self._stopping
+            exited.set()
+        if not stopping:
+            self.exit_code = code
+            if self.on_exit:
+                try:
+                    self.on_exit(code)
+                except Exception:
+                    pass
+
+    def _read(self, pipe, partial):
+        """Read what is available from `pipe`; return False at EOF, None if nothing is left"""
+        try:
+            data = os.read(pipe.fileno(), 65536)
+        except BlockingIOError:
+            return None
+        except OSError:
+            data = b""
+        if not data:
+            return False
+        self._output(pipe, partial[pipe] + data, partial)
+        return True
+
+    def _output(self, pipe, data, partial):
+        end = data.rfind(b"\n") + 1
+        partial[pipe] = data[end:]
+        if not end:
+            return
+        try:
+            self.log.write(data[:end])
+        except OSError as e:
+            # e.g. a full /tmp: keep reading, so the child never blocks on a full pipe
+            self.log_error = e
+        if self.on_lines:
+            try:
+                self.on_lines(data[:end - 1].split(b"\n"))
+            except Exception:
+                pass
+
+# === HEADLESS MONITOR ===
+
+# Same patterns as check_for_errors in watchdog.sh
+GATEWAY_ERROR_PATTERN = r"fatal|crash|panic|ECONNREFUSED|credit.*(low|insufficient)"
+
+
+class RestartPolicy:
+    """Restart budget of watchdog.sh.
+
+    After `max_attempts` restarts further restarts wait for `cooldown`
+    seconds; the count is reset once the gateway has been healthy for
+    `healthy_reset` seconds after the last restart.
+    """
+
+    def __init__(self, max_attempts=3, cooldown=600, healthy_reset=300):
+        self.max_attempts = max_attempts
+        self.cooldown = cooldown
+        self.healthy_reset = healthy_reset
+        self.count = 0
+        self.last_restart = 0.0
+
+    def cooldown_remaining(self, now=None):
+        """Seconds until another restart is allowed (0 if allowed now)"""
+        now = time.time() if now is None else now
+        if self.count >= self.max_attempts:
+            remaining = self.last_restart + self.cooldown - now
+            if remaining > 0:
+                return remaining
+            self.count = 0
+        return 0
+
+    def record(self, now=None):
+        self.count += 1
+        self.last_restart = time.time() if now is None else now
+
+    def healthy(self, now=None):
+        now = time.time() if now is None else now
+        if self.count and now - self.last_restart > self.healthy_reset:
+            self.count = 0
+
+    def to_dict(self):
+        return {"count": self.count, "last_restart": self.last_restart}
+
+    def restore(self, state):
+        self.count = int(state.get("count", 0))
+        self.last_restart = float(state.get("last_restart", 0.0))
+
+
+class HeadlessMonitor:
+    """The watchdog checks without a display, using the GUI's in-process probes.
+
+    A missing gateway process or a closed port is critical and restarts the
+    gateway within the RestartPolicy budget; stale logs, new fatal errors
+    in the gateway log and sessions stuck in "processing" are warnings.
+    Nothing here needs tkinter, and no check forks a process.
+
+    With a `metrics_port`, commits behind origin/main (git only runs when
+    a ref moved) and per-model token usage are collected for export too;
+    they never change the status.
+
+    With `supervise` the gateway runs as a GatewaySupervisor child: its
+    output is matched as it arrives and an exit triggers a check at once
+    instead of at the next interval. Stopping the monitor stops it.
+    """
+
+    name = "Headless monitor"
+    export_probes = ("git", "usage")
+
+    def __init__(self, interval=30, stale_threshold=300, policy=None, log_file=None,
+                 metrics_port=None, supervise=False, stuck_threshold=120, state_file=None,
+                 usage_file=None):
+        self.home_dir = Path.home()
+        self.openclaw_config_dir = self.home_dir / ".openclaw"
+        self.openclaw_dir = find_openclaw_dir(self.home_dir)
+        self.config_file = self.openclaw_config_dir / "openclaw.json"
+        self.gateway_log = Path("/tmp/openclaw-gateway.log")
+        self.log_file = Path(log_file) if log_file else self.openclaw_config_dir / "logs" / "monitor-headless.log"
+        # Restart budget and last status, shared by every run (e.g. --once from cron)
+        self.state_file = (Path(state_file) if state_file
+                           else self.openclaw_config_dir / "logs" / "monitor-headless-state.json")
+        self.gateway_port, self.gateway_token = read_gateway_config(self.config_file)
+        self.interval = interval
+        self.stale_threshold = stale_threshold
+        self.policy = policy or RestartPolicy()
+        self.wake_threshold = interval * 2
+
+        self.process_table = ProcessTable(["openclaw-gateway", gateway_node_pattern(self.gateway_port),
+                                           "openclaw.*tui"])
+        self.port_prober = PortProber()
+        self.connection_inspector = ConnectionInspector()
+        self.ws_probe = WebSocketProbe(port=self.gateway_port, token=self.gateway_token)
+        self.ws_failures = 0
+        self.max_ws_failures = 3
+        self.last_issues = []
+        # Roughly the "tail -50" of watchdog.sh on the first check, new lines after that
+        self.error_tailer = LogTailer(lambda: self.gateway_log, error_pattern=GATEWAY_ERROR_PATTERN,
+                                      initial_backlog=8192)
+        self._errors_seen = 0
+        self.supervisor = GatewaySupervisor(gateway_command(self.gateway_port, self.gateway_token),
+                                            self.openclaw_dir, self.gateway_log,
+                                            on_lines=self.error_tailer.feed,
+                                            on_exit=self.gateway_exited) if supervise else None
+        self.log_watcher = LogWatcher(lambda: (daily_log_path(self.openclaw_config_dir), self.gateway_log),
+                                      threshold=stale_threshold).start()
+        self.session_tracker = SessionTracker(lambda: daily_log_path(self.openclaw_config_dir),
+                                              threshold=stuck_threshold)
+        self.history = HistoryStore(self.openclaw_config_dir / "history").start()
+        self.rtt_histogram = Histogram(RTT_BUCKETS)
+        self.restart_counts = {}
+        self.metrics_exporter = MetricsExporter(self.collect_metrics, port=metrics_port) if metrics_port else None
+        probes = {
+            "gateway": lambda: self.process_table.find("openclaw-gateway"),
+            "port": lambda: self.port_prober.probe([self.gateway_port]),
+            "ws": lambda: self.ws_probe.probe(),
+            "tui": lambda: self.process_table.find("openclaw.*tui"),
+            "connections": lambda: self.connection_inspector.inspect([self.gateway_port]),
+            "log_age": self.log_watcher.age,
+            "errors": self.new_errors,
+            "sessions": self.stuck_sessions,
+        }
+        self.git_status = self.usage = self.usage_extractor = None
+        self.usage_counters = {}
+        if self.metrics_exporter:
+            # Only exported, never checked: skipped when nobody scrapes the metrics
+            self.git_status = GitStatusReader(self.openclaw_dir)
+            # Its own totals file: the read positions must not be shared with the GUI
+            self.usage = UsageAccumulator(Path(usage_file) if usage_file
+                                          else self.openclaw_config_dir / "logs" / "monitor-headless-usage.json")
+            self.usage.load()
+            self.usage.start()
+            self.usage_extractor = UsageExtractor(self.usage, {
+                "daily_log": lambda: daily_log_path(self.openclaw_config_dir),
+                "gateway_log": lambda: self.gateway_log,
+            })
+            self.usage_extractor.listeners.append(self.record_usage)
+            probes["git"] = self.git_status.status
+            probes["usage"] = self.usage_extractor.poll
+        self.engine = ProbeEngine(probes)
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self.restarter = RestartOrchestrator(self.gateway_pids, self.launch_gateway, self.gateway_ready,
+                                             stop_event=self._stop)
+        self.last_status = None
+        self._saved_state = None
+        self._load_state()
+
+    def _state(self):
+        return {"policy": self.policy.to_dict(), "restarts": dict(self.restart_counts),
+                "last_status": self.last_status}
+
+    def _read_state(self):
+        try:
+            with open(self.state_file, "r") as f:
+                state = json.load(f)
+            policy = RestartPolicy()
+            policy.restore(state.get("policy", {}))
+            return {"policy": policy.to_dict(),
+                    "restarts": {k: int(v) for k, v in state.get("restarts", {}).items()},
+                    "last_status": state.get("last_status")}
+        except (OSError, ValueError, TypeError, AttributeError):
+            return None
+
+    def _load_state(self):
+        state = self._read_state()
+        if state is None:
+            return
+        self.policy.restore(state["policy"])
+        self.restart_counts.update(state["restarts"])
+        self.last_status = state["last_status"]
+        self._saved_state = self._state()
+
+    def _merge_state(self):
+        """Fold in what another process wrote since our last load or save.
+
+        Runs from cron and a daemon share the file: restarts recorded by
+        one count against the budget of the other too.
+        """
+        disk = self._read_state()
+        if disk is None or disk == self._saved_state:
+            return
+        saved = self._saved_state or {"policy": RestartPolicy().to_dict(), "restarts": {},
+                                      "last_status": None}
+        ours, theirs, before = self.policy.to_dict(), disk["policy"], saved["policy"]
+        if theirs["last_restart"] > before["last_restart"]:
+            # The other process restarted since: add our own restarts to its count
+            count = theirs["count"] + max(0, ours["count"] - before["count"])
+        else:
+            count = ours["count"]
+        self.policy.restore({"count": count,
+                             "last_restart": max(ours["last_restart"], theirs["last_restart"])})
+        for component in set(disk["restarts"]) | set(self.restart_counts):
+            self.restart_counts[component] = (disk["restarts"].get(component, 0)
+                                              + self.restart_counts.get(component, 0)
+                                              - saved["restarts"].get(component, 0))
+        if self.last_status == saved["last_status"]:
+            self.last_status = disk["last_status"]
+        self._saved_state = disk
+
+    def _save_state(self):
+        """Write the state if it changed (not on every check)"""
+        self._merge_state()
+        state = self._state()
+        if state == self._saved_state:
+            return
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.state_file.with_name(self.state_file.name + ".tmp")
+            with open(tmp, "w") as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp, self.state_file)
+            self._saved_state = state
+        except OSError:
+            pass
+
+    def log(self, message):
+        line = f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}"
+        print(line, flush=True)
+        try:
+            self.log_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.log_file, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError:
+            pass
+
+    def new_errors(self):
+        """Critical lines appended to the gateway log since the last check"""
+        if not self.supervisor:
+            # A supervised gateway's lines are fed in as they are read
+            self.error_tailer.poll()
+        total = self.error_tailer.error_total
+        count, self._errors_seen = total - self._errors_seen, total
+        return self.error_tailer.recent_errors(count)
+
+    def stuck_sessions(self):
+        """Sessions processing for longer than the threshold, longest first"""
+        # Sessions of a gateway that crashed or was restarted elsewhere never end
+        procs = (self.process_table.find("openclaw-gateway")
+                 + self.process_table.find(gateway_node_pattern(self.gateway_port)))
+        started = [p.start_time for p in procs if p.start_time is not None]
+        if started or not procs:
+            self.session_tracker.gateway_started(min(started) if started else math.inf)
+        self.session_tracker.poll()
+        return self.session_tracker.stuck()
+
+    def record_usage(self, batch):
+        """Add one ingested usage batch to the per-model totals since start"""
+        for model, (tokens, cost, _) in batch.items():
+            total = self.usage_counters.get(model, (0, 0.0))
+            self.usage_counters[model] = (total[0] + tokens, total[1] + cost)
+
+    def gateway_exited(self, code):
+        """Called by the supervisor thread as soon as the gateway exits on its own"""
+        self.log(f"💥 Gateway exited with code {code}")
+        self._wakeup.set()
+
+    def check(self):
+        """Run one health check; return (status, issues, snapshot).
+
+        status is "OK", "WARNING" or "CRITICAL". A probe that timed out is
+        only a warning, so a slow process table never triggers a restart.
+        """
+        snapshot = self.engine.run()
+        values, errors = snapshot.values, snapshot.errors
+        status, issues = "OK", []
+        rtt = (values.get("port") or {}).get(self.gateway_port)
+        if rtt is not None:
+            self.rtt_histogram.observe(rtt / 1000)
+
+        def warn(issue):
+            nonlocal status
+            issues.append(issue)
+            if status != "CRITICAL":
+                status = "WARNING"
+
+        for key in errors:
+            if key not in self.export_probes:
+                warn(f"{key} probe failed: {errors[key]}")
+        if self.supervisor and self.supervisor.exit_code is not None:
+            issues.append(f"gateway exited with code {self.supervisor.exit_code}")
+            status = "CRITICAL"
+        elif "gateway" not in errors and not values.get("gateway"):
+            issues.append("gateway process not found")
+            status = "CRITICAL"
+        if "port" not in errors and rtt is None:
+            issues.append(f"port {self.gateway_port} not responding")
+            status = "CRITICAL"
+        elif rtt is not None:
+            # Port open but no pong: the gateway's event loop may be hung. Only a
+            # gateway that completed the handshake before can be judged this way.
+            if values.get("ws") is None and self.ws_probe.connected_once and not self.ws_probe.rejected:
+                self.ws_failures += 1
+                if self.ws_failures >= self.max_ws_failures:
+                    issues.append(f"no WebSocket pong in {self.ws_failures} checks ({self.ws_probe.last_error})")
+                    status = "CRITICAL"
+                else:
+                    warn(f"no WebSocket pong ({self.ws_probe.last_error})")
+            else:
+                self.ws_failures = 0
+        if not self.log_watcher.fresh:
+            warn(f"logs stale (>{self.stale_threshold // 60:.0f} min)")
+        if values.get("errors"):
+            warn(f"errors in gateway log: {values['errors'][-1][:100]}")
+        stuck = values.get("sessions")
+        if stuck:
+            session_id, seconds = stuck[0]
+            more = f" (+{len(stuck) - 1} more)" if len(stuck) > 1 else ""
+            warn(f"session {session_id} stuck for {seconds:.0f}s{more}")
+        connections = (values.get("connections") or {}).get(self.gateway_port)
+        if values.get("tui") and connections is not None and not connections.count:
+            warn("TUI running but not connected")
+        return status, issues, snapshot
+
+    def tick(self):
+        """Check once and act on the result; return the status"""
+        # Restarts done by another run (cron or the daemon) count too
+        self._merge_state()
+        status, issues, snapshot = self.check()
+        self.last_issues = issues
+        if status == "OK":
+            self.policy.healthy()
+        elif status == "WARNING":
+            self.log(f"⚠️  Warning: {'; '.join(issues)}")
+        else:
+            self.log(f"🚨 Critical: {'; '.join(issues)}")
+            if self.restart_gateway() and snapshot.values.get("tui"):
+                self.recover_tui()
+        self.last_status = status
+        self._save_state()
+        return status
+
+    def recover_tui(self):
+        """Called after a gateway restart while a TUI was running"""
+        # A TUI needs a terminal, which a headless host does not have
+        self.log("🖥️  TUI is running - restart it in its terminal to reconnect")
+
+    def gateway_pids(self):
+        pids = gateway_pids(self.process_table, self.gateway_port)
+        if self.supervisor and self.supervisor.running:
+            pids.add(self.supervisor.pid)
+        return pids
+
+    def gateway_ready(self):
+        return self.port_prober.probe([self.gateway_port])[self.gateway_port] is not None
+
+    def launch_gateway(self):
+        if self.supervisor:
+            self.supervisor.start()
+        else:
+            launch_gateway(self.openclaw_dir, self.gateway_port, self.gateway_token, self.gateway_log)
+
+    def restart_gateway(self, manual=False):
+        """Restart the gateway unless the restart budget is exhausted; return success
+
+        A `manual` restart (asked for by the user) ignores the budget and does
+        not count against it.
+        """
+        now = time.time()
+        remaining = 0 if manual else self.policy.cooldown_remaining(now)
+        if remaining > 0:
+            self.log(f"⏳ Cooldown active - {remaining:.0f}s left (too many restarts)")
+            return False
+
+        self.log("🔄 Restarting gateway...")
+        self.ws_failures = 0
+        if self.supervisor:
+            # Our own child first, so that its exit is not taken for a crash
+            self.supervisor.stop(self.restarter.stop_timeout)
+        result = self.restarter.restart()
+        if not manual:
+            self.policy.record(now)
+        self.session_tracker.reset()
+        self.history.append("restarts.gateway", 1)
+        self.restart_counts["gateway"] = self.restart_counts.get("gateway", 0) + 1
+        stopped = f"stopped in {result.stop_seconds:.1f}s{' (SIGKILL)' if result.killed else ''}"
+        if result.ok:
+            self.history.append("restarts.gateway.ready", result.ready_seconds)
+            self.log(f"✅ Gateway restarted (PID: {result.pid}, {stopped}, "
+                     f"ready in {result.ready_seconds:.1f}s)")
+        else:
+            self.log(f"❌ Gateway restart failed: {result.error} ({stopped})")
+        return result.ok
+
+    def collect_metrics(self):
+        snapshot = self.engine.snapshot
+        git = snapshot.values.get("git") or {}
+        return collect_metrics(snapshot, self.gateway_port, self.rtt_histogram,
+                               log_age=snapshot.values.get("log_age"),
+                               error_counts=dict(self.error_tailer.error_counts),
+                               restarts=dict(self.restart_counts),
+                               commits_behind=git.get("commits_behind"),
+                               usage=dict(self.usage_counters),
+                               connections=snapshot.values.get("connections"),
+                               sessions=self.session_tracker)
+
+    def stop(self, *_):
+        self._stop.set()
+        self._wakeup.set()
+
+    def run(self):
+        """Check every `interval` seconds until SIGTERM/SIGINT"""
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, self.stop)
+        self.log(f"🐕 {self.name} started (PID: {os.getpid()}, interval: {self.interval}s)")
+        if self.metrics_exporter:
+            try:
+                self.metrics_exporter.start()
+                self.log(f"📈 Metrics on http://{self.metrics_exporter.host}:{self.metrics_exporter.port}/metrics")
+            except OSError as e:
+                self.log(f"❌ Metrics exporter could not start: {e}")
+        if self.supervisor:
+            # Take over a gateway started elsewhere, so that this process owns it
+            self.log("🧷 Supervising the gateway")
+            self.restart_gateway(manual=True)
+        last_check = None
+        while not self._stop.is_set():
+            now = time.time()
+            if last_check is not None and now - last_check > self.wake_threshold:
+                self.log(f"😴→🌅 Wake detected ({now - last_check:.0f}s since last check)")
+                self.log_watcher.poke()
+                # Give the network a moment to come back
+                if self._stop.wait(3):
+                    break
+            last_check = time.time()
+            try:
+                self.tick()
+            except Exception as e:
+                self.log(f"❌ Check failed: {e}")
+            # Set by stop() and by the supervisor when the gateway exits
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+        self.log(f"🛑 {self.name} stopped")
+        self.close()
+
+    def close(self):
+        if self.supervisor:
+            self.supervisor.close(self.restarter.stop_timeout)
+        if self.metrics_exporter:
+            self.metrics_exporter.close()
+        self.ws_probe.close()
+        self.log_watcher.close()
+        self.engine.shutdown()
+        self.port_prober.close()
+        self.history.close()
+        if self.usage:
+            self.usage.close()
+
+# === WATCHDOG ENGINE ===
+
+WATCHDOG_COMMANDS = ("start", "stop", "status", "check", "daemon",
+                     "restart-gateway", "restart-tui", "restart-all")
+
+
+class WatchdogEngine(HeadlessMonitor):
+    """watchdog.sh in Python: the same commands, checks and restart budget.
+
+    The daemon runs the in-process probes of HeadlessMonitor instead of
+    forking pgrep, nc, lsof, tail, grep and date on every check. The
+    restart budget and the last status are kept in its own state file, so
+    a `check` run from cron, or a restarted daemon, continues where the
+    last one stopped. Manual restarts (restart-*) bypass the budget.
+    """
+
+    name = "Watchdog"
+
+    def __init__(self, interval=30, **kwargs):
+        config_dir = Path.home() / ".openclaw"
+        log_dir = config_dir / "logs"
+        kwargs.setdefault("log_file", log_dir / "watchdog.log")
+        kwargs.setdefault("state_file", log_dir / "watchdog-state.json")
+        kwargs.setdefault("usage_file", log_dir / "watchdog-usage.json")
+        super().__init__(interval=interval, **kwargs)
+        self.pid_file = log_dir / "watchdog.pid"
+
+    def tick(self):
+        status = super().tick()
+        if any(issue.startswith("TUI running but not connected") for issue in self.last_issues):
+            self.notify("TUI disconnected - restart it manually")
+        return status
+
+    # --- TUI ---
+
+    def notify(self, message):
+        """Desktop notification (macOS only, like watchdog.sh)"""
+        if sys.platform == "darwin":
+            script = f'display notification "{message}" with title "OpenClaw Monitor"'
+            try:
+                subprocess.Popen(["osascript", "-e", script], stdout=subprocess.DEVNULL,
+                                 stderr=subprocess.DEVNULL)
+            except OSError:
+                pass
+
+    def launch_tui(self):
+        """Open the TUI in a new terminal window; return False if there is none to open"""
+        command = f"cd {shlex.quote(str(self.openclaw_dir))} && pnpm openclaw tui"
+        if sys.platform == "darwin":
+            escaped = command.replace("\\", "\\\\").replace('"', '\\"')
+            args = ["osascript", "-e", f'tell application "Terminal" to do script "{escaped}"',
+                    "-e", 'tell application "Terminal" to activate']
+        elif os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"):
+            terminals = (("gnome-terminal", "--"), ("konsole", "-e"),
+                         ("xfce4-terminal", "-x"), ("xterm", "-e"))
+            found = next(((shutil.which(t), flag) for t, flag in terminals if shutil.which(t)), None)
+            if not found:
+                return False
+            args = [found[0], found[1], "bash", "-c", command]
+        else:
+            return False
+        try:
+            subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                             stderr=subprocess.DEVNULL, start_new_session=True)
+        except OSError:
+            return False
+        return True
+
+    def restart_tui(self):
+        """Kill and relaunch the TUI in a terminal; return success"""
+        self.log("🖥️  Restarting TUI...")
+
+        def tui_pids():
+            return {p.pid for p in self.process_table.scan()["openclaw.*tui"]}
+
+        self.restarter.stop(tui_pids(), tui_pids)
+        # Poll for the new process instead of a fixed wait
+        if self.launch_tui() and self.restarter.wait_for(tui_pids, 8) is not None:
+            self.log(f"✅ TUI restarted (PID: {', '.join(map(str, sorted(tui_pids())))})")
+            return True
+        self.log(f"❌ TUI restart failed - start it manually: cd {self.openclaw_dir} && pnpm openclaw tui")
+        return False
+
+    def recover_tui(self):
+        self.restart_tui()
+
+    # --- daemon ---
+
+    def daemon_pid(self):
+        """PID of the running watchdog daemon, or None (a stale PID file is removed)"""
+        try:
+            pid = int(self.pid_file.read_text().strip())
+        except (OSError, ValueError):
+            return None
+        try:
+            os.kill(pid, 0)
+        except PermissionError:
+            # Runs, as another user
+            return pid
+        except OSError:
+            try:
+                self.pid_file.unlink()
+            except OSError:
+                pass
+            return None
+        return pid
+
+    def daemon(self):
+        """Run in the foreground, owning the PID file; return the exit code"""
+        pid = self.daemon_pid()
+        if pid:
+            print(f"Watchdog already running (PID: {pid})")
+            return 1
+        self.pid_file.parent.mkdir(parents=True, exist_ok=True)
+        self.pid_file.write_text(str(os.getpid()))
+        try:
+            self.run()
+        finally:
+            try:
+                if self.pid_file.read_text().strip() == str(os.getpid()):
+                    self.pid_file.unlink()
+            except OSError:
+                pass
+        return 0
+
+    def start_daemon(self):
+        """Start the daemon detached from this process"""
+        pid = self.daemon_pid()
+        if pid:
+            print(f"Watchdog already running (PID: {pid})")
+            return 1
+        print("Starting watchdog in background...")
+        self.log_file.parent.mkdir(parents=True, exist_ok=True)
+        args = [sys.executable, str(Path(__file__).resolve()), "--watchdog", "daemon",
+                "--interval", str(self.interval)]
+        if self.metrics_exporter:
+            args += ["--metrics-port", str(self.metrics_exporter.port)]
+        if self.supervisor:
+            args.append("--supervise")
+        with open(self.log_file, "ab") as log:
+            subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=log,
+                             start_new_session=True)
+        # Wait for the PID file instead of a fixed sleep
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and not self.daemon_pid():
+            time.sleep(0.05)
+        self.print_status()
+        return 0
+
+    def stop_daemon(self):
+        try:
+            pid = int(self.pid_file.read_text().strip())
+        except (OSError, ValueError):
+            print("Watchdog is not running")
+            return 0
+        try:
+            os.kill(pid, signal.SIGTERM)
+            print(f"Watchdog stopped (was PID: {pid})")
+        except OSError:
+            print("Watchdog was not running (stale PID file removed)")
+        try:
+            self.pid_file.unlink()
+        except OSError:
+            pass
+        return 0
+
+    def print_status(self):
+        print("=== OpenClaw Watchdog Status ===")
+        print()
+        pid = self.daemon_pid()
+        print(f"Watchdog:  🟢 Running (PID: {pid})" if pid else "Watchdog:  🔴 Not running")
+        matches = self.process_table.scan()
+        gateway, tui = matches["openclaw-gateway"], matches["openclaw.*tui"]
+        print(f"Gateway:   🟢 Running (PID: {gateway[0].pid})" if gateway else "Gateway:   🔴 Not running")
+        if self.port_prober.probe([self.gateway_port])[self.gateway_port] is not None:
+            print(f"Port:      🟢 {self.gateway_port} responding")
+        else:
+            print(f"Port:      🔴 {self.gateway_port} not responding")
+        print("Logs:      🟢 Fresh" if self.log_watcher.fresh else "Logs:      🟡 Stale (>5 min)")
+        print("Errors:    🟡 Found in logs" if self.new_errors() else "Errors:    🟢 None recent")
+        stuck = self.stuck_sessions()
+        tracker = self.session_tracker
+        timing = ""
+        if tracker.percentile(50) is not None:
+            timing = f", p50 {tracker.percentile(50):.1f}s / p95 {tracker.percentile(95):.1f}s"
+        if stuck:
+            print(f"Sessions:  🟡 {len(stuck)} stuck (longest {stuck[0][1]:.0f}s){timing}")
+        else:
+            print(f"Sessions:  🟢 {tracker.processing()} processing{timing}")
+        if tui:
+            connected = self.connection_inspector.inspect([self.gateway_port])[self.gateway_port].count
+            state = "connected" if connected else "disconnected"
+            print(f"TUI:       {'🟢' if connected else '🟡'} Running (PID: {tui[0].pid}, {state})")
+        else:
+            print("TUI:       ⚪ Not running")
+        remaining = self.policy.cooldown_remaining()
+        budget = f"{self.policy.count}/{self.policy.max_attempts} restarts used"
+        print(f"Restarts:  {budget}" + (f", cooldown {remaining:.0f}s" if remaining else ""))
+        if self.last_status:
+            print(f"Last check: {self.last_status}")
+        print()
+        print(f"Log: {self.log_file}")
+
+    def command(self, name):
+        """Run one watchdog.sh command; return the exit code"""
+        if name == "daemon":
+            return self.daemon()
+        if name == "start":
+            return self.start_daemon()
+        if name == "stop":
+            return self.stop_daemon()
+        if name == "status":
+            self.print_status()
+            return 0
+        if name == "check":
+            print(f"Health: {self.tick()}")
+            return 0
+        if name == "restart-gateway":
+            return 0 if self.restart_gateway(manual=True) else 1
+        if name == "restart-tui":
+            return 0 if self.restart_tui() else 1
+        if name == "restart-all":
+            print("Restarting Gateway and TUI...")
+            ok = self.restart_gateway(manual=True)
+            return 0 if self.restart_tui() and ok else 1
+        raise ValueError(f"unknown watchdog command: {name}")
+
+# === SPARKLINE ===
+
+class Sparkline:
+    """Small scrolling line chart on a Tk Canvas.
+
+    push() shifts the existing segments left with a single canvas.move and
+    adds one segment for the new sample; the segment that scrolls off is
+    deleted. Rescaling is a single canvas.scale, so the cost of an update
+    does not depend on how long the window has been open. NaN or None
+    samples leave a gap.
+    """
+
+    def __init__(self, parent, width=80, height=18, step=2, color="#007acc", bg="#1e1e1e"):
+        self.canvas = tk.Canvas(parent, width=width, height=height, bg=bg,
+                                highlightthickness=0, borderwidth=0)
+        self.width = width
+        self.height = height
+        self.step = step
+        self.color = color
+        self.capacity = width // step + 1
+        self.values = deque()
+        self.segments = deque()
+        self.scale = None
+        self._bottom = height - 2
+        self._span = height - 4
+
+    def _y(self, value):
+        return self._bottom - value / self.scale * self._span
+
+    def _fit(self):
+        """Rescale when the window maximum leaves the current range"""
+        finite = [v for v in self.values if v == v]
+        high = max(finite) if finite else 0.0
+        if self.scale is not None and self.scale / 4 <= high <= self.scale:
+            return
+        scale = high * 1.25 if high > 0 else 1.0
+        if self.scale is not None and scale != self.scale:
+            self.canvas.scale("segment", 0, self._bottom, 1, self.scale / scale)
+        self.scale = scale
+
+    def _segment(self, x, previous, value):
+        if previous == previous and value == value:
+            return self.canvas.create_line(x - self.step, self._y(previous), x, self._y(value),
+                                           fill=self.color, width=1, tags="segment")
+        return None
+
+    def push(self, value):
+        value = math.nan if value is None else float(value)
+        if len(self.values) == self.capacity:
+            self.values.popleft()
+            item = self.segments.popleft()
+            if item is not None:
+                self.canvas.delete(item)
+        previous = self.values[-1] if self.values else None
+        self.values.append(value)
+        self._fit()
+        if previous is not None:
+            self.canvas.move("segment", -self.step, 0)
+            self.segments.append(self._segment(self.width - 1, previous, value))
+
+    def set_last(self, value):
+        """Replace the newest sample in place (e.g. a still-running hourly total)"""
+        value = math.nan if value is None else float(value)
+        if len(self.values) < 2:
+            if self.values:
+                self.values[-1] = value
+            else:
+                self.push(value)
+            return
+        self.values[-1] = value
+        self._fit()
+        previous = self.values[-2]
+        item = self.segments[-1]
+        x = self.width - 1
+        if item is not None and previous == previous and value == value:
+            self.canvas.coords(item, x - self.step, self._y(previous), x, self._y(value))
+        else:
+            if item is not None:
+                self.canvas.delete(item)
+            self.segments[-1] = self._segment(x, previous, value)
+
+
+class OpenClawMonitor:
+    def __init__(self, metrics_port=None):
+        _import_tk()
         self.root = tk.Tk()
         self.root.title("OpenClaw Monitor")
         self.root.geometry("450x500")
@@ -557,26 +4226,74 @@ class OpenClawMonitor:
         self.running = True
         self.watchdog_auto = tk.BooleanVar(value=False)
         self.advanced_expanded = tk.BooleanVar(value=False)
+        # The advanced widgets are built on first expand (see build_advanced_section)
+        self.advanced_built = False
+        self._text_bindings = []
+        self.notify_gateway = tk.BooleanVar(value=True)
+        self.notify_cost = tk.BooleanVar(value=True)
+        self.notify_security = tk.BooleanVar(value=True)
+        self.ai_update_check = tk.BooleanVar(value=True)
         self.update_available = False
+        self.install_update_color = self.success_color
         self.last_update_check = None
         self.update_info = ""
 
         # Usage tracking
-        self.tokens_today = 0
-        self.cost_today = 0.0
-        self.usage_by_model = {}
+        self._usage_display_pending = False
+        self._usage_display_version = None
         self.current_model = tk.StringVar()
         self.current_lang = tk.StringVar(value="en")
+        # Resolved once per language switch instead of on every t() call
+        self.catalog = Catalog.for_language("en")
+        self.current_lang.trace_add("write", self._on_language_var)
+
+        # Event history: the ring buffer keeps everything, the widget only the tail
+        self.event_log = EventLog()
+        self.log_widget_max_lines = 500
+        self.log_trim_batch = 100
+        self._log_widget_lines = 0
+        self._log_title = None
+        self._log_search_job = None
+        self.log_search_var = tk.StringVar()
+        self.log_search_var.trace_add("write", self._on_log_search)
 
         # Cross-platform paths
         self.home_dir = Path.home()
         self.openclaw_config_dir = self.home_dir / ".openclaw"
         self.openclaw_dir = self._find_openclaw_dir()
         self.config_file = self.openclaw_config_dir / "openclaw.json"
-        self.watchdog_script = self.openclaw_config_dir / "scripts" / "watchdog.sh"
+        # The Python watchdog engine of this file (same commands as watchdog.sh)
+        self.watchdog_command = " ".join(shlex.quote(arg) for arg in
+                                         (sys.executable, str(Path(__file__).resolve()), "--watchdog"))
         self.update_check_file = self.openclaw_config_dir / "last-update-check.json"
         self.monitor_config_file = self.openclaw_config_dir / "monitor-config.json"
 
+        # Usage totals, flushed to disk at a bounded rate
+        self.usage = UsageAccumulator(self.openclaw_config_dir / "usage-stats.json")
+        self.gateway_log = Path("/tmp/openclaw-gateway.log")
+
+        # Long-term samples for graphs and trends
+        self.history = HistoryStore(self.openclaw_config_dir / "history").start()
+        # Written by the probe worker and the usage extractor threads
+        self._history_lock = threading.Lock()
+        self._history_log_bytes = None
+        self._cost_hour = (0.0, 0.0)
+        self._cost_spark_hour = None
+
+        # Counters for the optional /metrics endpoint (port from --metrics-port or monitor-config.json)
+        self.metrics_port = metrics_port
+        self.config_metrics_port = None
+        self.metrics_exporter = None
+        self.rtt_histogram = Histogram(RTT_BUCKETS)
+        self.restart_counts = {}
+        self.usage_counters = {}
+        self.commits_behind = None
+
+        # Status rows with a sparkline, and the history series they plot
+        self.sparkline_series = {"gateway": "gateway.rss", "port": "port.rtt",
+                                 "tui": "port.connections", "logs": "log.rate"}
+        self.sparklines = {}
+
         # Available models
         self.available_models = [
             ("anthropic/claude-opus-4-5", "Claude Opus 4.5 (Best)"),
@@ -588,44 +4305,95 @@ class OpenClawMonitor:
             ("openai/gpt-4o-mini", "GPT-4o Mini (OpenAI)"),
         ]
 
+        # One process table pass per tick serves every process check
+        self.process_table = ProcessTable(["watchdog", "openclaw-gateway", "openclaw.*tui", "openclaw"])
+
+        # Git state of the OpenClaw checkout
+        self.git_status = GitStatusReader(self.openclaw_dir)
+        self.fetch_scheduler = FetchScheduler(self.openclaw_dir,
+                                              self.openclaw_config_dir / "fetch-state.json")
+
+        # Incoming changes are scanned in one streamed diff; results are cached per commit pair
+        self.diff_scanner = DiffScanner()
+        self.scan_cache = ScanCache(self.openclaw_config_dir / "scan-cache")
+
+        # Daily log, read incrementally
+        self.log_tailer = LogTailer(self.daily_log_path)
+        # Started with the monitoring thread; flips re-run the "logs" probe at once
+        self.log_watcher = LogWatcher(lambda: (self.daily_log_path(), self.gateway_log),
+                                      on_change=lambda fresh: self.scheduler.wake(["logs"]))
+
+        # Gateway port(s); the first one is shown in the status panel
+        self.gateway_port = 18789
+        self.gateway_token = ""
+        self.port_prober = PortProber()
+        self.connection_inspector = ConnectionInspector()
+
+        # Restarts wait for process exit and port readiness instead of sleeping
+        self.restarter = RestartOrchestrator(
+            lambda: gateway_pids(self.process_table, self.gateway_port),
+            self.launch_gateway,
+            lambda: self.check_port(self.gateway_port))
+
+        # Status probes run concurrently off the UI thread
+        self.probe_engine = ProbeEngine({
+            "watchdog": lambda: self.find_processes("watchdog"),
+            "gateway": lambda: self.find_processes("openclaw-gateway"),
+            "port": lambda: self.port_prober.probe(self.gateway_ports),
+            "ws": lambda: self.ws_probe.probe(),
+            "tui": self.probe_tui,
+            "logs": self.check_logs_fresh,
+            "version": self.get_current_version,
+            "usage": lambda: self.usage_extractor.poll(),
+            "auto_update": self.should_auto_check_updates,
+        }, timeouts={"tui": 5.0})
+
+        # Each probe runs on its own interval (seconds); expensive ones back off
+        # up to their maximum while healthy. Minimizing the window slows all down.
+        self.scheduler = ProbeScheduler(
+            {"port": 2, "ws": 5, "watchdog": 5, "gateway": 5, "tui": 5, "logs": 5, "usage": 5,
+             "version": 60, "auto_update": 600},
+            max_intervals={"ws": 15, "watchdog": 15, "gateway": 15, "tui": 30, "logs": 30, "version": 600})
+        self.minimized_slowdown = 4.0
+        self.probe_health = {
+            "gateway": bool,
+            "port": lambda ports: all(rtt is not None for rtt in ports.values()),
+            "ws": lambda rtt: rtt is not None,
+            "tui": lambda state: state != "disconnected",
+            "logs": bool,
+        }
+        self._displayed_status = {}
+
         # Load configs
         self.load_monitor_config()
         self.load_config()
+        self.gateway_ports = [self.gateway_port]
+        self.ws_probe = WebSocketProbe(port=self.gateway_port, token=self.gateway_token)
 
         self.setup_ui()
-        self.initialize_advanced_visibility()
+        self.seed_sparklines()
         self.load_usage_stats()
+        self.initialize_advanced_visibility()
+        self.usage_extractor = UsageExtractor(self.usage, {
+            "daily_log": self.daily_log_path,
+            "gateway_log": lambda: self.gateway_log,
+        })
+        self.usage_extractor.listeners.append(self.record_usage_history)
+        self.usage.start()
         self.update_usage_display()
+        self.start_metrics_exporter()
         self.start_monitoring()
 
     def t(self, key):
         """Get translation for current language"""
-        lang = self.current_lang.get()
-        return TRANSLATIONS.get(lang, TRANSLATIONS["en"]).get(key, key)
+        return self.catalog[key]
+
+    def _on_language_var(self, *args):
+        self.catalog = Catalog.for_language(self.current_lang.get())
 
     def _find_openclaw_dir(self):
         """Find the OpenClaw installation directory"""
-        # Common locations to check
-        possible_paths = [
-            self.home_dir / "clawdbot",
-            self.home_dir / "openclaw",
-            self.home_dir / "OpenClaw",
-            Path("/opt/openclaw"),
-            Path("/usr/local/openclaw"),
-        ]
-
-        # Check environment variable first
-        env_path = os.environ.get("OPENCLAW_DIR")
-        if env_path:
-            return Path(env_path)
-
-        # Check common locations
-        for path in possible_paths:
-            if path.exists() and (path / "package.json").exists():
-                return path
-
-        # Default fallback
-        return self.home_dir / "clawdbot"
+        return find_openclaw_dir(self.home_dir)
 
     def load_monitor_config(self):
         """Load monitor-specific configuration (language, etc.)"""
@@ -635,6 +4403,7 @@ class OpenClawMonitor:
                     config = json.load(f)
                     self.current_lang.set(config.get("language", "en"))
                     self.advanced_expanded.set(config.get("advanced_expanded", False))
+                    self.config_metrics_port = config.get("metrics_port")
             else:
                 # Try to detect system language
                 import locale
@@ -651,11 +4420,14 @@ class OpenClawMonitor:
         """Save monitor-specific configuration"""
         try:
             self.monitor_config_file.parent.mkdir(parents=True, exist_ok=True)
+            config = {
+                "language": self.current_lang.get(),
+                "advanced_expanded": self.advanced_expanded.get()
+            }
+            if self.config_metrics_port:
+                config["metrics_port"] = self.config_metrics_port
             with open(self.monitor_config_file, 'w') as f:
-                json.dump({
-                    "language": self.current_lang.get(),
-                    "advanced_expanded": self.advanced_expanded.get()
-                }, f, indent=2)
+                json.dump(config, f, indent=2)
         except Exception:
             pass
 
@@ -671,6 +4443,8 @@ class OpenClawMonitor:
                         self.current_model.set(model.get("primary", "anthropic/claude-opus-4-5"))
                     else:
                         self.current_model.set(model or "anthropic/claude-opus-4-5")
+                    self.gateway_port = int(self.config.get("gateway", {}).get("port", 18789))
+                    self.gateway_token = self.config.get("gateway", {}).get("auth", {}).get("token", "")
             else:
                 self.config = {}
                 self.current_model.set("anthropic/claude-opus-4-5")
@@ -727,15 +4501,15 @@ class OpenClawMonitor:
         lang_row.pack(pady=(0, 10))
 
         self.platform_label = tk.Label(lang_row,
-                                       text=f"{self.t('platform')}: {self.platform.capitalize()}",
                                        font=("Helvetica", 9),
                                        bg=self.bg_color, fg=self.neutral_color)
         self.platform_label.pack(side=tk.LEFT, padx=(0, 20))
+        self.bind_text(self.platform_label, f"{{platform}}: {self.platform.capitalize()}")
 
-        self.lang_label = tk.Label(lang_row, text=f"{self.t('language')}:",
-                                   font=("Helvetica", 9),
+        self.lang_label = tk.Label(lang_row, font=("Helvetica", 9),
                                    bg=self.bg_color, fg=self.neutral_color)
         self.lang_label.pack(side=tk.LEFT)
+        self.bind_text(self.lang_label, "{language}:")
 
         # Language dropdown
         lang_names = list(LANGUAGE_NAMES.values())
@@ -755,11 +4529,11 @@ class OpenClawMonitor:
         self.lang_combo.bind("<<ComboboxSelected>>", self.on_language_change)
 
         # Status Section
-        self.status_frame = tk.LabelFrame(self.main_frame, text=f" {self.t('status')} ",
-                                          font=("Helvetica", 12, "bold"),
+        self.status_frame = tk.LabelFrame(self.main_frame, font=("Helvetica", 12, "bold"),
                                           bg=self.bg_color, fg=self.fg_color,
                                           padx=10, pady=10)
         self.status_frame.pack(fill=tk.X, pady=(0, 10))
+        self.bind_text(self.status_frame, " {status} ")
 
         # Status indicators
         self.status_labels = {}
@@ -773,14 +4547,20 @@ class OpenClawMonitor:
                                  bg=self.bg_color, fg=self.neutral_color)
             indicator.pack(side=tk.LEFT)
 
-            name = tk.Label(row, text=f"  {self.t(key)}", font=("Helvetica", 11),
+            name = tk.Label(row, font=("Helvetica", 11),
                             bg=self.bg_color, fg=self.fg_color, anchor="w")
             name.pack(side=tk.LEFT)
+            self.bind_text(name, f"  {{{key}}}")
 
             status_text = tk.Label(row, text="", font=("Helvetica", 9),
                                    bg=self.bg_color, fg=self.neutral_color, anchor="e")
             status_text.pack(side=tk.RIGHT)
 
+            if key in self.sparkline_series:
+                spark = Sparkline(row, color=self.accent_color, bg=self.bg_color)
+                spark.canvas.pack(side=tk.RIGHT, padx=(0, 8))
+                self.sparklines[key] = spark
+
             self.status_labels[key] = {"indicator": indicator, "name": name, "status": status_text}
 
         # Advanced Section Toggle Button
@@ -792,15 +4572,25 @@ class OpenClawMonitor:
                                     command=self.toggle_advanced_section)
         self.expand_btn.pack(fill=tk.X, pady=(0, 5))
 
+        # Last update label
+        self.update_label = tk.Label(self.main_frame, text="",
+                                     font=("Helvetica", 9),
+                                     bg=self.bg_color, fg=self.neutral_color)
+        self.update_label.pack(pady=(5, 0))
+
+    def build_advanced_section(self):
+        """Create the collapsible advanced widgets on first expand and sync them with current state"""
+        if self.advanced_built:
+            return
         # Advanced Container Frame (collapsible)
         self.advanced_container = tk.Frame(self.main_frame, bg=self.bg_color)
 
         # Model Selection Section
-        self.model_frame = tk.LabelFrame(self.advanced_container, text=f" {self.t('ai_model')} ",
-                                         font=("Helvetica", 12, "bold"),
+        self.model_frame = tk.LabelFrame(self.advanced_container, font=("Helvetica", 12, "bold"),
                                          bg=self.bg_color, fg=self.fg_color,
                                          padx=10, pady=10)
         self.model_frame.pack(fill=tk.X, pady=(0, 10))
+        self.bind_text(self.model_frame, " {ai_model} ")
 
         model_row = tk.Frame(self.model_frame, bg=self.bg_color)
         model_row.pack(fill=tk.X)
@@ -820,27 +4610,27 @@ class OpenClawMonitor:
         else:
             self.model_combo.current(0)
 
-        self.apply_model_btn = tk.Button(model_row, text=self.t("apply"),
-                                         font=("Helvetica", 10),
+        self.apply_model_btn = tk.Button(model_row, font=("Helvetica", 10),
                                          bg=self.accent_color, fg="#000000",
                                          relief=tk.FLAT, cursor="hand2",
                                          command=self.apply_model_change)
         self.apply_model_btn.pack(side=tk.RIGHT)
+        self.bind_text(self.apply_model_btn, "{apply}")
 
         # Watchdog Toggle Section
-        self.toggle_frame = tk.LabelFrame(self.advanced_container, text=f" {self.t('watchdog_auto')} ",
-                                          font=("Helvetica", 12, "bold"),
+        self.toggle_frame = tk.LabelFrame(self.advanced_container, font=("Helvetica", 12, "bold"),
                                           bg=self.bg_color, fg=self.fg_color,
                                           padx=10, pady=10)
         self.toggle_frame.pack(fill=tk.X, pady=(0, 10))
+        self.bind_text(self.toggle_frame, " {watchdog_auto} ")
 
         toggle_row = tk.Frame(self.toggle_frame, bg=self.bg_color)
         toggle_row.pack(fill=tk.X)
 
-        self.toggle_label = tk.Label(toggle_row, text=self.t("auto_monitoring"),
-                                     font=("Helvetica", 11),
+        self.toggle_label = tk.Label(toggle_row, font=("Helvetica", 11),
                                      bg=self.bg_color, fg=self.fg_color)
         self.toggle_label.pack(side=tk.LEFT)
+        self.bind_text(self.toggle_label, "{auto_monitoring}")
 
         self.toggle_btn = tk.Button(toggle_row, text=self.t("off"), width=6,
                                     font=("Helvetica", 10, "bold"),
@@ -850,11 +4640,11 @@ class OpenClawMonitor:
         self.toggle_btn.pack(side=tk.RIGHT)
 
         # Usage Stats Section
-        self.usage_frame = tk.LabelFrame(self.advanced_container, text=f" {self.t('usage_stats')} ",
-                                         font=("Helvetica", 12, "bold"),
+        self.usage_frame = tk.LabelFrame(self.advanced_container, font=("Helvetica", 12, "bold"),
                                          bg=self.bg_color, fg=self.fg_color,
                                          padx=10, pady=8)
         self.usage_frame.pack(fill=tk.X, pady=(0, 10))
+        self.bind_text(self.usage_frame, " {usage_stats} ")
 
         usage_row1 = tk.Frame(self.usage_frame, bg=self.bg_color)
         usage_row1.pack(fill=tk.X, pady=2)
@@ -869,6 +4659,10 @@ class OpenClawMonitor:
                                    bg=self.bg_color, fg=self.success_color)
         self.cost_label.pack(side=tk.RIGHT)
 
+        # Cost per hour, one point per hour
+        self.cost_sparkline = Sparkline(usage_row1, color=self.success_color, bg=self.bg_color)
+        self.cost_sparkline.canvas.pack(side=tk.RIGHT, padx=(0, 8))
+
         usage_row2 = tk.Frame(self.usage_frame, bg=self.bg_color)
         usage_row2.pack(fill=tk.X, pady=2)
 
@@ -877,165 +4671,176 @@ class OpenClawMonitor:
                                             bg=self.bg_color, fg=self.neutral_color)
         self.usage_details_label.pack(side=tk.LEFT)
 
-        self.reset_usage_btn = tk.Button(usage_row2, text=f"🔄 {self.t('reset')}",
-                                         font=("Helvetica", 9),
+        self.reset_usage_btn = tk.Button(usage_row2, font=("Helvetica", 9),
                                          bg=self.neutral_color, fg="#000000",
                                          relief=tk.FLAT, cursor="hand2",
                                          command=self.reset_usage_stats)
         self.reset_usage_btn.pack(side=tk.RIGHT)
+        self.bind_text(self.reset_usage_btn, "🔄 {reset}")
 
         # Manual Controls Section
-        self.controls_frame = tk.LabelFrame(self.advanced_container, text=f" {self.t('manual_control')} ",
-                                            font=("Helvetica", 12, "bold"),
+        self.controls_frame = tk.LabelFrame(self.advanced_container, font=("Helvetica", 12, "bold"),
                                             bg=self.bg_color, fg=self.fg_color,
                                             padx=10, pady=10)
         self.controls_frame.pack(fill=tk.X, pady=(0, 10))
+        self.bind_text(self.controls_frame, " {manual_control} ")
 
         btn_row = tk.Frame(self.controls_frame, bg=self.bg_color)
         btn_row.pack(fill=tk.X)
 
-        self.gateway_btn = tk.Button(btn_row, text=f"🔄 {self.t('restart_gateway')}",
-                                     font=("Helvetica", 10),
+        self.gateway_btn = tk.Button(btn_row, font=("Helvetica", 10),
                                      bg=self.accent_color, fg="#000000",
                                      relief=tk.FLAT, cursor="hand2", padx=10, pady=6,
                                      command=self.restart_gateway)
         self.gateway_btn.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(0, 3))
+        self.bind_text(self.gateway_btn, "🔄 {restart_gateway}")
 
-        self.tui_btn = tk.Button(btn_row, text=f"🖥️ {self.t('restart_tui')}",
-                                 font=("Helvetica", 10),
+        self.tui_btn = tk.Button(btn_row, font=("Helvetica", 10),
                                  bg=self.accent_color, fg="#000000",
                                  relief=tk.FLAT, cursor="hand2", padx=10, pady=6,
                                  command=self.restart_tui)
         self.tui_btn.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(3, 3))
+        self.bind_text(self.tui_btn, "🖥️ {restart_tui}")
 
-        self.restart_all_btn = tk.Button(btn_row, text=f"⚡ {self.t('restart_all')}",
-                                         font=("Helvetica", 10),
+        self.restart_all_btn = tk.Button(btn_row, font=("Helvetica", 10),
                                          bg=self.warning_color, fg="#000000",
                                          relief=tk.FLAT, cursor="hand2", padx=10, pady=6,
                                          command=self.restart_all)
         self.restart_all_btn.pack(side=tk.RIGHT, expand=True, fill=tk.X, padx=(3, 0))
+        self.bind_text(self.restart_all_btn, "⚡ {restart_all}")
 
         # Update Section
-        self.update_frame = tk.LabelFrame(self.advanced_container, text=f" {self.t('software_update')} ",
-                                          font=("Helvetica", 12, "bold"),
+        self.update_frame = tk.LabelFrame(self.advanced_container, font=("Helvetica", 12, "bold"),
                                           bg=self.bg_color, fg=self.fg_color,
                                           padx=10, pady=10)
         self.update_frame.pack(fill=tk.X, pady=(0, 10))
+        self.bind_text(self.update_frame, " {software_update} ")
 
         update_btn_row = tk.Frame(self.update_frame, bg=self.bg_color)
         update_btn_row.pack(fill=tk.X)
 
-        self.check_update_btn = tk.Button(update_btn_row, text=f"🔍 {self.t('check')}",
-                                          font=("Helvetica", 10),
+        self.check_update_btn = tk.Button(update_btn_row, font=("Helvetica", 10),
                                           bg=self.accent_color, fg="#000000",
                                           relief=tk.FLAT, cursor="hand2", padx=10, pady=6,
                                           command=self.check_updates)
         self.check_update_btn.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(0, 5))
+        self.bind_text(self.check_update_btn, "🔍 {check}")
 
-        self.ignore_update_btn = tk.Button(update_btn_row, text=f"🚫 {self.t('ignore')}",
-                                           font=("Helvetica", 10),
+        self.ignore_update_btn = tk.Button(update_btn_row, font=("Helvetica", 10),
                                            bg=self.neutral_color, fg="#000000",
                                            relief=tk.FLAT, cursor="hand2", padx=10, pady=6,
                                            command=self.ignore_update,
                                            state=tk.DISABLED)
         self.ignore_update_btn.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(5, 5))
+        self.bind_text(self.ignore_update_btn, "🚫 {ignore}")
 
-        self.install_update_btn = tk.Button(update_btn_row, text=f"⬇️ {self.t('install')}",
-                                            font=("Helvetica", 10),
+        self.install_update_btn = tk.Button(update_btn_row, font=("Helvetica", 10),
                                             bg=self.success_color, fg="#000000",
                                             relief=tk.FLAT, cursor="hand2", padx=10, pady=6,
                                             command=self.install_updates,
                                             state=tk.DISABLED)
         self.install_update_btn.pack(side=tk.RIGHT, expand=True, fill=tk.X, padx=(0, 0))
+        self.bind_text(self.install_update_btn, "⬇️ {install}")
 
         # Second row with recheck button
         update_btn_row2 = tk.Frame(self.update_frame, bg=self.bg_color)
         update_btn_row2.pack(fill=tk.X, pady=(5, 0))
 
-        self.recheck_btn = tk.Button(update_btn_row2, text=f"🤖 {self.t('recheck_ai')}",
-                                     font=("Helvetica", 10),
+        self.recheck_btn = tk.Button(update_btn_row2, font=("Helvetica", 10),
                                      bg=self.accent_color, fg="#000000",
                                      relief=tk.FLAT, cursor="hand2", padx=10, pady=6,
                                      command=self.recheck_with_ai,
                                      state=tk.DISABLED)
         self.recheck_btn.pack(side=tk.LEFT, expand=True, fill=tk.X)
+        self.bind_text(self.recheck_btn, "🤖 {recheck_ai}")
 
         # Notifications Section
-        self.notify_frame = tk.LabelFrame(self.advanced_container, text=f" {self.t('notifications')} ",
-                                          font=("Helvetica", 12, "bold"),
+        self.notify_frame = tk.LabelFrame(self.advanced_container, font=("Helvetica", 12, "bold"),
                                           bg=self.bg_color, fg=self.fg_color,
                                           padx=10, pady=5)
         self.notify_frame.pack(fill=tk.X, pady=(0, 10))
+        self.bind_text(self.notify_frame, " {notifications} ")
 
         notify_row = tk.Frame(self.notify_frame, bg=self.bg_color)
         notify_row.pack(fill=tk.X)
 
         # Checkboxes for notification types
-        self.notify_gateway = tk.BooleanVar(value=True)
-        self.notify_cost = tk.BooleanVar(value=True)
-        self.notify_security = tk.BooleanVar(value=True)
-        self.ai_update_check = tk.BooleanVar(value=True)
-
-        cb1 = tk.Checkbutton(notify_row, text=f"🔴 {self.t('gateway_down')}",
-                             variable=self.notify_gateway,
+        cb1 = tk.Checkbutton(notify_row, variable=self.notify_gateway,
                              bg=self.bg_color, fg=self.fg_color,
                              selectcolor=self.bg_color, activebackground=self.bg_color,
                              font=("Helvetica", 9))
         cb1.pack(side=tk.LEFT)
+        self.bind_text(cb1, "🔴 {gateway_down}")
 
-        cb2 = tk.Checkbutton(notify_row, text=f"💰 {self.t('high_cost')}",
-                             variable=self.notify_cost,
+        cb2 = tk.Checkbutton(notify_row, variable=self.notify_cost,
                              bg=self.bg_color, fg=self.fg_color,
                              selectcolor=self.bg_color, activebackground=self.bg_color,
                              font=("Helvetica", 9))
         cb2.pack(side=tk.LEFT, padx=(10, 0))
+        self.bind_text(cb2, "💰 {high_cost}")
 
-        cb3 = tk.Checkbutton(notify_row, text=f"🛡️ {self.t('security_alert')}",
-                             variable=self.notify_security,
+        cb3 = tk.Checkbutton(notify_row, variable=self.notify_security,
                              bg=self.bg_color, fg=self.fg_color,
                              selectcolor=self.bg_color, activebackground=self.bg_color,
                              font=("Helvetica", 9))
         cb3.pack(side=tk.LEFT, padx=(10, 0))
+        self.bind_text(cb3, "🛡️ {security_alert}")
 
         # Second row for AI check
         notify_row2 = tk.Frame(self.notify_frame, bg=self.bg_color)
         notify_row2.pack(fill=tk.X, pady=(5, 0))
 
-        cb4 = tk.Checkbutton(notify_row2, text=f"🤖 {self.t('ai_update_check')}",
-                             variable=self.ai_update_check,
+        cb4 = tk.Checkbutton(notify_row2, variable=self.ai_update_check,
                              bg=self.bg_color, fg=self.fg_color,
                              selectcolor=self.bg_color, activebackground=self.bg_color,
                              font=("Helvetica", 9))
         cb4.pack(side=tk.LEFT)
-
-        # Store checkbuttons for language refresh
-        self.notify_checkbuttons = [
-            (cb1, "gateway_down", "🔴"),
-            (cb2, "high_cost", "💰"),
-            (cb3, "security_alert", "🛡️"),
-            (cb4, "ai_update_check", "🤖")
-        ]
+        self.bind_text(cb4, "🤖 {ai_update_check}")
 
         # Log Section
-        self.log_frame = tk.LabelFrame(self.advanced_container, text=f" {self.t('events')} ",
+        self.log_frame = tk.LabelFrame(self.advanced_container, text=self._log_title or f" {self.t('events')} ",
                                        font=("Helvetica", 12, "bold"),
                                        bg=self.bg_color, fg=self.fg_color,
                                        padx=10, pady=10)
         self.log_frame.pack(fill=tk.BOTH, expand=True)
 
+        log_tools_row = tk.Frame(self.log_frame, bg=self.bg_color)
+        log_tools_row.pack(fill=tk.X, pady=(0, 5))
+
+        self.log_search_label = tk.Label(log_tools_row, font=("Helvetica", 9),
+                                         bg=self.bg_color, fg=self.neutral_color)
+        self.log_search_label.pack(side=tk.LEFT)
+        self.bind_text(self.log_search_label, "🔍 {search}:")
+
+        self.log_search_entry = tk.Entry(log_tools_row, textvariable=self.log_search_var,
+                                         font=("Helvetica", 9),
+                                         bg="#2d2d2d", fg="#cccccc", insertbackground="#cccccc",
+                                         relief=tk.FLAT)
+        self.log_search_entry.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(5, 5))
+
+        self.export_log_btn = tk.Button(log_tools_row, font=("Helvetica", 9),
+                                        bg=self.neutral_color, fg="#000000",
+                                        relief=tk.FLAT, cursor="hand2",
+                                        command=self.export_event_log)
+        self.export_log_btn.pack(side=tk.RIGHT)
+        self.bind_text(self.export_log_btn, "💾 {export}")
+
         self.log_text = scrolledtext.ScrolledText(self.log_frame,
                                                   font=("Courier", 9),
                                                   bg="#2d2d2d", fg="#cccccc",
                                                   height=6, wrap=tk.WORD,
                                                   relief=tk.FLAT)
         self.log_text.pack(fill=tk.BOTH, expand=True)
+        self.log_text.tag_config("warning", foreground=self.warning_color)
+        self.log_text.tag_config("error", foreground=self.error_color)
         self.log_text.config(state=tk.DISABLED)
 
-        # Last update label
-        self.update_label = tk.Label(self.main_frame, text="",
-                                     font=("Helvetica", 9),
-                                     bg=self.bg_color, fg=self.neutral_color)
-        self.update_label.pack(pady=(5, 0))
+        self.advanced_built = True
+        self._set_toggle_display(self.watchdog_auto.get())
+        self.update_usage_display()
+        self.seed_cost_sparkline()
+        self.sync_update_buttons()
+        self.refresh_log_view()
 
     def on_language_change(self, event=None):
         """Handle language change"""
@@ -1055,6 +4860,7 @@ class OpenClawMonitor:
             self.advanced_expanded.set(False)
         else:
             # Expand
+            self.build_advanced_section()
             self.advanced_container.pack(fill=tk.BOTH, expand=True, before=self.update_label)
             self.expand_btn.config(text=f"▼ {self.t('show_less')}")
             self.advanced_expanded.set(True)
@@ -1063,57 +4869,43 @@ class OpenClawMonitor:
     def initialize_advanced_visibility(self):
         """Initialize the visibility of advanced sections based on saved state"""
         if self.advanced_expanded.get():
+            self.build_advanced_section()
             self.advanced_container.pack(fill=tk.BOTH, expand=True, before=self.update_label)
             self.expand_btn.config(text=f"▼ {self.t('show_less')}")
 
-    def refresh_ui_texts(self):
-        """Refresh all UI texts with current language"""
-        # Update frame titles
-        self.status_frame.config(text=f" {self.t('status')} ")
-        self.model_frame.config(text=f" {self.t('ai_model')} ")
-        self.toggle_frame.config(text=f" {self.t('watchdog_auto')} ")
-        self.controls_frame.config(text=f" {self.t('manual_control')} ")
-        self.update_frame.config(text=f" {self.t('software_update')} ")
-        self.log_frame.config(text=f" {self.t('events')} ")
-
-        # Update labels
-        self.platform_label.config(text=f"{self.t('platform')}: {self.platform.capitalize()}")
-        self.lang_label.config(text=f"{self.t('language')}:")
-        self.toggle_label.config(text=self.t("auto_monitoring"))
-
-        # Update status component names
-        for key in self.component_keys:
-            self.status_labels[key]["name"].config(text=f"  {self.t(key)}")
-
-        # Update buttons
-        self.apply_model_btn.config(text=self.t("apply"))
-        self.toggle_btn.config(text=self.t("on") if self.watchdog_auto.get() else self.t("off"))
-        self.gateway_btn.config(text=f"🔄 {self.t('restart_gateway')}")
-        self.tui_btn.config(text=f"🖥️ {self.t('restart_tui')}")
-        self.restart_all_btn.config(text=f"⚡ {self.t('restart_all')}")
-        self.check_update_btn.config(text=f"🔍 {self.t('check')}")
-        self.ignore_update_btn.config(text=f"🚫 {self.t('ignore')}")
-        self.install_update_btn.config(text=f"⬇️ {self.t('install')}")
-        self.recheck_btn.config(text=f"🤖 {self.t('recheck_ai')}")
-
-        # Update usage stats frame
-        self.usage_frame.config(text=f" {self.t('usage_stats')} ")
-        self.reset_usage_btn.config(text=f"🔄 {self.t('reset')}")
-        self.update_usage_display()
+    def bind_text(self, widget, template):
+        """Show `template` (translation keys in braces) as the widget's text, re-rendered on language change"""
+        text = template.format_map(self.catalog)
+        self._text_bindings.append([widget, template, text])
+        widget.config(text=text)
 
-        # Update notifications frame and checkbuttons
-        self.notify_frame.config(text=f" {self.t('notifications')} ")
-        for cb, key, emoji in self.notify_checkbuttons:
-            cb.config(text=f"{emoji} {self.t(key)}")
-
-        # Update expand button
-        if self.advanced_expanded.get():
-            self.expand_btn.config(text=f"▼ {self.t('show_less')}")
+    def refresh_ui_texts(self):
+        """Re-render UI texts in the current language without probing again"""
+        # Only widgets whose text differs in the new language are reconfigured
+        for binding in self._text_bindings:
+            widget, template, shown = binding
+            text = template.format_map(self.catalog)
+            if text != shown:
+                binding[2] = text
+                widget.config(text=text)
+
+        self.expand_btn.config(text=f"▼ {self.t('show_less')}" if self.advanced_expanded.get()
+                               else f"▶ {self.t('show_more')}")
+        if self.advanced_built:
+            self._set_toggle_display(self.watchdog_auto.get())
+            self._log_title = f" {self.t('events')} "
+            self.log_frame.config(text=self._log_title)
+            self.update_usage_display()
+            # Re-render events in the new language
+            self.refresh_log_view()
+
+        # Status texts from the last snapshot (placeholders before the first one)
+        snapshot = self.probe_engine.snapshot
+        if snapshot.updated:
+            self.apply_snapshot(snapshot)
         else:
-            self.expand_btn.config(text=f"▶ {self.t('show_more')}")
-
-        # Refresh status display
-        self.check_all_status()
+            for key in self.component_keys:
+                self.update_status(key, None, self.t("checking"))
 
     def run_command(self, cmd, timeout=10):
         """Run a shell command and return output (cross-platform)"""
@@ -1130,130 +4922,91 @@ class OpenClawMonitor:
         except Exception as e:
             return str(e), -1
 
+    def find_processes(self, pattern):
+        """Return ProcessInfo entries (pid, start_time, rss, cmdline) matching pattern"""
+        return self.process_table.find(pattern)
+
     def check_process(self, pattern):
         """Check if a process matching pattern is running (cross-platform)"""
-        if self.is_windows:
-            output, _ = self.run_command(f'tasklist /FI "IMAGENAME eq {pattern}*" 2>NUL')
-            return pattern.lower() in output.lower()
-        else:
-            output, _ = self.run_command(f"pgrep -f '{pattern}'")
-            return bool(output)
+        return bool(self.find_processes(pattern))
 
     def check_port(self, port):
-        """Check if a port is responding (cross-platform)"""
-        if self.is_windows:
-            output, code = self.run_command(
-                f'powershell -Command "Test-NetConnection -ComputerName localhost -Port {port} -WarningAction SilentlyContinue | Select-Object -ExpandProperty TcpTestSucceeded"'
-            )
-            return "True" in output
-        else:
-            _, code = self.run_command(f"nc -z 127.0.0.1 {port}")
-            return code == 0
+        """Check if a port is responding (cross-platform, in-process)"""
+        return self.port_prober.probe([port])[port] is not None
 
     def check_websocket_connection(self, port):
         """Check if there are established connections to the port"""
-        if self.is_windows:
-            output, _ = self.run_command(f'netstat -an | findstr ":{port}.*ESTABLISHED"')
-        else:
-            output, _ = self.run_command(f"lsof -i :{port} 2>/dev/null | grep ESTABLISHED")
-        return bool(output.strip())
+        return self.connection_inspector.inspect([port])[port].count > 0
 
-    def check_logs_fresh(self):
-        """Check if logs were updated recently (within 5 min)"""
-        log_file = Path(f"/tmp/openclaw/openclaw-{datetime.now().strftime('%Y-%m-%d')}.log")
-        if self.is_windows:
-            log_file = self.openclaw_config_dir / "logs" / f"openclaw-{datetime.now().strftime('%Y-%m-%d')}.log"
+    def probe_tui(self):
+        """Return 'connected', 'disconnected' or 'not_running' for the TUI"""
+        # Inspected even without a TUI so the connection count history has no gaps
+        stats = self.connection_inspector.inspect([self.gateway_port])[self.gateway_port]
+        pattern = "openclaw" if self.is_windows else "openclaw.*tui"
+        if not self.check_process(pattern):
+            return "not_running"
+        return "connected" if stats.count else "disconnected"
 
-        if log_file.exists():
-            mtime = log_file.stat().st_mtime
-            age = time.time() - mtime
-            return age < 300  # 5 minutes
-        return False
+    def daily_log_path(self):
+        """Path of today's OpenClaw log"""
+        return daily_log_path(self.openclaw_config_dir)
+
+    def check_logs_fresh(self):
+        """Check if logs were updated recently (within 5 min, tracked by the log watcher)"""
+        # The tailer still reads new lines for the error counts and the log rate
+        self.log_tailer.poll()
+        return self.log_watcher.fresh
 
     def get_recent_errors(self, lines=5):
         """Get recent errors from log"""
-        log_file = Path(f"/tmp/openclaw/openclaw-{datetime.now().strftime('%Y-%m-%d')}.log")
-        if self.is_windows:
-            log_file = self.openclaw_config_dir / "logs" / f"openclaw-{datetime.now().strftime('%Y-%m-%d')}.log"
+        self.log_tailer.poll()
+        return "\n".join(self.log_tailer.recent_errors(lines))
 
-        if log_file.exists():
-            if self.is_windows:
-                output, _ = self.run_command(
-                    f'powershell -Command "Get-Content \'{log_file}\' | Select-String -Pattern \'error|fail\' | Select-Object -Last {lines}"'
-                )
-            else:
-                output, _ = self.run_command(
-                    f"grep -i 'error\\|fail' '{log_file}' | tail -{lines}"
-                )
-            return output
-        return ""
-
-    def check_git_updates(self):
+    def check_git_updates(self, force_fetch=False):
         """Check if there are updates available on GitHub"""
-        # Fetch latest from remote
-        self.run_command(f"cd {self.openclaw_dir} && git fetch origin", timeout=30)
-
-        # Check if we're behind
-        output, code = self.run_command(
-            f"cd {self.openclaw_dir} && git rev-list HEAD..origin/main --count"
-        )
+        # Fetch latest from remote (skipped while fresh or backing off after failures)
+        fetch = self.fetch_scheduler.maybe_fetch(force=force_fetch)
 
+        # Commits behind, versions and security commits in one batch
         try:
-            commits_behind = int(output.strip()) if output.strip().isdigit() else 0
-        except:
-            commits_behind = 0
-
-        # Get current and remote version
-        local_version, _ = self.run_command(
-            f"cd {self.openclaw_dir} && git describe --tags --always 2>/dev/null || git rev-parse --short HEAD"
-        )
-        remote_version, _ = self.run_command(
-            f"cd {self.openclaw_dir} && git describe --tags --always origin/main 2>/dev/null || git rev-parse --short origin/main"
-        )
-
-        # Check for security-related commits
-        security_output, _ = self.run_command(
-            f"cd {self.openclaw_dir} && git log HEAD..origin/main --oneline --grep='security\\|Security\\|CVE\\|vulnerability\\|fix' 2>/dev/null"
-        )
-        has_security_updates = bool(security_output.strip())
+            result = self.git_status.status()
+        except Exception as e:
+            print(f"Git status error: {e}")
+            result = {"commits_behind": 0, "local_version": "", "remote_version": "",
+                      "has_security": False, "update_available": False}
 
         # Security scan of incoming changes
-        security_scan = self.scan_incoming_changes()
+        result["security_scan"] = self.scan_incoming_changes()
+        result["fetch"] = fetch
+        return result
 
-        return {
-            "commits_behind": commits_behind,
-            "local_version": local_version.strip(),
-            "remote_version": remote_version.strip(),
-            "has_security": has_security_updates,
-            "update_available": commits_behind > 0,
-            "security_scan": security_scan
-        }
+    def resolve_scan_revisions(self):
+        """Return the (HEAD, origin/main) commit SHAs, or (None, None) if unknown"""
+        return self.git_status.revisions()
 
     def scan_incoming_changes(self):
-        """Scan incoming changes for suspicious patterns with AI analysis"""
-        # DANGEROUS patterns - these are almost always malicious
-        dangerous_patterns = [
-            (r"curl\s+.*\|.*sh", "Remote code execution: curl | sh"),
-            (r"wget\s+.*\|.*sh", "Remote code execution: wget | sh"),
-            (r"nc\s+-e", "Reverse shell: netcat -e"),
-            (r"/dev/tcp/", "Reverse shell: /dev/tcp"),
-            (r"bash\s+-i\s+>&", "Reverse shell: bash -i"),
-            (r"python.*-c.*socket", "Potential reverse shell: python socket"),
-            (r"rm\s+-rf\s+/[^.]", "Dangerous: rm -rf /"),
-            (r":(){ :|:& };:", "Fork bomb"),
-            (r"mkfifo.*nc.*sh", "Named pipe reverse shell"),
-        ]
-
-        # NORMAL patterns for CLI tools - these are expected in OpenClaw
-        # We note them but don't flag as dangerous
-        normal_cli_patterns = [
-            "child_process",  # Node.js process spawning - required for CLI
-            "exec(",          # Command execution - required for CLI
-            "spawn(",         # Process spawning - required for CLI
-            "execSync",       # Sync execution - required for CLI
-            "spawnSync",      # Sync spawning - required for CLI
-        ]
+        """Scan incoming changes for suspicious patterns with AI analysis (cached per commit pair)"""
+        head, remote = self.resolve_scan_revisions()
+        cache_key = self.scan_cache.key(head, remote) if head else None
+        if cache_key:
+            cached = self.scan_cache.get(cache_key)
+            if cached is not None:
+                # Only the AI verdict may be missing (e.g. gateway was offline last time)
+                if not cached["clean"] and not cached.get("ai_verdict"):
+                    ai_result = self.ai_security_analysis()
+                    if ai_result:
+                        cached["ai_verdict"] = ai_result.get("verdict", "unknown")
+                        cached["ai_details"] = ai_result.get("details", "")
+                        self.scan_cache.put(cache_key, cached)
+                return cached
+
+        results = self._scan_incoming_changes()
+        if cache_key and not results.get("scan_failed"):
+            # A failed scan is retried on the next check instead of being reused
+            self.scan_cache.put(cache_key, results)
+        return results
 
+    def _scan_incoming_changes(self):
         results = {
             "clean": True,
             "warnings": [],
@@ -1264,65 +5017,66 @@ class OpenClawMonitor:
             "ai_details": None
         }
 
-        # Get list of changed files
-        changed_files, _ = self.run_command(
-            f"cd {self.openclaw_dir} && git diff --name-only HEAD..origin/main"
-        )
+        # One streamed diff provides files, pattern hits, new scripts and binaries
+        try:
+            diff_scan = self.diff_scanner.scan(self.openclaw_dir)
+        except Exception as e:
+            # Fail closed: an unscanned update is not a clean one
+            results["clean"] = False
+            results["scan_failed"] = True
+            results["warnings"].append(f"❌ {self.t('security_scan_failed')}: {e}")
+            return results
 
-        if not changed_files.strip():
+        if not diff_scan["files"]:
             return results
 
-        files = changed_files.strip().split('\n')
-        results["files_checked"] = len(files)
+        results["files_checked"] = len(diff_scan["files"])
 
-        # Check for DANGEROUS patterns only
-        for pattern, description in dangerous_patterns:
-            output, _ = self.run_command(
-                f"cd {self.openclaw_dir} && git diff HEAD..origin/main -U0 2>/dev/null | grep -E '{pattern}' | head -3"
-            )
-            if output.strip():
+        # Check for DANGEROUS patterns only (first 3 hits per pattern)
+        hits_by_pattern = {}
+        for hit in diff_scan["hits"]:
+            hits_by_pattern.setdefault(hit.description, []).append(hit)
+        for _, description in self.diff_scanner.patterns:
+            hits = hits_by_pattern.get(description)
+            if hits:
                 results["clean"] = False
                 results["warnings"].append(f"⚠️ {description}")
-                results["suspicious_files"].append(output.strip()[:100])
+                for hit in hits[:3]:
+                    results["suspicious_files"].append(f"{hit.file}:{hit.line}: {hit.text}"[:100])
 
         # Check for new executable scripts in unexpected places
-        new_scripts, _ = self.run_command(
-            f"cd {self.openclaw_dir} && git diff HEAD..origin/main --name-only --diff-filter=A | grep -E '\\.(sh|bash|py|rb|pl)$' | grep -v -E '^(scripts/|test/)'"
-        )
-        if new_scripts.strip():
-            results["info"].append(f"New scripts added: {new_scripts.strip()[:50]}")
+        new_scripts = [f for f in diff_scan["added_files"]
+                       if NEW_SCRIPT_RE.search(f) and not f.startswith(("scripts/", "test/"))]
+        if new_scripts:
+            results["info"].append(f"New scripts added: {', '.join(new_scripts)[:50]}")
 
         # Check for new binary files
-        binary_files, _ = self.run_command(
-            f"cd {self.openclaw_dir} && git diff HEAD..origin/main --numstat 2>/dev/null | grep -E '^-\\s+-' | head -5"
-        )
-        if binary_files.strip():
+        if diff_scan["binary_files"]:
             results["info"].append("New binary files detected")
 
         # If dangerous patterns found, try AI analysis via Gateway
         if not results["clean"]:
-            ai_result = self.ai_security_analysis()
+            ai_result = self.ai_security_analysis(diff_scan)
             if ai_result:
                 results["ai_verdict"] = ai_result.get("verdict", "unknown")
                 results["ai_details"] = ai_result.get("details", "")
 
         return results
 
-    def ai_security_analysis(self):
+    def ai_security_analysis(self, diff_scan=None):
         """Use OpenClaw Gateway to analyze security of incoming changes"""
         try:
             # Check if gateway is running
-            if not self.check_port(18789):
+            if not self.check_port(self.gateway_port):
                 return None
 
-            # Get the diff content (limited to avoid token overflow)
-            diff_output, code = self.run_command(
-                f"cd {self.openclaw_dir} && git diff HEAD..origin/main --stat && echo '---DIFF---' && git diff HEAD..origin/main -U3 | head -500",
-                timeout=30
-            )
-
-            if code != 0 or not diff_output.strip():
+            # Reuse the diff pass of the pattern scan (limited to avoid token overflow)
+            if diff_scan is None:
+                diff_scan = self.diff_scanner.scan(self.openclaw_dir)
+            if not diff_scan["files"]:
                 return None
+            diff_output = "\n".join([DiffScanner.format_stat(diff_scan["stats"]), "---DIFF---"]
+                                    + diff_scan["excerpt"])
 
             # Create a security analysis prompt
             analysis_prompt = f"""Analyze this git diff for security issues.
@@ -1362,6 +5116,21 @@ Diff:
             print(f"AI analysis error: {e}")
             return None
 
+    def cached_ai_security_analysis(self):
+        """AI verdict for the current commit pair, asking the gateway only if none is cached"""
+        head, remote = self.resolve_scan_revisions()
+        cache_key = self.scan_cache.key(head, remote) if head else None
+        cached = self.scan_cache.get(cache_key) if cache_key else None
+        if cached and cached.get("ai_verdict"):
+            return {"verdict": cached["ai_verdict"], "details": cached.get("ai_details", "")}
+
+        ai_result = self.ai_security_analysis()
+        if ai_result and cached is not None:
+            cached["ai_verdict"] = ai_result.get("verdict", "unknown")
+            cached["ai_details"] = ai_result.get("details", "")
+            self.scan_cache.put(cache_key, cached)
+        return ai_result
+
     def should_auto_check_updates(self):
         """Check if we should auto-check updates (every 2 days)"""
         try:
@@ -1385,103 +5154,356 @@ Diff:
             pass
 
     def update_status(self, key, is_ok, status_text=""):
-        """Update a status indicator"""
-        indicator = self.status_labels[key]["indicator"]
-        status = self.status_labels[key]["status"]
-
+        """Update a status indicator (only touches widgets whose text changed)"""
         if is_ok is None:  # Neutral/Unknown
-            indicator.config(text="⚫", fg=self.neutral_color)
+            display = ("⚫", self.neutral_color, status_text)
         elif is_ok:
-            indicator.config(text="🟢", fg=self.success_color)
+            display = ("🟢", self.success_color, status_text)
         elif is_ok is False and status_text and self.t("warning").lower() in status_text.lower():
-            indicator.config(text="🟡", fg=self.warning_color)
+            display = ("🟡", self.warning_color, status_text)
         else:
-            indicator.config(text="🔴", fg=self.error_color)
-
-        status.config(text=status_text)
+            display = ("🔴", self.error_color, status_text)
+        self._set_status_display(key, display)
+
+    def _set_status_display(self, key, display):
+        """Apply (indicator, color, text) to a status row if it differs from what is shown"""
+        if self._displayed_status.get(key) == display:
+            return
+        self._displayed_status[key] = display
+        indicator_text, color, status_text = display
+        self.status_labels[key]["indicator"].config(text=indicator_text, fg=color)
+        self.status_labels[key]["status"].config(text=status_text)
+
+    def log_event(self, message=None, key=None, args=(), level="info"):
+        """Add event to log (pass `key` to store a translation key instead of text)"""
+        record = self.event_log.append(level, key, args if key else (message,))
+        if not self.advanced_built:
+            # Kept in the ring buffer, rendered when the section is first built
+            self._log_title = f" {self.t('events')} ({record.timestamp.strftime('%d.%m. %H:%M')}) "
+            return
+        if not self.log_search_var.get() or self.event_matches(record):
+            self._append_log_lines([record])
 
-    def log_event(self, message):
-        """Add event to log"""
-        now = datetime.now()
-        timestamp = now.strftime("%H:%M:%S")
+        # Update log frame title with last event time
+        title = f" {self.t('events')} ({record.timestamp.strftime('%d.%m. %H:%M')}) "
+        if title != self._log_title:
+            self._log_title = title
+            self.log_frame.config(text=title)
+
+    def render_event(self, record):
+        """Text of an event record in the current language"""
+        if record.key:
+            return self.catalog.format(record.key, *record.args)
+        return record.args[0]
+
+    def event_matches(self, record):
+        return self.log_search_var.get().lower() in self.render_event(record).lower()
+
+    def _append_log_lines(self, records):
+        """Insert records at the end of the widget, trimming old lines in batches"""
+        at_bottom = self.log_text.yview()[1] >= 0.999
         self.log_text.config(state=tk.NORMAL)
-        self.log_text.insert(tk.END, f"[{timestamp}] {message}\n")
-        self.log_text.see(tk.END)
+        for record in records:
+            text = self.render_event(record).replace("\n", " ")
+            self.log_text.insert(tk.END, f"[{record.timestamp.strftime('%H:%M:%S')}] {text}\n",
+                                 record.level)
+        self._log_widget_lines += len(records)
+        if self._log_widget_lines > self.log_widget_max_lines + self.log_trim_batch:
+            excess = self._log_widget_lines - self.log_widget_max_lines
+            self.log_text.delete("1.0", f"{excess + 1}.0")
+            self._log_widget_lines -= excess
         self.log_text.config(state=tk.DISABLED)
-        # Update log frame title with last event time
-        date_str = now.strftime("%d.%m. %H:%M")
-        self.log_frame.config(text=f" {self.t('events')} ({date_str}) ")
+        # Only follow new events if the user has not scrolled up
+        if at_bottom:
+            self.log_text.see(tk.END)
+
+    def refresh_log_view(self):
+        """Rebuild the widget from the ring buffer (search filter or language change)"""
+        self._log_search_job = None
+        if not self.advanced_built:
+            return
+        query = self.log_search_var.get()
+        records = self.event_log.search(query, self.render_event) if query else self.event_log.records()
+        self.log_text.config(state=tk.NORMAL)
+        self.log_text.delete("1.0", tk.END)
+        self.log_text.config(state=tk.DISABLED)
+        self._log_widget_lines = 0
+        self._append_log_lines(records[-self.log_widget_max_lines:])
+        self.log_text.see(tk.END)
+
+    def _on_log_search(self, *args):
+        """Debounce search typing before re-filtering the widget"""
+        if self._log_search_job:
+            self.root.after_cancel(self._log_search_job)
+        self._log_search_job = self.root.after(250, self.refresh_log_view)
+
+    def export_event_log(self):
+        """Export the full event history to a text file"""
+        path = filedialog.asksaveasfilename(
+            defaultextension=".log",
+            initialfile=f"openclaw-monitor-events-{datetime.now().strftime('%Y%m%d-%H%M%S')}.log")
+        if not path:
+            return
+        try:
+            self.event_log.export(path, self.render_event)
+            self.log_event(f"💾 {self.t('events_exported')}: {path}")
+        except OSError as e:
+            self.log_event(f"❌ {e}", level="error")
 
     def check_all_status(self):
-        """Check all component status"""
+        """Probe all components now on the monitoring thread (resets probe backoff)"""
+        self.scheduler.wake()
+
+    def probe_healthy(self, key, snapshot):
+        """Whether the last result of probe `key` lets its interval back off"""
+        if key in snapshot.errors:
+            return False
+        check = self.probe_health.get(key)
+        return check is None or bool(check(snapshot.values.get(key)))
+
+    def record_history(self, snapshot):
+        """Append the numeric parts of a snapshot to the history store (worker thread)"""
+        values = snapshot.values
+        now = snapshot.timestamp
+        samples = {}
+        if "port" in snapshot.updated and "port" not in snapshot.errors:
+            rtt = (values.get("port") or {}).get(self.gateway_port)
+            samples["port.rtt"] = math.nan if rtt is None else rtt
+            if rtt is not None:
+                self.rtt_histogram.observe(rtt / 1000)
+        if "gateway" in snapshot.updated and "gateway" not in snapshot.errors:
+            procs = values.get("gateway") or []
+            samples["gateway.rss"] = sum(p.rss for p in procs) / 1048576
+        if "ws" in snapshot.updated:
+            ws_rtt = values.get("ws")
+            samples["ws.rtt"] = math.nan if ws_rtt is None else ws_rtt
+        if "tui" in snapshot.updated:
+            stats = self.connection_inspector.last[1].get(self.gateway_port)
+            if stats is not None:
+                samples["port.connections"] = stats.count
+        # Daily log write rate in bytes/s between two log probes
+        if "logs" in snapshot.updated:
+            with self._history_lock:
+                previous = self._history_log_bytes
+                current = self._history_log_bytes = (now, self.log_tailer.bytes_read)
+            if previous and now > previous[0]:
+                samples["log.rate"] = (current[1] - previous[1]) / (now - previous[0])
+        for series, value in samples.items():
+            self.history.append(series, value, now)
+        samples["cost.hour"] = self._add_hour_cost(0.0, now)
+        return samples
+
+    def _add_hour_cost(self, cost, now):
+        """Add to the running cost of the current hour; return (hour start, cost)"""
+        hour = now - now % 3600
+        with self._history_lock:
+            if self._cost_hour[0] != hour:
+                self._cost_hour = (hour, 0.0)
+            self._cost_hour = (hour, self._cost_hour[1] + cost)
+            return self._cost_hour
+
+    def record_usage_history(self, batch):
+        """Append one ingested usage batch per model to the history store"""
+        now = time.time()
+        for model, (tokens, cost, _) in batch.items():
+            self.history.append(f"usage.tokens.{model}", tokens, now)
+            self.history.append(f"usage.cost.{model}", cost, now)
+            self._add_hour_cost(cost, now)
+            with self._history_lock:
+                total = self.usage_counters.get(model, (0, 0.0))
+                self.usage_counters[model] = (total[0] + tokens, total[1] + cost)
+
+    def record_restart(self, component):
+        self.history.append(f"restarts.{component}", 1)
+        self.restart_counts[component] = self.restart_counts.get(component, 0) + 1
+
+    def collect_metrics(self):
+        """Metric families from the last snapshot and cached counters (never probes)"""
+        return collect_metrics(self.probe_engine.snapshot, self.gateway_port, self.rtt_histogram,
+                               log_age=self.log_tailer.age(),
+                               error_counts=dict(self.log_tailer.error_counts),
+                               restarts=dict(self.restart_counts),
+                               commits_behind=self.commits_behind,
+                               usage=dict(self.usage_counters),
+                               cadence=self.scheduler.cadence(),
+                               connections=self.connection_inspector.last[1])
+
+    def start_metrics_exporter(self):
+        port = self.metrics_port or self.config_metrics_port
+        if not port:
+            return
+        self.metrics_exporter = MetricsExporter(self.collect_metrics, port=int(port))
+        try:
+            self.metrics_exporter.start()
+            self.log_event(f"📈 Metrics: http://127.0.0.1:{port}/metrics")
+        except OSError as e:
+            self.metrics_exporter = None
+            self.log_event(f"📈 Metrics: {e}", level="error")
+
+    def seed_sparklines(self):
+        """Fill the sparklines with the most recent history"""
+        now = time.time()
+        for key, series in self.sparkline_series.items():
+            spark = self.sparklines[key]
+            for _, value in self.history.query(series, now - 3600, now + 1, "raw")[-spark.capacity:]:
+                spark.push(value)
+
+        hour = now - now % 3600
+        self._cost_hour = (hour, self.hourly_costs(hour, now).get(hour, 0.0))
+
+    def hourly_costs(self, first, now):
+        """{hour start: cost} summed over all models from the history store"""
+        hourly = {}
+        for series in self.history.series():
+            if series.startswith("usage.cost."):
+                for start, _, _, avg, count in self.history.query(series, first, now + 1, "1h"):
+                    hourly[start] = hourly.get(start, 0.0) + avg * count
+        return hourly
+
+    def seed_cost_sparkline(self):
+        """Fill the cost sparkline (built with the advanced section) with past hours"""
+        now = time.time()
+        hour = now - now % 3600
+        first = hour - (self.cost_sparkline.capacity - 1) * 3600
+        hourly = self.hourly_costs(first, hour)
+        for i in range(self.cost_sparkline.capacity - 1):
+            self.cost_sparkline.push(hourly.get(first + i * 3600, 0.0))
+        # The running total of the current hour is newer than the store
+        self.cost_sparkline.push(self._cost_hour[1] if self._cost_hour[0] == hour else 0.0)
+        self._cost_spark_hour = hour
+
+    def update_sparklines(self, samples):
+        """Append one round of samples to the sparklines (UI thread only)"""
+        for key, series in self.sparkline_series.items():
+            if series in samples:
+                self.sparklines[key].push(samples[series])
+
+        if not self.advanced_built:
+            return
+        hour, cost = samples["cost.hour"]
+        if hour == self._cost_spark_hour:
+            self.cost_sparkline.set_last(cost)
+            return
+        # One zero point per hour skipped (e.g. while asleep), at most a full chart
+        if self._cost_spark_hour is not None:
+            skipped = int((hour - self._cost_spark_hour) // 3600) - 1
+            for _ in range(max(0, min(skipped, self.cost_sparkline.capacity))):
+                self.cost_sparkline.push(0.0)
+        self.cost_sparkline.push(cost)
+        self._cost_spark_hour = hour
+
+    def apply_snapshot(self, snapshot, samples=None):
+        """Reflect a StatusSnapshot (and its history samples) in the status panel (UI thread only)"""
+        values = snapshot.values
+        errors = snapshot.errors
+
+        def timed_out(key):
+            """Show a probe that failed or timed out as unknown; return whether it did"""
+            if key not in errors:
+                return False
+            if errors[key] == PROBE_TIMEOUT:
+                self.update_status(key, None, self.t("probe_timeout"))
+            else:
+                self.update_status(key, None, self.catalog.format("probe_error", error=errors[key][:80]))
+            return True
+
         # Watchdog
-        watchdog_running = self.check_process("watchdog")
-        self.update_status("watchdog", watchdog_running,
-                           self.t("running") if watchdog_running else self.t("stopped"))
-
-        # Update toggle button
-        if watchdog_running:
-            self.watchdog_auto.set(True)
-            self.toggle_btn.config(text=self.t("on"), bg=self.success_color, fg="#000000")
-        else:
-            self.watchdog_auto.set(False)
-            self.toggle_btn.config(text=self.t("off"), bg=self.neutral_color, fg="#000000")
+        watchdog_running = bool(values.get("watchdog"))
+        if not timed_out("watchdog"):
+            self.update_status("watchdog", watchdog_running,
+                               self.t("running") if watchdog_running else self.t("stopped"))
 
-        # Gateway
-        gateway_running = self.check_process("openclaw-gateway")
-        self.update_status("gateway", gateway_running,
-                           self.t("running") if gateway_running else self.t("stopped"))
+            # Update toggle button
+            self._set_toggle_display(bool(watchdog_running))
 
-        # Port
-        port_ok = self.check_port(18789)
-        self.update_status("port", port_ok,
-                           self.t("responding") if port_ok else self.t("not_responding"))
+        # Gateway
+        if not timed_out("gateway"):
+            gateway_procs = values.get("gateway")
+            if gateway_procs:
+                proc = gateway_procs[0]
+                self.update_status("gateway", True,
+                                   f"{self.t('running')} (PID {proc.pid}, {proc.rss / 1048576:.0f} MB)")
+            else:
+                self.update_status("gateway", False, self.t("stopped"))
+
+        # Port (value is {port: RTT in ms or None}) and WebSocket ping (RTT in ms or None)
+        if not timed_out("port"):
+            rtt = (values.get("port") or {}).get(self.gateway_port)
+            ws_rtt = values.get("ws")
+            probe = self.ws_probe
+            if (rtt is not None and "ws" in values and ws_rtt is None
+                    and probe.connected_once and not probe.rejected):
+                # Accepts TCP but does not answer pings: event loop stuck (judged
+                # like the headless monitor, only once a handshake has succeeded)
+                self._set_status_display("port", ("🟡", self.warning_color,
+                                                  f"{self.t('responding')} ({rtt:.1f} ms, {self.t('ws_no_pong')})"))
+            elif rtt is not None:
+                ws_text = f", WS {ws_rtt:.1f} ms" if ws_rtt is not None else ""
+                self.update_status("port", True, f"{self.t('responding')} ({rtt:.1f} ms{ws_text})")
+            else:
+                self.update_status("port", False, self.t("not_responding"))
 
         # TUI
-        tui_running = self.check_process("openclaw.*tui") if not self.is_windows else self.check_process("openclaw")
-        if tui_running:
-            connected = self.check_websocket_connection(18789)
-            self.update_status("tui", connected,
-                               self.t("connected") if connected else f"{self.t('disconnected')} ({self.t('warning')})")
-        else:
-            self.update_status("tui", None, self.t("not_running"))
+        if not timed_out("tui"):
+            tui_state = values.get("tui")
+            if tui_state == "connected":
+                self.update_status("tui", True, self.t("connected"))
+            elif tui_state == "disconnected":
+                self.update_status("tui", False, f"{self.t('disconnected')} ({self.t('warning')})")
+            else:
+                self.update_status("tui", None, self.t("not_running"))
 
         # Logs
-        logs_fresh = self.check_logs_fresh()
-        self.update_status("logs", logs_fresh,
-                           self.t("fresh") if logs_fresh else f"{self.t('stale')} ({self.t('warning')})")
+        if not timed_out("logs"):
+            logs_fresh = values.get("logs")
+            self.update_status("logs", logs_fresh,
+                               self.t("fresh") if logs_fresh else f"{self.t('stale')} ({self.t('warning')})")
 
         # Updates - show cached status with version
-        current_version = self.get_current_version() if hasattr(self, 'get_current_version') else ""
+        current_version = values.get("version") or ""
         version_prefix = f"v{current_version} → " if current_version else ""
 
         if self.update_available:
-            if hasattr(self, 'has_security_update') and self.has_security_update:
+            if getattr(self, 'has_security_update', False):
                 self.update_status("updates", False, f"{version_prefix}{self.t('security_update')} ({self.update_info})")
             else:
-                indicator = self.status_labels["updates"]["indicator"]
-                indicator.config(text="🟡", fg=self.warning_color)
-                self.status_labels["updates"]["status"].config(text=f"{version_prefix}{self.t('available')} ({self.update_info})")
+                self._set_status_display("updates", ("🟡", self.warning_color,
+                                                     f"{version_prefix}{self.t('available')} ({self.update_info})"))
         elif self.last_update_check:
-            version_info = self.get_current_version() if hasattr(self, 'get_current_version') else ""
             check_date = self.last_update_check.strftime('%d.%m. %H:%M')
-            if version_info:
-                self.update_status("updates", True, f"v{version_info} ({check_date})")
+            if current_version:
+                self.update_status("updates", True, f"v{current_version} ({check_date})")
             else:
                 self.update_status("updates", True, f"{self.t('current')} ({check_date})")
         else:
             self.update_status("updates", None, self.t("not_checked"))
 
+        # Usage ingested from the logs during this round
+        if values.get("usage"):
+            self._refresh_usage_display()
+
+        if samples:
+            self.update_sparklines(samples)
+
         # Auto-check updates every 2 days
-        if self.should_auto_check_updates() and not hasattr(self, '_auto_check_done'):
+        if "auto_update" in snapshot.updated and values.get("auto_update") and not hasattr(self, '_auto_check_done'):
             self._auto_check_done = True
             threading.Thread(target=self._background_update_check, daemon=True).start()
 
         # Update timestamp
         self.update_label.config(
-            text=f"{self.t('updated_at')}: {datetime.now().strftime('%H:%M:%S')}"
+            text=f"{self.t('updated_at')}: {datetime.fromtimestamp(snapshot.timestamp).strftime('%H:%M:%S')}"
         )
 
+    def _set_toggle_display(self, on):
+        """Show the watchdog toggle as ON/OFF, reconfiguring the button only on change"""
+        if on != self.watchdog_auto.get():
+            self.watchdog_auto.set(on)
+        toggle = (self.t("on"), self.success_color) if on else (self.t("off"), self.neutral_color)
+        if self.advanced_built and self._displayed_status.get("_toggle") != toggle:
+            self._displayed_status["_toggle"] = toggle
+            self.toggle_btn.config(text=toggle[0], bg=toggle[1], fg="#000000")
+
     def apply_model_change(self):
         """Apply the selected model"""
         selected_index = self.model_combo.current()
@@ -1491,113 +5513,118 @@ Diff:
             if self.save_model_config(model_id):
                 self.current_model.set(model_id)
                 self.log_event(f"{self.t('model_changed')}: {model_name}")
-                self.log_event(self.t("gateway_restart_required"))
+                self.log_event(key="gateway_restart_required")
 
                 # Ask if user wants to restart gateway
                 if messagebox.askyesno(self.t("model_changed"),
-                                       self.t("model_changed_msg").format(model=model_name)):
+                                       self.catalog.format("model_changed_msg", model=model_name)):
                     self.restart_gateway()
             else:
-                self.log_event(f"❌ {self.t('config_error')}")
+                self.log_event(f"❌ {self.t('config_error')}", level="error")
 
     def toggle_watchdog(self):
         """Toggle watchdog on/off"""
         if self.watchdog_auto.get():
             # Turn off
-            self.log_event(self.t("stopping_watchdog"))
+            self.log_event(key="stopping_watchdog")
             if self.is_windows:
                 self.run_command("taskkill /F /IM watchdog* 2>NUL")
             else:
-                self.run_command(f"{self.watchdog_script} stop")
-            self.toggle_btn.config(text=self.t("off"), bg=self.neutral_color, fg="#000000")
-            self.watchdog_auto.set(False)
-            self.log_event(self.t("watchdog_stopped"))
+                self.run_command(f"{self.watchdog_command} stop")
+            self._set_toggle_display(False)
+            self.log_event(key="watchdog_stopped")
         else:
             # Turn on
-            self.log_event(self.t("starting_watchdog"))
+            self.log_event(key="starting_watchdog")
             if not self.is_windows:
-                self.run_command(f"{self.watchdog_script} start")
+                self.run_command(f"{self.watchdog_command} start")
             else:
-                self.log_event(self.t("watchdog_not_available"))
-            time.sleep(1)
-            self.toggle_btn.config(text=self.t("on"), bg=self.success_color, fg="#000000")
-            self.watchdog_auto.set(True)
-            self.log_event(self.t("watchdog_started"))
+                self.log_event(key="watchdog_not_available")
+            self._set_toggle_display(True)
+            self.log_event(key="watchdog_started")
 
         self.check_all_status()
 
     def restart_gateway(self):
         """Restart gateway"""
         self.gateway_btn.config(state=tk.DISABLED, text="⏳...")
-        self.log_event(self.t("restarting_gateway"))
+        self.log_event(key="restarting_gateway")
 
         def do_restart():
-            if self.is_windows:
-                self.run_command("taskkill /F /IM openclaw-gateway* 2>NUL")
-                time.sleep(2)
-                self.run_command(f"cd {self.openclaw_dir} && start /B pnpm openclaw gateway run")
-            else:
-                self.run_command(f"{self.watchdog_script} restart-gateway", timeout=30)
-            time.sleep(3)
-            self.root.after(0, self._gateway_restart_complete)
+            result = self.restarter.restart()
+            self.root.after(0, lambda: self._gateway_restart_complete(result))
 
         threading.Thread(target=do_restart, daemon=True).start()
 
-    def _gateway_restart_complete(self):
+    def launch_gateway(self):
+        if self.is_windows:
+            self.run_command(f"cd {self.openclaw_dir} && start /B pnpm openclaw gateway run")
+        else:
+            launch_gateway(self.openclaw_dir, self.gateway_port, self.gateway_token, self.gateway_log)
+
+    def _gateway_restart_complete(self, result):
         self.gateway_btn.config(state=tk.NORMAL, text=f"🔄 {self.t('restart_gateway')}")
-        self.log_event(self.t("gateway_restart_complete"))
+        if result.ok:
+            self.log_event(key="gateway_ready_in", args=(result.ready_seconds,))
+            self.history.append("restarts.gateway.ready", result.ready_seconds)
+        else:
+            self.log_event(key="gateway_not_ready", level="error")
+        self.record_restart("gateway")
         self.check_all_status()
 
     def restart_tui(self):
         """Restart TUI"""
         self.tui_btn.config(state=tk.DISABLED, text="⏳...")
-        self.log_event(self.t("restarting_tui"))
+        self.log_event(key="restarting_tui")
+
+        def tui_pids():
+            return {p.pid for p in self.process_table.scan()["openclaw.*tui"]}
 
         def do_restart():
-            if self.is_windows:
-                self.run_command("taskkill /F /IM openclaw* 2>NUL")
-                time.sleep(1)
-                self.run_command(f"start cmd /k \"cd {self.openclaw_dir} && pnpm openclaw tui\"")
-            elif self.is_mac:
-                self.run_command(f"{self.watchdog_script} restart-tui", timeout=15)
+            if self.is_mac:
+                self.run_command(f"{self.watchdog_command} restart-tui", timeout=15)
             else:
-                # Linux - try to open in a new terminal
-                self.run_command(f"pkill -f 'openclaw.*tui'")
-                time.sleep(1)
-                terminals = ["gnome-terminal", "konsole", "xterm", "xfce4-terminal"]
-                for term in terminals:
-                    code = os.system(f"which {term} > /dev/null 2>&1")
-                    if code == 0:
-                        self.run_command(f"{term} -- bash -c 'cd {self.openclaw_dir} && pnpm openclaw tui'")
-                        break
-            time.sleep(3)
+                self.restarter.stop(tui_pids(), tui_pids)
+                if self.is_windows:
+                    self.run_command(f"start cmd /k \"cd {self.openclaw_dir} && pnpm openclaw tui\"")
+                else:
+                    # Linux - try to open in a new terminal
+                    for term in ["gnome-terminal", "konsole", "xterm", "xfce4-terminal"]:
+                        if shutil.which(term):
+                            self.run_command(f"{term} -- bash -c 'cd {self.openclaw_dir} && pnpm openclaw tui'")
+                            break
+                # Done once the new TUI shows up in the process table
+                self.restarter.wait_for(tui_pids, 8)
             self.root.after(0, self._tui_restart_complete)
 
         threading.Thread(target=do_restart, daemon=True).start()
 
     def _tui_restart_complete(self):
         self.tui_btn.config(state=tk.NORMAL, text=f"🖥️ {self.t('restart_tui')}")
-        self.log_event(self.t("tui_restart_complete"))
+        self.log_event(key="tui_restart_complete")
+        self.record_restart("tui")
         self.check_all_status()
 
     def restart_all(self):
         """Restart everything"""
         self.restart_all_btn.config(state=tk.DISABLED, text="⏳...")
-        self.log_event(self.t("restarting_all"))
+        self.log_event(key="restarting_all")
 
         def do_restart():
             if self.is_windows:
-                self.run_command("taskkill /F /IM openclaw* 2>NUL")
+                openclaw_pids = lambda: {p.pid for p in self.process_table.scan()["openclaw"]}
+                self.restarter.stop(openclaw_pids(), openclaw_pids)
             else:
-                self.run_command(f"{self.watchdog_script} restart-all", timeout=45)
-            time.sleep(5)
+                # Returns once the gateway is ready again
+                self.run_command(f"{self.watchdog_command} restart-all", timeout=45)
             self.root.after(0, self._restart_all_complete)
 
         threading.Thread(target=do_restart, daemon=True).start()
 
     def _restart_all_complete(self):
         self.restart_all_btn.config(state=tk.NORMAL, text=f"⚡ {self.t('restart_all')}")
-        self.log_event(self.t("full_restart_complete"))
+        self.log_event(key="full_restart_complete")
+        self.record_restart("all")
         self.check_all_status()
 
     def _background_update_check(self):
@@ -1611,22 +5638,29 @@ Diff:
     def check_updates(self):
         """Manual update check"""
         self.check_update_btn.config(state=tk.DISABLED, text="🔍...")
-        self.log_event(self.t("checking_updates"))
+        self.log_event(key="checking_updates")
 
         def do_check():
-            result = self.check_git_updates()
+            result = self.check_git_updates(force_fetch=True)
             self.root.after(0, lambda: self._update_check_complete(result, silent=False))
 
         threading.Thread(target=do_check, daemon=True).start()
 
     def _update_check_complete(self, result, silent=False):
-        self.check_update_btn.config(state=tk.NORMAL, text=f"🔍 {self.t('check')}")
+        if self.advanced_built:
+            self.check_update_btn.config(state=tk.NORMAL, text=f"🔍 {self.t('check')}")
         self.last_update_check = datetime.now()
         self.save_update_check_time()
 
+        self.commits_behind = result["commits_behind"]
+
         # Store security scan results
         self.security_scan_result = result.get("security_scan", {"clean": True})
 
+        fetch = result.get("fetch", {})
+        if not silent and not fetch.get("ok", True):
+            self.log_event(f"📡 {self.t('fetch_failed')}")
+
         if result["update_available"]:
             self.update_available = True
             self.has_security_update = result["has_security"]
@@ -1637,53 +5671,60 @@ Diff:
             if not scan["clean"]:
                 # Show warnings
                 for warning in scan.get("warnings", [])[:3]:
-                    self.log_event(warning)
+                    self.log_event(warning, level="warning")
 
                 # Show AI verdict if available
                 if scan.get("ai_verdict"):
                     verdict = scan["ai_verdict"]
                     if verdict == "SAFE":
                         self.log_event(f"🤖 {self.t('ai_verdict')}: {self.t('safe')}")
-                        self.install_update_btn.config(bg=self.warning_color)  # Yellow - review but probably OK
+                        self.install_update_color = self.warning_color  # Yellow - review but probably OK
                     elif verdict == "REVIEW":
                         self.log_event(f"🤖 {self.t('ai_verdict')}: {self.t('review_recommended')}")
-                        self.install_update_btn.config(bg=self.warning_color)
+                        self.install_update_color = self.warning_color
                     else:
-                        self.log_event(f"🤖 {self.t('ai_verdict')}: {self.t('potentially_dangerous')}")
-                        self.install_update_btn.config(bg=self.error_color)
+                        self.log_event(f"🤖 {self.t('ai_verdict')}: {self.t('potentially_dangerous')}", level="error")
+                        self.install_update_color = self.error_color
 
                     if scan.get("ai_details"):
                         self.log_event(f"   {scan['ai_details'][:100]}")
+                elif scan.get("scan_failed"):
+                    # Already reported with the warnings; nothing was analysed
+                    self.install_update_color = self.error_color
                 else:
-                    self.log_event(self.t("ai_analysis_failed"))
-                    self.install_update_btn.config(bg=self.error_color)
+                    self.log_event(key="ai_analysis_failed")
+                    self.install_update_color = self.error_color
             else:
                 # Show info items (non-dangerous)
                 for info in scan.get("info", []):
                     self.log_event(f"ℹ️ {info}")
                 self.log_event(f"✅ {self.t('security_scan_ok')} ({scan['files_checked']} {self.t('files')})")
-                self.install_update_btn.config(bg=self.success_color)
+                self.install_update_color = self.success_color
 
             if result["has_security"]:
-                self.log_event(f"⚠️ {self.t('security_update')} {result['commits_behind']} commits")
+                self.log_event(f"⚠️ {self.t('security_update')} {result['commits_behind']} commits", level="warning")
             else:
                 self.log_event(f"Update: {result['commits_behind']} {self.t('commits_behind')}")
-
-            self.install_update_btn.config(state=tk.NORMAL)
-            self.ignore_update_btn.config(state=tk.NORMAL)
-            self.recheck_btn.config(state=tk.NORMAL)
         else:
             self.update_available = False
             self.has_security_update = False
             self.update_info = ""
             if not silent:
                 self.log_event(f"✅ {self.t('openclaw_current')}")
-            self.install_update_btn.config(state=tk.DISABLED, bg=self.success_color)
-            self.ignore_update_btn.config(state=tk.DISABLED)
-            self.recheck_btn.config(state=tk.DISABLED)
+            self.install_update_color = self.success_color
 
+        self.sync_update_buttons()
         self.check_all_status()
 
+    def sync_update_buttons(self):
+        """Enable install/ignore/recheck while an update is pending (no-op until the section is built)"""
+        if not self.advanced_built:
+            return
+        state = tk.NORMAL if self.update_available else tk.DISABLED
+        self.install_update_btn.config(state=state, bg=self.install_update_color)
+        self.ignore_update_btn.config(state=state)
+        self.recheck_btn.config(state=state)
+
     def install_updates(self):
         """Install updates from GitHub"""
         # Check if security scan found issues
@@ -1695,20 +5736,20 @@ Diff:
             warning_msg += self.t("continue_anyway")
 
             if not messagebox.askyesno(self.t("security_warning"), warning_msg, icon='warning'):
-                self.log_event(self.t("update_cancelled"))
+                self.log_event(key="update_cancelled")
                 return
 
         self.install_update_btn.config(state=tk.DISABLED, text="⬇️...")
-        self.log_event(self.t("installing_updates"))
+        self.log_event(key="installing_updates")
 
         def do_update():
             # Stop services
             if self.is_windows:
                 self.run_command("taskkill /F /IM openclaw* 2>NUL")
             else:
-                self.run_command(f"{self.watchdog_script} stop", timeout=10)
-                self.run_command("pkill -9 -f 'openclaw-gateway'", timeout=5)
-            time.sleep(2)
+                self.run_command(f"{self.watchdog_command} stop", timeout=10)
+                # SIGTERM, then SIGKILL if the gateway is still up after 5 s
+                self.restarter.stop(self.restarter.find_pids())
 
             # Git pull
             output, code = self.run_command(
@@ -1745,7 +5786,7 @@ Diff:
             # Restart gateway
             self.restart_gateway()
         else:
-            self.log_event(f"❌ {self.t('update_failed')}")
+            self.log_event(f"❌ {self.t('update_failed')}", level="error")
 
         self.check_all_status()
 
@@ -1763,72 +5804,54 @@ Diff:
 
     def reset_usage_stats(self):
         """Reset usage statistics"""
-        self.tokens_today = 0
-        self.cost_today = 0.0
-        self.usage_by_model = {}
+        self.usage.reset()
+        self.usage.flush()
         self.update_usage_display()
-        self.save_usage_stats()
         self.log_event(f"🔄 {self.t('reset')} - {self.t('usage_stats')}")
 
     def update_usage_display(self):
         """Update the usage stats display"""
-        self.tokens_label.config(text=f"{self.t('tokens_today')}: {self.tokens_today:,}")
-        self.cost_label.config(text=f"{self.t('cost_today')}: ${self.cost_today:.4f}")
+        if not self.advanced_built:
+            return
+        self._usage_display_version = self.usage.version
+        tokens, cost, by_model = self.usage.totals()
+        self.tokens_label.config(text=f"{self.t('tokens_today')}: {tokens:,}")
+        self.cost_label.config(text=f"{self.t('cost_today')}: ${cost:.4f}")
 
         # Show breakdown by model
-        if self.usage_by_model:
+        if by_model:
             details = " | ".join([f"{m.split('/')[-1][:10]}: ${c:.3f}"
-                                  for m, c in self.usage_by_model.items()])
+                                  for m, c in by_model.items()])
             self.usage_details_label.config(text=details)
         else:
             self.usage_details_label.config(text="")
 
+    def _refresh_usage_display(self):
+        self._usage_display_pending = False
+        if self.usage.version != self._usage_display_version:
+            self.update_usage_display()
+
     def load_usage_stats(self):
         """Load usage stats from file"""
-        try:
-            usage_file = self.openclaw_config_dir / "usage-stats.json"
-            if usage_file.exists():
-                with open(usage_file, 'r') as f:
-                    data = json.load(f)
-                    # Check if it's from today
-                    if data.get("date") == datetime.now().strftime("%Y-%m-%d"):
-                        self.tokens_today = data.get("tokens", 0)
-                        self.cost_today = data.get("cost", 0.0)
-                        self.usage_by_model = data.get("by_model", {})
-        except:
-            pass
+        self.usage.load()
 
     def save_usage_stats(self):
         """Save usage stats to file"""
-        try:
-            usage_file = self.openclaw_config_dir / "usage-stats.json"
-            with open(usage_file, 'w') as f:
-                json.dump({
-                    "date": datetime.now().strftime("%Y-%m-%d"),
-                    "tokens": self.tokens_today,
-                    "cost": self.cost_today,
-                    "by_model": self.usage_by_model
-                }, f, indent=2)
-        except:
-            pass
+        self.usage.flush()
 
     def add_usage(self, tokens, cost, model="unknown"):
-        """Add usage to today's stats"""
-        self.tokens_today += tokens
-        self.cost_today += cost
-        if model not in self.usage_by_model:
-            self.usage_by_model[model] = 0.0
-        self.usage_by_model[model] += cost
-        self.update_usage_display()
-        self.save_usage_stats()
+        """Add usage to today's stats (safe to call from any thread)"""
+        self.usage.add(tokens, cost, model)
+        # Coalesce display refreshes to at most 4 per second
+        if not self._usage_display_pending:
+            self._usage_display_pending = True
+            self.root.after(250, self._refresh_usage_display)
 
     def ignore_update(self):
         """Ignore the current update"""
         self.update_available = False
         self.has_security_update = False
-        self.install_update_btn.config(state=tk.DISABLED)
-        self.ignore_update_btn.config(state=tk.DISABLED)
-        self.recheck_btn.config(state=tk.DISABLED)
+        self.sync_update_buttons()
         self.log_event(f"🚫 {self.t('update_ignored')}")
         self.check_all_status()
 
@@ -1838,7 +5861,7 @@ Diff:
         self.log_event(f"🤖 {self.t('ai_checking')}")
 
         def do_recheck():
-            ai_result = self.ai_security_analysis(always_run=True) if hasattr(self, 'ai_security_analysis') else None
+            ai_result = self.cached_ai_security_analysis()
             self.root.after(0, lambda: self._recheck_complete(ai_result))
 
         threading.Thread(target=do_recheck, daemon=True).start()
@@ -1852,30 +5875,57 @@ Diff:
             if verdict == "SAFE":
                 self.log_event(f"✅ {self.t('ai_analysis_ok')}")
             elif verdict == "REVIEW":
-                self.log_event(f"⚠️ {self.t('ai_analysis_warning')}")
+                self.log_event(f"⚠️ {self.t('ai_analysis_warning')}", level="warning")
             else:
-                self.log_event(f"🔴 {self.t('ai_verdict')}: {verdict}")
+                self.log_event(f"🔴 {self.t('ai_verdict')}: {verdict}", level="error")
         else:
             self.log_event(f"❓ {self.t('ai_analysis_failed')}")
 
     def monitoring_loop(self):
-        """Background monitoring loop"""
+        """Background monitoring loop: probes run here when due, the UI thread only applies results"""
         while self.running:
+            keys = self.scheduler.wait_due()
+            if not keys:
+                break
+            snapshot = None
             try:
-                self.root.after(0, self.check_all_status)
-            except:
+                snapshot = self.probe_engine.run(keys)
+                samples = self.record_history(snapshot)
+                self.history.maybe_compact()
+                self.root.after(0, lambda snapshot=snapshot, samples=samples:
+                                self.apply_snapshot(snapshot, samples))
+            except Exception:
                 pass
-            time.sleep(5)
+            finally:
+                for key in keys:
+                    self.scheduler.report(key, snapshot is not None and self.probe_healthy(key, snapshot))
+
+    def _on_window_state(self, event, minimized):
+        if event.widget is self.root:
+            self.scheduler.set_slowdown(self.minimized_slowdown if minimized else 1.0)
 
     def start_monitoring(self):
-        """Start the monitoring thread"""
-        self.check_all_status()
+        """Start the monitoring thread (it also runs the first round, so the window paints at once)"""
+        for key in self.component_keys:
+            self.update_status(key, None, self.t("checking"))
+        self.log_watcher.start()
+        self.root.bind("<Unmap>", lambda e: self._on_window_state(e, True), add="+")
+        self.root.bind("<Map>", lambda e: self._on_window_state(e, False), add="+")
         thread = threading.Thread(target=self.monitoring_loop, daemon=True)
         thread.start()
 
     def on_close(self):
         """Handle window close - proper cleanup"""
         self.running = False
+        self.scheduler.close()
+        self.log_watcher.close()
+        self.probe_engine.shutdown()
+        self.usage.close()
+        self.history.close()
+        if self.metrics_exporter:
+            self.metrics_exporter.close()
+        self.ws_probe.close()
+        self.port_prober.close()
         # Give threads a moment to stop
         time.sleep(0.1)
         try:
@@ -1893,6 +5943,50 @@ Diff:
         self.root.mainloop()
 
 
-if __name__ == "__main__":
-    app = OpenClawMonitor()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OpenClaw Monitor - GUI for Gateway & TUI Monitoring")
+    parser.add_argument("--headless", action="store_true",
+                        help="run the watchdog checks and restart policy without a GUI")
+    parser.add_argument("--interval", type=float, default=30,
+                        help="seconds between headless checks (default: 30)")
+    parser.add_argument("--once", action="store_true",
+                        help="with --headless: run a single check and exit (for cron)")
+    parser.add_argument("--watchdog", choices=WATCHDOG_COMMANDS, metavar="COMMAND",
+                        help="watchdog.sh commands: " + ", ".join(WATCHDOG_COMMANDS))
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="serve Prometheus metrics on 127.0.0.1:PORT/metrics")
+    parser.add_argument("--supervise", action="store_true",
+                        help="with --headless or --watchdog start/daemon: run the gateway as a child "
+                             "process and restart it as soon as it exits")
+    args = parser.parse_args(argv)
+    if args.supervise:
+        if os.name == "nt":
+            parser.error("--supervise needs a POSIX system")
+        if not (args.headless or args.watchdog in ("start", "daemon")) or args.once:
+            parser.error("--supervise needs --headless or --watchdog start/daemon")
+
+    if args.watchdog:
+        engine = WatchdogEngine(interval=args.interval, metrics_port=args.metrics_port,
+                                supervise=args.supervise)
+        try:
+            return engine.command(args.watchdog)
+        finally:
+            engine.close()
+
+    if args.headless:
+        monitor = HeadlessMonitor(interval=args.interval, metrics_port=args.metrics_port,
+                                  supervise=args.supervise)
+        if args.once:
+            print(monitor.tick())
+            monitor.close()
+        else:
+            monitor.run()
+        return 0
+
+    app = OpenClawMonitor(metrics_port=args.metrics_port)
     app.run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
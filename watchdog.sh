@@ -151,7 +151,12 @@ check_stuck_sessions() {
             sed 's/"date":"//' || true)
 
         if [[ -n "$stuck" ]]; then
-            local stuck_time=$(date -j -f "%Y-%m-%dT%H:%M:%S" "${stuck:0:19}" +%s 2>/dev/null || echo "0")
+            # GNU date (Linux) first, then BSD date (macOS); the log time is UTC
+            local stuck_time=$(date -d "$stuck" +%s 2>/dev/null || \
+                date -j -u -f "%Y-%m-%dT%H:%M:%S" "${stuck:0:19}" +%s 2>/dev/null || echo "0")
+            if [[ "$stuck_time" -eq 0 ]]; then
+                return 0
+            fi
             local now=$(date +%s)
             local age=$((now - stuck_time))
 